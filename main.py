@@ -1,6 +1,5 @@
 from fastapi import FastAPI, Request, HTTPException, Depends
 from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.staticfiles import StaticFiles
 import os
 import asyncio
 from datetime import datetime
@@ -10,6 +9,29 @@ import hashlib
 import hmac
 import json
 from config import get_settings, Settings
+from utils.scrapers import (
+    start_http_client,
+    close_http_client,
+    enrichment_cache,
+    enrichment_flight,
+    download_stats,
+)
+from utils import card_cache, history_store, recommendation_store, telegram_client
+from utils.templates import CachedStaticFiles
+from routers import links, jobs, chats, search, history, webhook
+from services import (
+    worker_pool,
+    tag_cache,
+    warm_tag_cache,
+    regeneration_scheduler,
+    analysis_pipeline,
+    update_queue,
+)
+from models import (
+    AsyncSessionLocal,
+    get_pool_status,
+)
+from models.base import async_engine
 
 # Set up logging
 logging.basicConfig(
@@ -21,7 +43,15 @@ logger = logging.getLogger(__name__)
 app = FastAPI()
 
 # Mount the static directory
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
+
+# API routers
+app.include_router(links.router)
+app.include_router(jobs.router)
+app.include_router(chats.router)
+app.include_router(search.router)
+app.include_router(history.router)
+app.include_router(webhook.router)
 
 # Global variable to store the background task
 health_check_task = None
@@ -67,6 +97,24 @@ async def startup_event():
     # Start the periodic health check when the application starts
     global health_check_task
     health_check_task = asyncio.create_task(periodic_health_check())
+    # Shared keep-alive HTTP client used by the link scrapers
+    await start_http_client()
+    # Keep-alive Bot API client and its outbound message queue
+    await telegram_client.start()
+    # Preload hot tag ids so common tags resolve without a DB round-trip
+    try:
+        async with AsyncSessionLocal() as db:
+            await warm_tag_cache(db)
+    except Exception as e:
+        logger.error(f"Tag cache warm-up failed: {str(e)}")
+    # Background enrichment workers
+    if get_settings().ENRICHMENT_WORKERS > 0:
+        await worker_pool.start()
+    # Telegram updates posted to /webhook are processed from this queue
+    await update_queue.start()
+    # Recommendations from the model, refreshed as chats change
+    if get_settings().ANALYSIS_INTERVAL > 0:
+        await analysis_pipeline.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
@@ -77,6 +125,14 @@ async def shutdown_event():
             await health_check_task
         except asyncio.CancelledError:
             logger.info("Periodic health check task cancelled")
+    # Finish saving accepted updates before their workers' dependencies stop
+    await update_queue.stop()
+    await worker_pool.stop()
+    await analysis_pipeline.stop()
+    await regeneration_scheduler.stop()
+    await close_http_client()
+    await telegram_client.stop()
+    await async_engine.dispose()
 
 @app.get("/", response_class=HTMLResponse)
 async def read_index(request: Request):
@@ -131,6 +187,24 @@ async def periodic_health_check():
             logger.error(f"Periodic health check failed: {str(e)}")
             await asyncio.sleep(60)  # Still wait before retrying
 
+@app.get("/metrics")
+async def metrics():
+    return {
+        "enrichment_cache": enrichment_cache.stats(),
+        "enrichment_singleflight": enrichment_flight.stats(),
+        "opengraph_download": download_stats,
+        "enrichment_workers": worker_pool.stats(),
+        "db_pool": get_pool_status(),
+        "tag_cache": tag_cache.stats(),
+        "card_cache": card_cache.stats(),
+        "history_pages": history_store.stats(),
+        "html_regeneration": regeneration_scheduler.stats(),
+        "recommendations": recommendation_store.stats(),
+        "ai_analysis": analysis_pipeline.stats(),
+        "telegram": telegram_client.stats(),
+        "webhook": update_queue.stats(),
+    }
+
 @app.get("/info")
 async def info(settings: Settings = Depends(get_settings)):
     return {
@@ -1,14 +1,31 @@
-from .base import Base, get_db
-from .models import UserLink, Tag, UserFile, UserNote
+from .base import (
+    Base,
+    SessionLocal,
+    AsyncSessionLocal,
+    get_db,
+    get_async_db,
+    get_pool_status,
+)
+from .models import UserLink, Tag, UserFile, UserNote, EnrichmentJob, ChatAnalysis
 from .tables import link_tags, file_tags, note_tags
+from . import loading
+from .search import ensure_search_index
 
 __all__ = [
     'Base',
+    'SessionLocal',
+    'AsyncSessionLocal',
     'get_db',
+    'get_async_db',
+    'get_pool_status',
+    'loading',
+    'ensure_search_index',
     'UserLink',
     'Tag',
     'UserFile',
     'UserNote',
+    'EnrichmentJob',
+    'ChatAnalysis',
     'link_tags',
     'file_tags',
     'note_tags'
@@ -1,12 +1,52 @@
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine.url import make_url
 from config import get_settings
+from .pool import InstrumentedQueuePool, InstrumentedAsyncQueuePool, pool_status
 
 settings = get_settings()
 
+def to_async_database_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver (asyncpg / aiosqlite)."""
+    scheme, sep, rest = url.partition("://")
+    driver_map = {
+        "postgres": "postgresql+asyncpg",
+        "postgresql": "postgresql+asyncpg",
+        "postgresql+psycopg2": "postgresql+asyncpg",
+        "sqlite": "sqlite+aiosqlite",
+        "sqlite+pysqlite": "sqlite+aiosqlite",
+    }
+    return driver_map.get(scheme, scheme) + sep + rest
+
+def engine_options(url: str, poolclass) -> dict:
+    """Pool options from Settings; SQLite keeps SQLAlchemy's default pool."""
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    if make_url(url).get_backend_name() != "sqlite":
+        options.update(
+            poolclass=poolclass,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+        )
+    return options
+
 # Create database engine
-engine = create_engine(settings.DATABASE_URL)
+engine = create_engine(
+    settings.DATABASE_URL,
+    **engine_options(settings.DATABASE_URL, InstrumentedQueuePool)
+)
+
+# Async engine used by the request handlers and background workers
+async_database_url = settings.ASYNC_DATABASE_URL or to_async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(
+    async_database_url,
+    **engine_options(async_database_url, InstrumentedAsyncQueuePool)
+)
 
 # Create declarative base
 Base = declarative_base()
@@ -14,10 +54,86 @@ Base = declarative_base()
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Objects stay usable after commit; async sessions can't lazy-refresh them
+AsyncSessionLocal = sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+class BlockingSession:
+    """
+    The parts of AsyncSession the services use, over a plain Session.
+
+    Each awaited call runs the query right away on the event loop thread,
+    blocking it, which is how the handlers behaved before the async port.
+    Used for DATABASE_MODE=sync only.
+    """
+
+    def __init__(self, session):
+        self.sync_session = session
+
+    @property
+    def bind(self):
+        return self.sync_session.bind
+
+    def add(self, instance) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances) -> None:
+        self.sync_session.add_all(instances)
+
+    async def execute(self, statement, params=None, **kwargs):
+        return self.sync_session.execute(statement, params, **kwargs)
+
+    async def get(self, entity, ident, **kwargs):
+        return self.sync_session.get(entity, ident, **kwargs)
+
+    async def merge(self, instance, **kwargs):
+        return self.sync_session.merge(instance, **kwargs)
+
+    async def refresh(self, instance, **kwargs) -> None:
+        self.sync_session.refresh(instance, **kwargs)
+
+    async def delete(self, instance) -> None:
+        self.sync_session.delete(instance)
+
+    async def flush(self, objects=None) -> None:
+        self.sync_session.flush(objects)
+
+    async def commit(self) -> None:
+        self.sync_session.commit()
+
+    async def rollback(self) -> None:
+        self.sync_session.rollback()
+
+    async def close(self) -> None:
+        self.sync_session.close()
+
+# Dependency to get an async DB session
+async def get_async_db():
+    if settings.DATABASE_MODE == "sync":
+        db = BlockingSession(SessionLocal(expire_on_commit=False))
+        try:
+            yield db
+        finally:
+            await db.close()
+        return
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_pool_status() -> dict:
+    """Connection pool occupancy and wait times for both engines."""
+    return {
+        "sync": pool_status(engine.pool),
+        "async": pool_status(async_engine.sync_engine.pool),
+    }
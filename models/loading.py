@@ -0,0 +1,17 @@
+"""
+Relationship loading profiles, one per read path.
+
+Relationships on the models are lazy; queries pick what they need here so
+a listing never LEFT JOINs notes and rendering never lazy-loads tags link
+by link. Exports and search select plain columns (exports batch their
+tags), so files and notes need no profile (see services/export_service.py
+and services/search_service.py).
+"""
+from sqlalchemy.orm import noload, selectinload
+from .models import UserLink
+
+# GET /links: each item shows its tag names, never its notes
+LINK_LISTING = (selectinload(UserLink.tags), noload(UserLink.notes))
+
+# HTML history page: tag names feed the cards and the tag filter bar
+LINK_RENDERING = (selectinload(UserLink.tags), noload(UserLink.notes))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .base import Base
@@ -6,6 +6,10 @@ from .tables import link_tags, file_tags, note_tags
 
 class UserLink(Base):
     __tablename__ = "user_links"
+    __table_args__ = (
+        # Keyset pagination of a chat's links (GET /links)
+        Index("ix_user_links_chat_created_id", "chat_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True)
     chat_id = Column(String, nullable=False, index=True)  # Telegram chat ID
@@ -16,6 +20,9 @@ class UserLink(Base):
     price = Column(String, nullable=True)
     images = Column(JSON, nullable=True)  # Store as JSON
     site_name = Column(String, nullable=True)
+    # "pending" until background enrichment fills in the metadata, then
+    # "ready" (or "failed" once the enrichment job gives up)
+    status = Column(String, nullable=False, default="ready", server_default="ready")
     created_at = Column(
         DateTime(timezone=True), nullable=False, server_default=func.now()
     )
@@ -24,7 +31,7 @@ class UserLink(Base):
     notes = relationship(
         "UserNote",
         backref="link",
-        lazy="joined",
+        lazy="select",  # Load per query via models.loading
         cascade="all, delete",  # Deletes associated UserNotes when UserLink is deleted
     )
 
@@ -65,7 +72,7 @@ class UserFile(Base):
     notes = relationship(
         "UserNote",
         backref="file",
-        lazy="joined",
+        lazy="select",
         cascade="all, delete",  # Deletes associated UserNotes when UserFile is deleted
     )
 
@@ -93,4 +100,53 @@ class UserNote(Base):
     tags = relationship("Tag", secondary=note_tags, back_populates="notes")
 
     def __repr__(self):
-        return f"<UserNote {self.id}>" 
\ No newline at end of file
+        return f"<UserNote {self.id}>"
+
+
+class EnrichmentJob(Base):
+    __tablename__ = "enrichment_jobs"
+    __table_args__ = (
+        Index("ix_enrichment_jobs_status_next_run", "status", "next_run_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    link_id = Column(
+        Integer, ForeignKey("user_links.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    status = Column(String, nullable=False, default="queued")  # queued/running/done/failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    last_error = Column(Text, nullable=True)
+    next_run_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    locked_at = Column(DateTime(timezone=True), nullable=True)  # Set while running
+    created_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    updated_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
+
+    link = relationship("UserLink")
+
+    def __repr__(self):
+        return f"<EnrichmentJob {self.id} {self.status}>"
+
+
+class ChatAnalysis(Base):
+    """What a chat's current recommendations were generated from."""
+    __tablename__ = "chat_analyses"
+
+    chat_id = Column(String, primary_key=True)  # Telegram chat ID
+    link_count = Column(Integer, nullable=False, default=0)
+    max_link_id = Column(Integer, nullable=False, default=0)
+    tags = Column(JSON, nullable=False, default=list)  # Tag names at analysis time
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    analyzed_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
+
+    def __repr__(self):
+        return f"<ChatAnalysis {self.chat_id}>"
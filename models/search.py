@@ -0,0 +1,149 @@
+"""
+Full-text search indexes for links, notes and files.
+
+Postgres gets a stored generated tsvector column plus a GIN index on each
+table, so the index follows every insert/update without application code.
+SQLite gets an FTS5 external-content table per source, kept in sync by
+triggers.
+
+New databases get these from create_all. Existing ones are migrated once,
+after deploying a version that adds search or changes SEARCH_TEXT_CONFIG:
+
+    python -m models.search
+
+Adding a generated column rewrites the table, so this is not run on every
+startup.
+"""
+import re
+from typing import Dict, List, NamedTuple, Optional
+from sqlalchemy import event, text
+from config import get_settings
+from .base import Base, engine
+
+class SearchSource(NamedTuple):
+    table: str
+    # (column, weight) pairs; weight A ranks above B above C
+    columns: List[tuple]
+    title: str  # Column shown as the result title
+    body: str  # SQL expression the snippet is cut from
+
+SEARCH_SOURCES: Dict[str, SearchSource] = {
+    "link": SearchSource(
+        "user_links",
+        [("title", "A"), ("description", "B"), ("site_name", "C")],
+        "title",
+        "coalesce(description, title, '')",
+    ),
+    "note": SearchSource(
+        "user_notes",
+        [("note_title", "A"), ("note_content", "B")],
+        "note_title",
+        "note_content",
+    ),
+    "file": SearchSource(
+        "user_files",
+        [("title", "A"), ("summary", "B"), ("extracted_text", "C")],
+        "title",
+        "coalesce(summary, extracted_text, '')",
+    ),
+}
+
+def text_search_config() -> str:
+    """Postgres text search configuration; inlined into DDL, so it must be a plain name."""
+    config = get_settings().SEARCH_TEXT_CONFIG
+    if not re.fullmatch(r"[a-z_]+", config):
+        raise ValueError(f"Invalid SEARCH_TEXT_CONFIG: {config!r}")
+    return config
+
+def fts_table(source: SearchSource) -> str:
+    return f"{source.table}_fts"
+
+def _postgres_ddl(source: SearchSource, current_expression: Optional[str]) -> List[str]:
+    """
+    Statements that bring a table's search column up to date.
+
+    `current_expression` is the existing column's generation expression
+    (None if there is no column). A column built with another text search
+    configuration is dropped and added again; Postgres can't alter a
+    generated column's expression in place.
+    """
+    config = text_search_config()
+    if current_expression is not None and f"'{config}'::regconfig" in current_expression:
+        return [
+            f"CREATE INDEX IF NOT EXISTS ix_{source.table}_search "
+            f"ON {source.table} USING GIN (search_vector)",
+        ]
+    vector = " || ".join(
+        f"setweight(to_tsvector('{config}'::regconfig, coalesce({column}, '')), '{weight}')"
+        for column, weight in source.columns
+    )
+    statements = []
+    if current_expression is not None:
+        # Dropping the column drops its index too
+        statements.append(f"ALTER TABLE {source.table} DROP COLUMN search_vector")
+    return statements + [
+        f"ALTER TABLE {source.table} ADD COLUMN search_vector tsvector "
+        f"GENERATED ALWAYS AS ({vector}) STORED",
+        f"CREATE INDEX IF NOT EXISTS ix_{source.table}_search "
+        f"ON {source.table} USING GIN (search_vector)",
+    ]
+
+def _postgres_search_expression(connection, table: str) -> Optional[str]:
+    return connection.execute(
+        text(
+            "SELECT generation_expression FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = :table "
+            "AND column_name = 'search_vector'"
+        ),
+        {"table": table},
+    ).scalar()
+
+def _sqlite_ddl(source: SearchSource) -> List[str]:
+    fts = fts_table(source)
+    columns = [column for column, _ in source.columns]
+    names = ", ".join(columns)
+    new_values = ", ".join(f"new.{column}" for column in columns)
+    old_values = ", ".join(f"old.{column}" for column in columns)
+    delete_old = (
+        f"INSERT INTO {fts}({fts}, rowid, {names}) VALUES ('delete', old.id, {old_values});"
+    )
+    insert_new = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{names}, content='{source.table}', content_rowid='id')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {source.table} "
+        f"BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {source.table} "
+        f"BEGIN {delete_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {names} ON {source.table} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+def ensure_search_index(connection) -> None:
+    """Create any missing or outdated search columns/tables/triggers (sync connection)."""
+    dialect = connection.dialect.name
+    for source in SEARCH_SOURCES.values():
+        if dialect == "postgresql":
+            current = _postgres_search_expression(connection, source.table)
+            for statement in _postgres_ddl(source, current):
+                connection.execute(text(statement))
+        elif dialect == "sqlite":
+            exists = connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = :name"),
+                {"name": fts_table(source)},
+            ).first()
+            for statement in _sqlite_ddl(source):
+                connection.execute(text(statement))
+            if not exists:
+                # Index rows saved before the FTS table existed
+                fts = fts_table(source)
+                connection.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_search_index(target, connection, **kw):
+    ensure_search_index(connection)
+
+if __name__ == "__main__":
+    with engine.begin() as connection:
+        ensure_search_index(connection)
+    print("Search index is up to date")
@@ -0,0 +1,101 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from models import get_async_db
+from services import (
+    export_ndjson,
+    export_csv,
+    import_records,
+    get_cards_page,
+    get_chat_tags,
+    delete_chat_links,
+    remove_tag_from_chat,
+    regeneration_scheduler,
+)
+from services.export_service import EXPORT_ORDER
+from schemas.chat import ChatImportResponse, CardsPageResponse
+
+router = APIRouter()
+
+def _check_kind(kind: str) -> None:
+    if kind not in EXPORT_ORDER:
+        raise HTTPException(
+            status_code=400,
+            detail=f"kind must be one of: {', '.join(EXPORT_ORDER)}"
+        )
+
+@router.get("/chats/{chat_id}/export")
+async def export_chat(chat_id: str, format: str = "ndjson", kind: str = None):
+    """
+    Stream a chat's links, files and notes with their tags.
+
+    NDJSON includes every record type unless `kind` narrows it; CSV holds a
+    single record type (`kind`, default "link").
+    """
+    if format == "ndjson":
+        kinds: List[str] = [kind] if kind else EXPORT_ORDER
+        for name in kinds:
+            _check_kind(name)
+        return StreamingResponse(
+            export_ndjson(chat_id, kinds),
+            media_type="application/x-ndjson",
+            headers={"Content-Disposition": f'attachment; filename="{chat_id}.ndjson"'}
+        )
+    if format == "csv":
+        kind = kind or "link"
+        _check_kind(kind)
+        return StreamingResponse(
+            export_csv(chat_id, kind),
+            media_type="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{chat_id}-{kind}s.csv"'}
+        )
+    raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+
+@router.post("/chats/{chat_id}/import", response_model=ChatImportResponse)
+async def import_chat(
+    chat_id: str,
+    request: Request,
+    format: str = "ndjson",
+    kind: str = "link",
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Import an NDJSON or CSV export into a chat, reading the body as a stream."""
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+    _check_kind(kind)
+    result = await import_records(db, chat_id, request.stream(), format, kind)
+    if any(result["imported"].values()):
+        regeneration_scheduler.schedule(chat_id)
+    return result
+
+@router.get("/chats/{chat_id}/cards", response_model=CardsPageResponse)
+async def chat_cards(
+    chat_id: str,
+    tag: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = Query(30, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """One page of rendered bookmark cards for the paged history view."""
+    html, next_cursor = await get_cards_page(db, chat_id, tag, after, limit)
+    return {"html": html, "next_cursor": next_cursor}
+
+@router.get("/chats/{chat_id}/tags", response_model=List[str])
+async def chat_tags(chat_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Tags used on a chat's links, for the filters bar."""
+    return await get_chat_tags(db, chat_id)
+
+@router.delete("/chats/{chat_id}/links")
+async def delete_all_links(chat_id: str, db: AsyncSession = Depends(get_async_db)):
+    """Delete every link in a chat, with their tags and notes."""
+    deleted = await delete_chat_links(db, chat_id)
+    await regeneration_scheduler.flush(chat_id)
+    return {"message": "All links deleted successfully", "deleted": deleted}
+
+@router.delete("/chats/{chat_id}/tags/{tag_name}")
+async def delete_chat_tag(chat_id: str, tag_name: str, db: AsyncSession = Depends(get_async_db)):
+    """Take a tag off every link in a chat; other chats keep it."""
+    removed = await remove_tag_from_chat(db, chat_id, tag_name)
+    await regeneration_scheduler.flush(chat_id)
+    return {"message": "Tag deleted successfully", "links": removed}
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from utils import history_store
+
+router = APIRouter()
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.strip('"') == etag:
+            return True
+    return False
+
+@router.get("/history/{chat_id}")
+async def history_page(chat_id: str, request: Request):
+    """
+    Serve a chat's generated history page.
+
+    Sends the precompressed brotli/gzip variant the client accepts, and a
+    304 with no body when its cached copy (If-None-Match) is still current.
+    """
+    artifact = history_store.open(
+        f"{chat_id}_history.html",
+        request.headers.get("accept-encoding", "")
+    )
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="History page not found")
+
+    headers = {
+        "ETag": f'"{artifact.etag}"',
+        # Cache, but revalidate every time: the page changes with each edit
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, artifact.etag):
+        history_store.record(artifact.encoding, not_modified=True)
+        return Response(status_code=304, headers=headers)
+
+    if artifact.encoding:
+        headers["Content-Encoding"] = artifact.encoding
+    history_store.record(artifact.encoding)
+    return FileResponse(artifact.path, media_type="text/html", headers=headers)
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import get_async_db
+from services import get_job, get_queue_stats
+from schemas.job import JobStatusResponse, QueueStatsResponse
+
+router = APIRouter()
+
+@router.get("/jobs/stats", response_model=QueueStatsResponse)
+async def queue_stats(db: AsyncSession = Depends(get_async_db)):
+    """Queue depth by job status."""
+    return await get_queue_stats(db)
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def job_status(
+    job_id: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get the status of an enrichment job."""
+    return await get_job(db, job_id)
@@ -1,16 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from models import get_db
-from services import save_link_to_db, add_tag_to_link
-from schemas.link import LinkCreate, LinkResponse
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from models import get_async_db
+from services import (
+    save_link_to_db,
+    list_links,
+    add_tag_to_link,
+    delete_link,
+    update_link_title,
+    remove_tag_from_link,
+    save_links_bulk,
+    enrich_links,
+    enqueue_link,
+    worker_pool,
+    regeneration_scheduler,
+)
+from schemas.link import (
+    LinkCreate,
+    LinkResponse,
+    LinkEnrichRequest,
+    BulkLinkResponse,
+    LinkListResponse,
+    LinkTitleUpdate,
+)
+from schemas.job import LinkSubmit, LinkSubmitResponse
 
 router = APIRouter()
 
+@router.get("/links", response_model=LinkListResponse)
+async def get_links(
+    chat_id: str,
+    tag: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List a chat's links newest first; pass next_cursor as `after` for the next page."""
+    links, next_cursor = await list_links(db, chat_id, tag, after, limit)
+    return {"links": links, "next_cursor": next_cursor}
+
 @router.post("/links/", response_model=LinkResponse)
 async def create_link(
     link_data: LinkCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new link with tags."""
     link_id = await save_link_to_db(
@@ -18,16 +51,91 @@ async def create_link(
         link_data.chat_id,
         link_data.link,
         link_data.tags,
-        link_data.metadata
+        link_data.metadata.dict()
     )
+    regeneration_scheduler.schedule(link_data.chat_id)
     return {"id": link_id, "message": "Link saved successfully"}
 
+@router.post("/links/bulk", response_model=BulkLinkResponse)
+async def create_links_bulk(
+    links_data: List[LinkCreate],
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Create many links at once; returns ids and per-item errors."""
+    ids, errors = await save_links_bulk(db, links_data)
+    for chat_id in {item.chat_id for item, link_id in zip(links_data, ids) if link_id is not None}:
+        regeneration_scheduler.schedule(chat_id)
+    return {"ids": ids, "errors": errors, "saved": len(ids) - len(errors)}
+
+@router.post("/links/submit", response_model=LinkSubmitResponse, status_code=202)
+async def submit_link(
+    link_data: LinkSubmit,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Accept a link immediately and enrich it in the background."""
+    link_id, job_id = await enqueue_link(
+        db,
+        link_data.chat_id,
+        link_data.link,
+        link_data.tags
+    )
+    worker_pool.notify()
+    return {
+        "id": link_id,
+        "job_id": job_id,
+        "status": "pending",
+        "message": "Link accepted for enrichment"
+    }
+
 @router.post("/links/{link_id}/tags/{tag_name}")
 async def add_tag(
     link_id: int,
     tag_name: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add a tag to an existing link."""
-    await add_tag_to_link(db, link_id, tag_name)
-    return {"message": "Tag added successfully"} 
\ No newline at end of file
+    chat_id = await add_tag_to_link(db, link_id, tag_name)
+    await regeneration_scheduler.flush(chat_id)
+    return {"message": "Tag added successfully"}
+
+@router.delete("/links/{link_id}/tags/{tag_name}")
+async def remove_tag(
+    link_id: int,
+    tag_name: str,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Take a tag off a link."""
+    chat_id = await remove_tag_from_link(db, link_id, tag_name)
+    await regeneration_scheduler.flush(chat_id)
+    return {"message": "Tag removed successfully"}
+
+@router.patch("/links/{link_id}")
+async def rename_link(
+    link_id: int,
+    update: LinkTitleUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Change a link's title."""
+    chat_id = await update_link_title(db, link_id, update.title)
+    await regeneration_scheduler.flush(chat_id)
+    return {"message": "Title updated successfully"}
+
+@router.delete("/links/{link_id}")
+async def remove_link(
+    link_id: int,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Delete a link with its tags and notes."""
+    chat_id = await delete_link(db, link_id)
+    await regeneration_scheduler.flush(chat_id)
+    return {"message": "Link deleted successfully"}
+
+@router.post("/links/enrich")
+async def enrich(request: LinkEnrichRequest):
+    """Enrich many links at once, streaming NDJSON results as each finishes."""
+    if not request.links:
+        raise HTTPException(status_code=400, detail="No links provided")
+    return StreamingResponse(
+        enrich_links(request.links),
+        media_type="application/x-ndjson"
+    )
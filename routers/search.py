@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from models import get_async_db
+from models.search import SEARCH_SOURCES
+from services import search
+from schemas.search import SearchResponse
+
+router = APIRouter()
+
+@router.get("/search", response_model=SearchResponse)
+async def search_chat(
+    chat_id: str,
+    q: str = Query(..., min_length=1),
+    kind: Optional[List[str]] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Search a chat's links, notes and files, best matches first."""
+    for name in kind or []:
+        if name not in SEARCH_SOURCES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"kind must be one of: {', '.join(SEARCH_SOURCES)}"
+            )
+    results, next_offset = await search(db, chat_id, q, kind, limit, offset)
+    return {"results": results, "next_offset": next_offset}
@@ -0,0 +1,35 @@
+import asyncio
+import hmac
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Request
+from config import get_settings
+from services import update_queue
+from schemas.webhook import WebhookResponse
+
+router = APIRouter()
+
+@router.post("/webhook", response_model=WebhookResponse)
+async def telegram_webhook(
+    request: Request,
+    x_telegram_bot_api_secret_token: Optional[str] = Header(None)
+):
+    """Accept a Telegram update and process it in the background."""
+    secret = get_settings().TELEGRAM_WEBHOOK_SECRET
+    if not secret or not hmac.compare_digest(
+        (x_telegram_bot_api_secret_token or "").encode(), secret.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Invalid webhook secret token")
+
+    try:
+        update = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Update is not valid JSON")
+    if not isinstance(update, dict):
+        raise HTTPException(status_code=400, detail="Update must be a JSON object")
+
+    try:
+        queued = update_queue.submit(update)
+    except (asyncio.QueueFull, RuntimeError):
+        # Telegram retries failed deliveries, so this is backpressure, not loss
+        raise HTTPException(status_code=503, detail="Update queue is full")
+    return {"status": "queued" if queued else "duplicate"}
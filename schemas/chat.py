@@ -0,0 +1,15 @@
+from typing import Dict, List, Optional
+from pydantic import BaseModel
+
+class ChatImportError(BaseModel):
+    record: int
+    error: str
+
+class ChatImportResponse(BaseModel):
+    imported: Dict[str, int]
+    error_count: int
+    errors: List[ChatImportError]
+
+class CardsPageResponse(BaseModel):
+    html: str
+    next_cursor: Optional[str] = None
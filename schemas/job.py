@@ -0,0 +1,35 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+class LinkSubmit(BaseModel):
+    chat_id: str
+    link: str
+    tags: List[str] = []
+
+class LinkSubmitResponse(BaseModel):
+    id: int
+    job_id: int
+    status: str
+    message: str
+
+class JobStatusResponse(BaseModel):
+    id: int
+    link_id: int
+    status: str
+    attempts: int
+    max_attempts: int
+    last_error: Optional[str] = None
+    next_run_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class QueueStatsResponse(BaseModel):
+    queued: int
+    due: int
+    running: int
+    done: int
+    failed: int
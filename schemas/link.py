@@ -1,5 +1,6 @@
+from datetime import datetime
 from typing import List, Dict, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
 
 class LinkMetadata(BaseModel):
     title: Optional[str] = None
@@ -17,4 +18,52 @@ class LinkCreate(BaseModel):
 
 class LinkResponse(BaseModel):
     id: int
-    message: str 
\ No newline at end of file
+    message: str
+
+class LinkTitleUpdate(BaseModel):
+    title: str
+
+    @validator("title")
+    def title_not_blank(cls, value):
+        value = value.strip()
+        if not value:
+            raise ValueError("title must not be empty")
+        return value
+
+class BulkLinkError(BaseModel):
+    index: int
+    error: str
+
+class BulkLinkResponse(BaseModel):
+    ids: List[Optional[int]]
+    errors: List[BulkLinkError]
+    saved: int
+
+class LinkEnrichRequest(BaseModel):
+    links: List[str]
+
+
+class LinkListItem(BaseModel):
+    id: int
+    link: str
+    title: Optional[str] = None
+    description: Optional[str] = None
+    url: Optional[str] = None
+    price: Optional[str] = None
+    images: Optional[List[str]] = None
+    site_name: Optional[str] = None
+    status: str
+    created_at: datetime
+    tags: List[str] = []
+
+    @validator("tags", pre=True, each_item=True)
+    def tag_name(cls, value):
+        # Accept Tag rows straight from the ORM
+        return getattr(value, "name", value)
+
+    class Config:
+        orm_mode = True
+
+class LinkListResponse(BaseModel):
+    links: List[LinkListItem]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,15 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import BaseModel
+
+class SearchResult(BaseModel):
+    kind: str
+    id: int
+    title: Optional[str] = None
+    snippet: Optional[str] = None
+    rank: float
+    created_at: datetime
+
+class SearchResponse(BaseModel):
+    results: List[SearchResult]
+    next_offset: Optional[int] = None
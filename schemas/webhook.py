@@ -0,0 +1,4 @@
+from pydantic import BaseModel
+
+class WebhookResponse(BaseModel):
+    status: str  # "queued" or "duplicate"
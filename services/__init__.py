@@ -1,3 +1,56 @@
-from .link_service import save_link_to_db, add_tag_to_link
+from .link_service import (
+    save_link_to_db,
+    add_tag_to_link,
+    list_links,
+    get_links_for_rendering,
+    delete_link,
+    delete_chat_links,
+    update_link_title,
+    remove_tag_from_link,
+    remove_tag_from_chat,
+)
+from .bulk_service import save_links_bulk
+from .export_service import export_ndjson, export_csv
+from .import_service import import_records
+from .enrichment_service import enrich_links
+from .job_service import enqueue_link, get_job, get_queue_stats
+from .enrichment_worker import worker_pool
+from .tag_cache import tag_cache
+from .tag_service import warm_tag_cache, get_chat_tags
+from .search_service import search
+from .render_service import regenerate_html, get_cards_page
+from .regeneration import regeneration_scheduler
+from .analysis_worker import analysis_pipeline
+from .webhook_service import process_update
+from .update_worker import update_queue
 
-__all__ = ['save_link_to_db', 'add_tag_to_link'] 
\ No newline at end of file
+__all__ = [
+    'save_link_to_db',
+    'add_tag_to_link',
+    'list_links',
+    'get_links_for_rendering',
+    'delete_link',
+    'delete_chat_links',
+    'update_link_title',
+    'remove_tag_from_link',
+    'remove_tag_from_chat',
+    'save_links_bulk',
+    'export_ndjson',
+    'export_csv',
+    'import_records',
+    'enrich_links',
+    'enqueue_link',
+    'get_job',
+    'get_queue_stats',
+    'worker_pool',
+    'tag_cache',
+    'warm_tag_cache',
+    'search',
+    'regenerate_html',
+    'get_cards_page',
+    'get_chat_tags',
+    'regeneration_scheduler',
+    'analysis_pipeline',
+    'process_update',
+    'update_queue'
+] 
\ No newline at end of file
@@ -0,0 +1,211 @@
+import json
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import get_settings
+from models import UserLink, Tag, ChatAnalysis, link_tags, loading
+from utils import UserAnalysis, clean_json_string, parse_recommendations
+from utils.scrapers import get_http_client
+
+# Links considered for a chat's prompt, newest first, before the token budget cuts in
+MAX_SAMPLE_LINKS = 200
+RECOMMENDATIONS_PER_CHAT = 5
+
+SYSTEM_PROMPT = (
+    "You recommend new links for people's bookmark collections. For every "
+    "chat below, summarize the person's interests in one short paragraph and "
+    f"suggest up to {RECOMMENDATIONS_PER_CHAT} real, specific links they have "
+    "not saved yet, each filed under one of their existing tags. Reply with "
+    'JSON only: {"chats": {"<chat id>": {"general": "<summary>", '
+    '"recommendations": [{"destination_tag": "<tag>", "title": "<title>", '
+    '"link": "<url>"}]}}}'
+)
+
+class ChatSnapshot(NamedTuple):
+    """A chat's links and tags as of now, compared with its last analysis."""
+    chat_id: str
+    link_count: int
+    max_link_id: int
+    tags: Tuple[str, ...]
+    change: float  # Fraction of links and tags changed; 1.0 if never analyzed
+
+class ChatPrompt(NamedTuple):
+    snapshot: ChatSnapshot
+    text: str
+    tokens: int
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used for the budgets."""
+    return len(text) // 4 + 1
+
+async def find_chats_to_analyze(db: AsyncSession, min_change: float) -> List[ChatSnapshot]:
+    """
+    Chats never analyzed, or whose links and tags changed by at least
+    `min_change` since their last analysis, most changed first.
+
+    Links added since the analysis are those above its max_link_id; the
+    rest of the count difference was deleted. Four aggregate queries
+    cover every chat.
+    """
+    counts = (await db.execute(
+        select(UserLink.chat_id, func.count(UserLink.id), func.max(UserLink.id))
+        .group_by(UserLink.chat_id)
+    )).all()
+
+    chat_tags: Dict[str, set] = {}
+    for chat_id, name in (await db.execute(
+        select(UserLink.chat_id, Tag.name)
+        .join(link_tags, link_tags.c.link_id == UserLink.id)
+        .join(Tag, Tag.id == link_tags.c.tag_id)
+        .distinct()
+    )).all():
+        chat_tags.setdefault(chat_id, set()).add(name)
+
+    previous = {
+        analysis.chat_id: analysis
+        for analysis in (await db.execute(select(ChatAnalysis))).scalars()
+    }
+    added = dict((await db.execute(
+        select(UserLink.chat_id, func.count(UserLink.id))
+        .join(ChatAnalysis, ChatAnalysis.chat_id == UserLink.chat_id)
+        .where(UserLink.id > ChatAnalysis.max_link_id)
+        .group_by(UserLink.chat_id)
+    )).all())
+
+    snapshots = []
+    for chat_id, link_count, max_link_id in counts:
+        tags = chat_tags.get(chat_id, set())
+        analysis = previous.get(chat_id)
+        if analysis is None:
+            change = 1.0
+        else:
+            new_links = added.get(chat_id, 0)
+            removed_links = max(analysis.link_count - (link_count - new_links), 0)
+            changed_tags = len(tags.symmetric_difference(analysis.tags or []))
+            baseline = max(analysis.link_count + len(analysis.tags or []), 1)
+            change = (new_links + removed_links + changed_tags) / baseline
+            if change == 0 or change < min_change:
+                continue
+        snapshots.append(ChatSnapshot(chat_id, link_count, max_link_id, tuple(sorted(tags)), change))
+
+    snapshots.sort(key=lambda snapshot: snapshot.change, reverse=True)
+    return snapshots
+
+async def build_chat_prompt(db: AsyncSession, snapshot: ChatSnapshot, token_budget: int) -> ChatPrompt:
+    """Describe a chat's tags and newest links within `token_budget`."""
+    header = f"Chat {snapshot.chat_id}\nTags: {', '.join(snapshot.tags) or '(none)'}\nLinks:\n"
+    lines = [header]
+    tokens = estimate_tokens(header)
+
+    result = await db.execute(
+        select(UserLink)
+        .options(*loading.LINK_LISTING)
+        .where(UserLink.chat_id == snapshot.chat_id)
+        .order_by(UserLink.created_at.desc(), UserLink.id.desc())
+        .limit(MAX_SAMPLE_LINKS)
+    )
+    for link in result.scalars():
+        title = (link.title or "Untitled")[:120]
+        tag_names = ", ".join(tag.name for tag in link.tags)
+        line = f"- {title} | {link.url or link.link} | tags: {tag_names or '-'}\n"
+        line_tokens = estimate_tokens(line)
+        if tokens + line_tokens > token_budget:
+            break
+        lines.append(line)
+        tokens += line_tokens
+    return ChatPrompt(snapshot, "".join(lines), tokens)
+
+def build_batches(prompts: List[ChatPrompt], token_budget: int, max_chats: int) -> List[List[ChatPrompt]]:
+    """Pack chats into model calls, in order, within the prompt budget."""
+    batches: List[List[ChatPrompt]] = []
+    batch: List[ChatPrompt] = []
+    batch_tokens = estimate_tokens(SYSTEM_PROMPT)
+    for prompt in prompts:
+        if batch and (len(batch) >= max_chats or batch_tokens + prompt.tokens > token_budget):
+            batches.append(batch)
+            batch, batch_tokens = [], estimate_tokens(SYSTEM_PROMPT)
+        batch.append(prompt)
+        batch_tokens += prompt.tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+def _parse_analysis(entry) -> Optional[UserAnalysis]:
+    if not isinstance(entry, dict):
+        return None
+    try:
+        return UserAnalysis(
+            general=str(entry.get("general", "")),
+            recommendations=parse_recommendations(entry.get("recommendations", [])),
+        )
+    except (ValueError, TypeError) as e:
+        print(f"Invalid analysis from model: {str(e)}")
+        return None
+
+async def request_analyses(batch: List[ChatPrompt]) -> Tuple[Dict[str, UserAnalysis], Dict[str, int]]:
+    """
+    Analyze a batch of chats with one chat completions call.
+
+    Returns:
+        Tuple of analyses by chat ID (chats the model skipped or answered
+        badly are missing) and the call's token usage
+
+    Raises:
+        httpx.HTTPError: If the model server can't be reached or errors
+        ValueError: If the reply isn't the expected JSON
+    """
+    settings = get_settings()
+    response = await get_http_client().post(
+        settings.OPENAI_API_URL,
+        headers={"Authorization": f"Bearer {settings.OPENAI_API_KEY}"},
+        json={
+            "model": settings.OPENAI_MODEL,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": "\n".join(prompt.text for prompt in batch)},
+            ],
+            "max_tokens": settings.ANALYSIS_COMPLETION_TOKENS_PER_CHAT * len(batch),
+            "response_format": {"type": "json_object"},
+        },
+        timeout=settings.ANALYSIS_TIMEOUT,
+    )
+    response.raise_for_status()
+    body = response.json()
+
+    try:
+        content = body["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        raise ValueError("Model reply has no message content")
+    reply = json.loads(clean_json_string(content))
+    chats = reply.get("chats") if isinstance(reply, dict) else None
+    if not isinstance(chats, dict):
+        raise ValueError('Model reply has no "chats" object')
+
+    analyses = {}
+    for prompt in batch:
+        analysis = _parse_analysis(chats.get(prompt.snapshot.chat_id))
+        if analysis is not None:
+            analyses[prompt.snapshot.chat_id] = analysis
+
+    usage = body.get("usage") or {}
+    return analyses, {
+        "prompt_tokens": int(usage.get("prompt_tokens", 0)),
+        "completion_tokens": int(usage.get("completion_tokens", 0)),
+    }
+
+async def save_analysis_basis(
+    db: AsyncSession,
+    snapshot: ChatSnapshot,
+    prompt_tokens: int,
+    completion_tokens: int
+) -> None:
+    """Remember what the chat was analyzed from, to measure later changes against."""
+    await db.merge(ChatAnalysis(
+        chat_id=snapshot.chat_id,
+        link_count=snapshot.link_count,
+        max_link_id=snapshot.max_link_id,
+        tags=list(snapshot.tags),
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+    ))
+    await db.commit()
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+from typing import Optional
+from config import get_settings
+from models import AsyncSessionLocal, ChatAnalysis
+from models.base import async_engine
+from utils import recommendation_store
+from .analysis_service import (
+    build_batches,
+    build_chat_prompt,
+    find_chats_to_analyze,
+    request_analyses,
+    save_analysis_basis,
+)
+from .regeneration import regeneration_scheduler
+
+logger = logging.getLogger(__name__)
+
+class AnalysisPipeline:
+    """
+    Periodically refreshes chats' recommendations with the model.
+
+    Each pass picks the chats whose links and tags changed enough since
+    their last analysis, packs them into token-budgeted batches (several
+    chats per model call) and writes the results to the recommendation
+    store. Pages are then rebuilt in the background; a render never waits
+    on the model, it just shows whatever recommendations are stored.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.passes = 0
+        self.chats_analyzed = 0
+        self.chats_skipped = 0  # Missing or invalid in the model's reply
+        self.batches = 0
+        self.failed_batches = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    async def start(self) -> None:
+        # chat_analyses came after the other tables; existing databases
+        # get it here rather than through a migration
+        async with async_engine.begin() as conn:
+            await conn.run_sync(ChatAnalysis.__table__.create, checkfirst=True)
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Started AI analysis every {self.interval}s")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"AI analysis pass failed: {str(e)}")
+
+    async def run_once(self) -> int:
+        """Analyze every chat that changed enough; returns how many were updated."""
+        settings = get_settings()
+        self.passes += 1
+        async with AsyncSessionLocal() as db:
+            snapshots = await find_chats_to_analyze(db, settings.ANALYSIS_MIN_CHANGE)
+            prompts = [
+                await build_chat_prompt(db, snapshot, settings.ANALYSIS_CHAT_TOKEN_BUDGET)
+                for snapshot in snapshots
+            ]
+
+        analyzed = 0
+        for batch in build_batches(
+            prompts, settings.ANALYSIS_PROMPT_TOKEN_BUDGET, settings.ANALYSIS_BATCH_CHATS
+        ):
+            self.batches += 1
+            try:
+                analyses, usage = await request_analyses(batch)
+            except Exception as e:
+                # The chats stay changed, so the next pass retries them
+                self.failed_batches += 1
+                logger.error(f"AI analysis of {len(batch)} chats failed: {str(e)}")
+                continue
+            self.prompt_tokens += usage["prompt_tokens"]
+            self.completion_tokens += usage["completion_tokens"]
+
+            for prompt in batch:
+                chat_id = prompt.snapshot.chat_id
+                analysis = analyses.get(chat_id)
+                if analysis is not None:
+                    await asyncio.to_thread(recommendation_store.put, chat_id, analysis)
+                    regeneration_scheduler.schedule(chat_id)
+                    analyzed += 1
+                else:
+                    self.chats_skipped += 1
+                # A chat the model skipped is recorded too, so it's retried
+                # once it changes again rather than on every pass
+                async with AsyncSessionLocal() as db:
+                    # Usage is per call; split it evenly across the batch
+                    await save_analysis_basis(
+                        db,
+                        prompt.snapshot,
+                        usage["prompt_tokens"] // len(batch),
+                        usage["completion_tokens"] // len(batch),
+                    )
+
+        self.chats_analyzed += analyzed
+        return analyzed
+
+    def stats(self):
+        return {
+            "interval": self.interval,
+            "passes": self.passes,
+            "chats_analyzed": self.chats_analyzed,
+            "chats_skipped": self.chats_skipped,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+analysis_pipeline = AnalysisPipeline(get_settings().ANALYSIS_INTERVAL)
@@ -0,0 +1,121 @@
+import logging
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import get_settings
+from models import UserLink, link_tags
+from schemas.link import LinkCreate
+from .tag_cache import tag_cache
+from .tag_service import resolve_tag_ids, retry_with_fresh_tag_ids
+
+# Keeps each multi-row tag association INSERT well under Postgres' bind parameter limit
+LINK_TAGS_BATCH_SIZE = 10000
+# Returned instead of the database error, which includes the SQL and its parameters
+SAVE_FAILED = "Could not save link"
+
+logger = logging.getLogger(__name__)
+
+def _link_row(item: LinkCreate) -> Dict:
+    metadata = item.metadata
+    return {
+        "chat_id": item.chat_id,
+        "link": item.link,
+        "title": metadata.title,
+        "description": metadata.description,
+        "url": metadata.url,
+        "price": metadata.price,
+        "images": metadata.images,
+        "site_name": metadata.site_name,
+    }
+
+def _validate(item: LinkCreate) -> Optional[str]:
+    if not item.chat_id.strip():
+        return "chat_id is required"
+    if not item.link.strip():
+        return "link is required"
+    return None
+
+async def insert_rows(db: AsyncSession, model, rows: List[Dict]) -> List[int]:
+    """Insert rows for an ORM model and return their ids in input order."""
+    if not rows:
+        return []
+    if getattr(db.bind.dialect, "full_returning", False):
+        # One multi-row INSERT ... RETURNING id
+        result = await db.execute(insert(model).values(rows).returning(model.id))
+        return [row[0] for row in result.all()]
+
+    # Dialects without RETURNING (SQLite on SQLAlchemy 1.4): let the ORM fetch ids
+    objects = [model(**row) for row in rows]
+    db.add_all(objects)
+    await db.flush()
+    return [obj.id for obj in objects]
+
+async def insert_tag_pairs(db: AsyncSession, table, rows: List[Dict]) -> None:
+    """Insert association rows (link_tags/file_tags/note_tags) in batches."""
+    for start in range(0, len(rows), LINK_TAGS_BATCH_SIZE):
+        await db.execute(insert(table).values(rows[start:start + LINK_TAGS_BATCH_SIZE]))
+
+async def _save_chunk(db: AsyncSession, items: List[LinkCreate]) -> Tuple[List[int], Dict[str, int]]:
+    tag_ids = await resolve_tag_ids(db, [tag for item in items for tag in item.tags])
+    link_ids = await insert_rows(db, UserLink, [_link_row(item) for item in items])
+    await insert_tag_pairs(db, link_tags, [
+        {"link_id": link_id, "tag_id": tag_ids[tag]}
+        for link_id, item in zip(link_ids, items)
+        for tag in dict.fromkeys(item.tags)
+    ])
+
+    await db.commit()
+    return link_ids, tag_ids
+
+async def save_links_bulk(
+    db: AsyncSession,
+    items: List[LinkCreate]
+) -> Tuple[List[Optional[int]], List[Dict]]:
+    """
+    Save many links with multi-row inserts, one transaction per chunk.
+
+    Items that fail validation are skipped; if a chunk fails to save, every
+    item in it is reported as failed and the remaining chunks still run.
+
+    Args:
+        db: Database session
+        items: Links to save
+
+    Returns:
+        Tuple of the new link id per item (None if it failed) and a list of
+        {"index", "error"} dicts for the failed items
+    """
+    chunk_size = get_settings().BULK_INSERT_CHUNK_SIZE
+    ids: List[Optional[int]] = [None] * len(items)
+    errors: List[Dict] = []
+
+    valid = []
+    for index, item in enumerate(items):
+        error = _validate(item)
+        if error:
+            errors.append({"index": index, "error": error})
+        else:
+            valid.append(index)
+
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        chunk_items = [items[index] for index in chunk]
+        try:
+            link_ids, tag_ids = await retry_with_fresh_tag_ids(
+                db,
+                [tag for item in chunk_items for tag in item.tags],
+                lambda: _save_chunk(db, chunk_items),
+            )
+        except Exception as e:
+            await db.rollback()
+            tag_cache.invalidate_many(tag for item in chunk_items for tag in item.tags)
+            logger.error(f"Saving links {chunk[0]}-{chunk[-1]} of a bulk request failed: {str(e)}")
+            errors.extend({"index": index, "error": SAVE_FAILED} for index in chunk)
+            continue
+        tag_cache.put_many(tag_ids)
+        for index, link_id in zip(chunk, link_ids):
+            ids[index] = link_id
+
+    errors.sort(key=lambda error: error["index"])
+    print(f"Bulk saved {len(items) - len(errors)} of {len(items)} links")
+    return ids, errors
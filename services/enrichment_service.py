@@ -0,0 +1,17 @@
+import json
+from typing import AsyncIterator, List
+from utils.scrapers import analyze_links
+
+async def enrich_links(links: List[str]) -> AsyncIterator[str]:
+    """
+    Enrich a batch of links, streaming one NDJSON line per finished link.
+
+    Args:
+        links: URLs to enrich
+
+    Yields:
+        str: JSON object with the link's index, URL and ProductData
+    """
+    print(f"Enriching batch of {len(links)} links")
+    async for index, link, data in analyze_links(links):
+        yield json.dumps({"index": index, "link": link, "data": data.dict()}) + "\n"
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from typing import List, Optional
+from config import get_settings
+from models import AsyncSessionLocal
+from utils.scrapers import analyze_link, is_fallback_result
+from .job_service import claim_next_job, complete_job, fail_job, requeue_stale_jobs
+from .regeneration import regeneration_scheduler
+
+logger = logging.getLogger(__name__)
+
+class EnrichmentWorkerPool:
+    """
+    Pool of asyncio workers that drain the enrichment_jobs table.
+
+    Jobs live in the database, so anything queued or mid-flight when the
+    process stops is picked up again after a restart (running jobs are
+    requeued once their lock goes stale).
+    """
+
+    def __init__(self, workers: int, poll_interval: float):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self.processed = 0
+        self.failed_attempts = 0
+
+    def notify(self) -> None:
+        """Wake idle workers, e.g. right after a job was queued."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._run(worker_id)) for worker_id in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._sweep()))
+        logger.info(f"Started {self.workers} enrichment workers")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _sweep(self) -> None:
+        settings = get_settings()
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    requeued = await requeue_stale_jobs(db)
+                if requeued:
+                    logger.info(f"Requeued {requeued} stale enrichment jobs")
+                    self.notify()
+            except Exception as e:
+                logger.error(f"Stale job sweep failed: {str(e)}")
+            await asyncio.sleep(max(settings.JOB_STALE_AFTER / 2, self.poll_interval))
+
+    async def _wait_for_work(self) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _run(self, worker_id: int) -> None:
+        while True:
+            try:
+                processed = await self._process_one()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Enrichment worker {worker_id} error: {str(e)}")
+                processed = False
+            if not processed:
+                await self._wait_for_work()
+
+    async def _process_one(self) -> bool:
+        async with AsyncSessionLocal() as db:
+            claimed = await claim_next_job(db)
+            if claimed is None:
+                return False
+            job_id, link_id, link = claimed
+
+            try:
+                data = await analyze_link(link)
+            except Exception as e:
+                self.failed_attempts += 1
+                chat_id = await fail_job(db, job_id, str(e))
+            else:
+                if is_fallback_result(data):
+                    self.failed_attempts += 1
+                    chat_id = await fail_job(db, job_id, "Upstream returned no metadata", fallback=data)
+                else:
+                    chat_id = await complete_job(db, job_id, data)
+                    self.processed += 1
+
+            # The link's card changed (enriched, or given up on)
+            if chat_id is not None:
+                regeneration_scheduler.schedule(chat_id)
+            return True
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "processed": self.processed,
+            "failed_attempts": self.failed_attempts,
+        }
+
+def _build_pool() -> EnrichmentWorkerPool:
+    settings = get_settings()
+    return EnrichmentWorkerPool(settings.ENRICHMENT_WORKERS, settings.JOB_POLL_INTERVAL)
+
+worker_pool = _build_pool()
@@ -0,0 +1,111 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import AsyncIterator, Dict, List
+from sqlalchemy import select
+from config import get_settings
+from models import (
+    AsyncSessionLocal,
+    UserLink,
+    UserFile,
+    UserNote,
+    Tag,
+    link_tags,
+    file_tags,
+    note_tags,
+)
+
+# Exported columns per record type; "tags" is added from the association tables
+EXPORT_KINDS = {
+    "link": (
+        UserLink,
+        link_tags.c.link_id,
+        link_tags.c.tag_id,
+        ["id", "link", "title", "description", "url", "price", "images", "site_name", "created_at"],
+    ),
+    "file": (
+        UserFile,
+        file_tags.c.file_id,
+        file_tags.c.tag_id,
+        ["id", "file_name", "file_path", "title", "summary", "thumbnail_image",
+         "extracted_text", "created_at"],
+    ),
+    "note": (
+        UserNote,
+        note_tags.c.note_id,
+        note_tags.c.tag_id,
+        ["id", "link_id", "file_id", "note_title", "note_content", "created_at"],
+    ),
+}
+# Links and files come first so an import can remap note link_id/file_id
+EXPORT_ORDER = ["link", "file", "note"]
+
+def _jsonable(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+async def _tag_names(db, owner_column, tag_column, ids: List[int]) -> Dict[int, List[str]]:
+    result = await db.execute(
+        select(owner_column, Tag.name)
+        .join(Tag, Tag.id == tag_column)
+        .where(owner_column.in_(ids))
+    )
+    names: Dict[int, List[str]] = {}
+    for owner_id, name in result:
+        names.setdefault(owner_id, []).append(name)
+    return names
+
+async def iter_records(chat_id: str, kind: str) -> AsyncIterator[List[Dict]]:
+    """
+    Stream a chat's rows of one kind in batches, with their tag names.
+
+    Rows come from a server-side cursor (yield_per) as plain column tuples,
+    so memory stays flat however many rows the chat has. Tags are fetched
+    per batch on a second connection.
+    """
+    model, owner_column, tag_column, fields = EXPORT_KINDS[kind]
+    batch_size = get_settings().EXPORT_BATCH_SIZE
+    columns = [getattr(model, field) for field in fields]
+
+    async with AsyncSessionLocal() as db, AsyncSessionLocal() as tag_db:
+        result = await db.stream(
+            select(*columns)
+            .where(model.chat_id == chat_id)
+            .order_by(model.id)
+            .execution_options(yield_per=batch_size)
+        )
+        async for partition in result.partitions(batch_size):
+            rows = [dict(zip(fields, row)) for row in partition]
+            tags = await _tag_names(tag_db, owner_column, tag_column, [row["id"] for row in rows])
+            for row in rows:
+                row["tags"] = tags.get(row["id"], [])
+            yield rows
+
+async def export_ndjson(chat_id: str, kinds: List[str]) -> AsyncIterator[str]:
+    """Yield one JSON object per line, tagged with its record "type"."""
+    for kind in EXPORT_ORDER:
+        if kind not in kinds:
+            continue
+        async for rows in iter_records(chat_id, kind):
+            yield "".join(
+                json.dumps({"type": kind, **{k: _jsonable(v) for k, v in row.items()}}) + "\n"
+                for row in rows
+            )
+
+async def export_csv(chat_id: str, kind: str) -> AsyncIterator[str]:
+    """Yield CSV for one record kind; list columns are joined with "|"."""
+    fields = EXPORT_KINDS[kind][3] + ["tags"]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    async for rows in iter_records(chat_id, kind):
+        for row in rows:
+            writer.writerow([
+                "|".join(value) if isinstance(value, list) else _jsonable(value)
+                for value in (row[field] for field in fields)
+            ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,269 @@
+import csv
+import json
+import logging
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import get_settings
+from models import UserLink, UserFile, UserNote, link_tags, file_tags, note_tags
+from .bulk_service import insert_rows, insert_tag_pairs
+from .export_service import EXPORT_KINDS
+from .tag_cache import tag_cache
+from .tag_service import resolve_tag_ids, retry_with_fresh_tag_ids
+
+# Per-kind model, association table and owner column for the tag pairs
+IMPORT_TARGETS = {
+    "link": (UserLink, link_tags, "link_id"),
+    "file": (UserFile, file_tags, "file_id"),
+    "note": (UserNote, note_tags, "note_id"),
+}
+REQUIRED_FIELDS = {
+    "link": ["link"],
+    "file": ["file_name", "file_path"],
+    "note": ["note_content"],
+}
+# Exported fields that aren't plain strings; created_at is parsed separately
+INTEGER_FIELDS = {"id", "link_id", "file_id"}
+STRING_LIST_FIELDS = {"images"}
+# Only the first few errors are returned; the count covers all of them
+MAX_REPORTED_ERRORS = 100
+INVALID_UTF8 = "Could not parse record: not valid UTF-8"
+# Database errors carry the SQL and its parameters, so they are only logged
+SAVE_FAILED = "Could not save record"
+
+logger = logging.getLogger(__name__)
+
+def _decode_line(line: bytes) -> Optional[str]:
+    try:
+        return line.decode("utf-8").rstrip("\r")
+    except UnicodeDecodeError:
+        return None
+
+async def _iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[Optional[str]]:
+    """
+    Split a byte stream into decoded lines without buffering the whole body.
+
+    A line that isn't valid UTF-8 comes out as None, so it's reported as
+    one bad record rather than failing the import.
+    """
+    pending = b""
+    async for chunk in stream:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield _decode_line(line)
+    if pending:
+        yield _decode_line(pending)
+
+async def _iter_ndjson(stream: AsyncIterator[bytes]) -> AsyncIterator[Dict]:
+    async for line in _iter_lines(stream):
+        if line is None:
+            yield {"_error": INVALID_UTF8}
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            record = {"_error": f"Could not parse record: {str(e)}"}
+        yield record if isinstance(record, dict) else {"_error": "Record must be an object"}
+
+async def _iter_csv(stream: AsyncIterator[bytes], kind: str) -> AsyncIterator[Dict]:
+    """
+    Parse CSV rows as they arrive; the first row is the header.
+
+    A quoted field may contain newlines, so lines are joined until the
+    quotes balance before handing the record to the csv module.
+    """
+    header = None
+    record = ""
+    async for line in _iter_lines(stream):
+        if line is None:
+            # The rest of a quoted field that started on an earlier line
+            # can't be recovered either
+            record = ""
+            yield {"_error": INVALID_UTF8}
+            continue
+        record = f"{record}\n{line}" if record else line
+        if record.count('"') % 2:
+            continue
+        values = next(csv.reader([record]), [])
+        record = ""
+        if not values:
+            continue
+        if header is None:
+            header = values
+            continue
+        row = dict(zip(header, values))
+        row["type"] = kind
+        for field in ("images", "tags"):
+            if field in row:
+                row[field] = [value for value in row[field].split("|") if value]
+        try:
+            for field in ("id", "link_id", "file_id"):
+                if field in row:
+                    row[field] = int(row[field]) if row[field] else None
+        except ValueError as e:
+            row = {"_error": f"Could not parse record: {str(e)}"}
+        yield row
+
+def _parse_datetime(value) -> Optional[datetime]:
+    if not value:
+        return None
+    return datetime.fromisoformat(value)
+
+def _field_error(field: str, value) -> Optional[str]:
+    if value is None or field == "created_at":
+        return None
+    if field in INTEGER_FIELDS:
+        if not isinstance(value, int) or isinstance(value, bool):
+            return f"{field} must be an integer"
+    elif field in STRING_LIST_FIELDS:
+        if not (isinstance(value, list) and all(isinstance(item, str) for item in value)):
+            return f"{field} must be a list of strings"
+    elif not isinstance(value, str):
+        return f"{field} must be a string"
+    return None
+
+def _validate(record: Dict) -> Optional[str]:
+    if "_error" in record:
+        return record["_error"]
+    kind = record.get("type")
+    if kind not in IMPORT_TARGETS:
+        return f"unknown record type: {kind!r}"
+    for field in REQUIRED_FIELDS[kind]:
+        if not record.get(field):
+            return f"{field} is required"
+    tags = record.get("tags")
+    if tags is not None and not (
+        isinstance(tags, list) and all(isinstance(tag, str) and tag for tag in tags)
+    ):
+        return "tags must be a list of non-empty strings"
+    # A value of the wrong type would fail the whole multi-row INSERT, and
+    # with it every valid record in the same chunk
+    for field in EXPORT_KINDS[kind][3]:
+        error = _field_error(field, record.get(field))
+        if error:
+            return error
+    try:
+        _parse_datetime(record.get("created_at"))
+    except (TypeError, ValueError):
+        return "created_at must be an ISO 8601 datetime"
+    return None
+
+def _to_row(chat_id: str, record: Dict, id_map: Dict[str, Dict[int, int]]) -> Dict:
+    kind = record["type"]
+    row = {"chat_id": chat_id}
+    for field in EXPORT_KINDS[kind][3]:
+        if field in ("id", "created_at") or field not in record:
+            continue
+        row[field] = record[field]
+    if kind == "note":
+        # Point notes at the links/files created by this import
+        row["link_id"] = id_map["link"].get(record.get("link_id"))
+        row["file_id"] = id_map["file"].get(record.get("file_id"))
+    created_at = _parse_datetime(record.get("created_at"))
+    if created_at is not None:
+        row["created_at"] = created_at
+    return row
+
+async def _save_batch(
+    db: AsyncSession,
+    chat_id: str,
+    kind: str,
+    records: List[Dict],
+    id_map: Dict[str, Dict[int, int]]
+) -> None:
+    model, table, owner_key = IMPORT_TARGETS[kind]
+    tag_ids = await resolve_tag_ids(db, [tag for record in records for tag in record.get("tags") or []])
+    new_ids = await insert_rows(db, model, [_to_row(chat_id, record, id_map) for record in records])
+    await insert_tag_pairs(db, table, [
+        {owner_key: new_id, "tag_id": tag_ids[tag]}
+        for new_id, record in zip(new_ids, records)
+        for tag in dict.fromkeys(record.get("tags") or [])
+    ])
+    await db.commit()
+    tag_cache.put_many(tag_ids)
+
+    if kind in ("link", "file"):
+        for record, new_id in zip(records, new_ids):
+            if record.get("id") is not None:
+                id_map[kind][record["id"]] = new_id
+
+async def import_records(
+    db: AsyncSession,
+    chat_id: str,
+    stream: AsyncIterator[bytes],
+    format: str = "ndjson",
+    kind: str = "link"
+) -> Dict:
+    """
+    Import a chat's data from a streamed NDJSON or CSV body.
+
+    Records are parsed as the body arrives and inserted in chunks of
+    BULK_INSERT_CHUNK_SIZE, one transaction per chunk. Notes are linked to
+    the links/files imported before them, so export order (links, files,
+    notes) must be kept.
+
+    Args:
+        db: Database session
+        chat_id: Telegram chat ID the records are imported into
+        stream: Request body chunks
+        format: "ndjson" (records carry their own "type") or "csv"
+        kind: Record type of every CSV row
+
+    Returns:
+        Dict with per-type imported counts, the error count and the first
+        errors as {"record", "error"} dicts (record numbers start at 1)
+    """
+    chunk_size = get_settings().BULK_INSERT_CHUNK_SIZE
+    records = _iter_csv(stream, kind) if format == "csv" else _iter_ndjson(stream)
+    id_map: Dict[str, Dict[int, int]] = {"link": {}, "file": {}}
+    imported = {name: 0 for name in IMPORT_TARGETS}
+    errors: List[Dict] = []
+    error_count = 0
+    batch: List[Dict] = []
+    batch_numbers: List[int] = []
+
+    async def flush() -> None:
+        nonlocal error_count
+        if not batch:
+            return
+        batch_kind = batch[0]["type"]
+        try:
+            await retry_with_fresh_tag_ids(
+                db,
+                [tag for record in batch for tag in record.get("tags") or []],
+                lambda: _save_batch(db, chat_id, batch_kind, batch, id_map),
+            )
+            imported[batch_kind] += len(batch)
+        except Exception as e:
+            await db.rollback()
+            tag_cache.invalidate_many(tag for record in batch for tag in record.get("tags") or [])
+            logger.error(f"Importing records {batch_numbers[0]}-{batch_numbers[-1]} into chat {chat_id} failed: {str(e)}")
+            error_count += len(batch)
+            errors.extend(
+                {"record": number, "error": SAVE_FAILED}
+                for number in batch_numbers[:MAX_REPORTED_ERRORS - len(errors)]
+            )
+        batch.clear()
+        batch_numbers.clear()
+
+    number = 0
+    async for record in records:
+        number += 1
+        error = _validate(record)
+        if error:
+            error_count += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"record": number, "error": error})
+            continue
+        # A batch holds one record type so it maps onto one table
+        if batch and (batch[0]["type"] != record["type"] or len(batch) >= chunk_size):
+            await flush()
+        batch.append(record)
+        batch_numbers.append(number)
+    await flush()
+
+    print(f"Imported {sum(imported.values())} records into chat {chat_id}")
+    return {"imported": imported, "error_count": error_count, "errors": errors}
@@ -0,0 +1,239 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from fastapi import HTTPException
+from config import get_settings
+from models import UserLink, EnrichmentJob
+from utils.scrapers import ProductData
+from .tag_cache import tag_cache
+from .tag_service import resolve_tag_ids, attach_tags, retry_with_fresh_tag_ids
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+def backoff_delay(attempts: int) -> timedelta:
+    """Exponential backoff after the given number of failed attempts."""
+    settings = get_settings()
+    seconds = settings.JOB_BACKOFF_BASE * (2 ** max(0, attempts - 1))
+    return timedelta(seconds=min(seconds, settings.JOB_BACKOFF_MAX))
+
+async def enqueue_link(
+    db: AsyncSession,
+    chat_id: str,
+    link: str,
+    tags: List[str]
+) -> Tuple[int, int]:
+    """
+    Store a link as pending and queue a job to enrich it.
+
+    Args:
+        db: Database session
+        chat_id: Telegram chat ID
+        link: URL to save
+        tags: List of tag names
+
+    Returns:
+        Tuple[int, int]: IDs of the new link and its enrichment job
+
+    Raises:
+        HTTPException: If database operation fails
+    """
+    return (await enqueue_links(db, chat_id, [link], tags))[0]
+
+async def enqueue_links(
+    db: AsyncSession,
+    chat_id: str,
+    links: List[str],
+    tags: List[str]
+) -> List[Tuple[int, int]]:
+    """
+    Store several links from one message, all with the same tags, in one
+    transaction and queue a job for each.
+
+    Returns:
+        List[Tuple[int, int]]: IDs of each new link and its enrichment job
+
+    Raises:
+        HTTPException: If database operation fails
+    """
+    max_attempts = get_settings().JOB_MAX_ATTEMPTS
+
+    async def save() -> Tuple[List[Tuple[UserLink, EnrichmentJob]], Dict[str, int]]:
+        pairs = []
+        for link in links:
+            user_link = UserLink(chat_id=chat_id, link=link, url=link, status="pending")
+            job = EnrichmentJob(
+                link=user_link,
+                status="queued",
+                max_attempts=max_attempts,
+                next_run_at=_utcnow(),
+            )
+            db.add(user_link)
+            db.add(job)
+            pairs.append((user_link, job))
+
+        tag_ids = await resolve_tag_ids(db, tags)
+        await db.flush()
+        for user_link, _ in pairs:
+            await attach_tags(db, user_link.id, list(tag_ids.values()))
+
+        await db.commit()
+        return pairs, tag_ids
+
+    try:
+        pairs, tag_ids = await retry_with_fresh_tag_ids(db, tags, save)
+        tag_cache.put_many(tag_ids)
+        for user_link, job in pairs:
+            print(f"Queued enrichment job {job.id} for link {user_link.id}")
+        return [(user_link.id, job.id) for user_link, job in pairs]
+
+    except Exception as e:
+        await db.rollback()
+        tag_cache.invalidate_many(tags)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to queue link: {str(e)}"
+        )
+
+async def get_job(db: AsyncSession, job_id: int) -> EnrichmentJob:
+    """Get a job by ID or raise 404."""
+    job = await db.get(EnrichmentJob, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Job with ID {job_id} not found"
+        )
+    return job
+
+async def get_queue_stats(db: AsyncSession) -> Dict[str, int]:
+    """Count jobs per status, plus how many queued jobs are due now."""
+    counts = dict(
+        (
+            await db.execute(
+                select(EnrichmentJob.status, func.count(EnrichmentJob.id))
+                .group_by(EnrichmentJob.status)
+            )
+        ).all()
+    )
+    due = (
+        await db.execute(
+            select(func.count(EnrichmentJob.id))
+            .where(EnrichmentJob.status == "queued", EnrichmentJob.next_run_at <= _utcnow())
+        )
+    ).scalar()
+    return {
+        "queued": counts.get("queued", 0),
+        "due": due or 0,
+        "running": counts.get("running", 0),
+        "done": counts.get("done", 0),
+        "failed": counts.get("failed", 0),
+    }
+
+async def claim_next_job(db: AsyncSession) -> Optional[Tuple[int, int, str]]:
+    """
+    Atomically take the next due job and mark it running.
+
+    Uses SKIP LOCKED on Postgres so workers don't contend for the same row;
+    the conditional UPDATE keeps the claim safe on databases without row
+    locks (SQLite).
+
+    Returns:
+        (job_id, link_id, link) or None if nothing is due
+    """
+    row = (
+        await db.execute(
+            select(EnrichmentJob.id, EnrichmentJob.link_id, UserLink.link)
+            .join(UserLink, EnrichmentJob.link_id == UserLink.id)
+            .where(EnrichmentJob.status == "queued", EnrichmentJob.next_run_at <= _utcnow())
+            .order_by(EnrichmentJob.next_run_at, EnrichmentJob.id)
+            .limit(1)
+            .with_for_update(of=EnrichmentJob, skip_locked=True)
+        )
+    ).first()
+    if row is None:
+        await db.rollback()
+        return None
+
+    job_id, link_id, link = row
+    result = await db.execute(
+        update(EnrichmentJob)
+        .where(EnrichmentJob.id == job_id, EnrichmentJob.status == "queued")
+        .values(
+            status="running",
+            attempts=EnrichmentJob.attempts + 1,
+            locked_at=_utcnow(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    if result.rowcount != 1:  # Another worker got there first
+        return None
+    return job_id, link_id, link
+
+async def _get_job_with_link(db: AsyncSession, job_id: int) -> Optional[EnrichmentJob]:
+    return await db.get(EnrichmentJob, job_id, options=[selectinload(EnrichmentJob.link)])
+
+async def complete_job(db: AsyncSession, job_id: int, data: ProductData) -> Optional[str]:
+    """Fill in the link's metadata and mark the job done; returns the link's chat ID."""
+    job = await _get_job_with_link(db, job_id)
+    if job is None:  # Link (and its job) deleted while we were working
+        return None
+    _apply_metadata(job.link, data)
+    job.link.status = "ready"
+    job.status = "done"
+    job.locked_at = None
+    job.last_error = None
+    await db.commit()
+    return job.link.chat_id
+
+async def fail_job(
+    db: AsyncSession, job_id: int, error: str, fallback: Optional[ProductData] = None
+) -> Optional[str]:
+    """
+    Record a failed attempt: retry with backoff, or give up after max attempts.
+
+    When giving up, the placeholder `fallback` metadata (if any) is stored so
+    the link still renders and the user can edit its title.
+
+    Returns:
+        The link's chat ID if the job gave up for good, else None
+    """
+    job = await _get_job_with_link(db, job_id)
+    if job is None:
+        return None
+    job.last_error = error
+    job.locked_at = None
+    if job.attempts >= job.max_attempts:
+        job.status = "failed"
+        if fallback is not None:
+            _apply_metadata(job.link, fallback)
+        job.link.status = "failed"
+        print(f"Enrichment job {job_id} failed permanently: {error}")
+    else:
+        job.status = "queued"
+        job.next_run_at = _utcnow() + backoff_delay(job.attempts)
+        print(f"Enrichment job {job_id} will retry at {job.next_run_at}: {error}")
+    await db.commit()
+    return job.link.chat_id if job.status == "failed" else None
+
+async def requeue_stale_jobs(db: AsyncSession) -> int:
+    """Put back jobs left running by a worker that died or was restarted."""
+    cutoff = _utcnow() - timedelta(seconds=get_settings().JOB_STALE_AFTER)
+    result = await db.execute(
+        update(EnrichmentJob)
+        .where(EnrichmentJob.status == "running", EnrichmentJob.locked_at < cutoff)
+        .values(status="queued", locked_at=None, next_run_at=_utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
+
+def _apply_metadata(user_link: UserLink, data: ProductData) -> None:
+    user_link.title = data.title
+    user_link.description = data.description
+    user_link.url = data.url
+    user_link.price = data.price
+    user_link.images = data.images
+    user_link.site_name = data.site_name
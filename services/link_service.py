@@ -1,10 +1,16 @@
-from typing import List, Dict, Optional
-from sqlalchemy.orm import Session
+import base64
+import binascii
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+from sqlalchemy import String, delete, select, tuple_, type_coerce, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
-from models import UserLink, Tag
+from models import UserLink, UserNote, Tag, EnrichmentJob, link_tags, note_tags, loading
+from .tag_cache import tag_cache
+from .tag_service import resolve_tag_ids, attach_tags, retry_with_fresh_tag_ids
 
 async def save_link_to_db(
-    db: Session,
+    db: AsyncSession,
     chat_id: str,
     link: str,
     tags: List[str],
@@ -12,22 +18,23 @@ async def save_link_to_db(
 ) -> int:
     """
     Save link and metadata to the database.
-    
+
     Args:
         db: Database session
         chat_id: Telegram chat ID
         link: URL to save
         tags: List of tag names
         metadata: Dictionary containing link metadata
-        
+
     Returns:
         int: ID of the saved link
-        
+
     Raises:
         HTTPException: If database operation fails
     """
     print("Saving link to database")
-    try:
+
+    async def save() -> Tuple[int, Dict[str, int]]:
         # Create UserLink instance
         user_link = UserLink(
             chat_id=chat_id,
@@ -40,66 +47,345 @@ async def save_link_to_db(
             site_name=metadata.get("site_name"),
         )
 
+        db.add(user_link)
+
         # Process tags
-        for tag_name in tags:
-            tag = db.query(Tag).filter(Tag.name == tag_name).first()
-            if not tag:
-                tag = Tag(name=tag_name)
-                db.add(tag)
-            user_link.tags.append(tag)
+        tag_ids = await resolve_tag_ids(db, tags)
+        await db.flush()
+        await attach_tags(db, user_link.id, list(tag_ids.values()))
+
+        await db.commit()
+        return user_link.id, tag_ids
+
+    try:
+        link_id, tag_ids = await retry_with_fresh_tag_ids(db, tags, save)
+        tag_cache.put_many(tag_ids)
+
+        print(f"Link saved with ID: {link_id}")
+        return link_id
 
-        db.add(user_link)
-        db.commit()
-        db.refresh(user_link)
-        
-        print(f"Link saved with ID: {user_link.id}")
-        return user_link.id
-        
     except Exception as e:
-        db.rollback()
+        await db.rollback()
+        # A cached id may point at a tag deleted by another process
+        tag_cache.invalidate_many(tags)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to save link to database: {str(e)}"
         )
 
 async def add_tag_to_link(
-    db: Session,
+    db: AsyncSession,
     link_id: int,
     tag_name: str
-) -> None:
+) -> str:
     """
     Add a tag to a specific link.
-    
+
     Args:
         db: Database session
         link_id: ID of the link
         tag_name: Name of the tag to add
-        
+
+    Returns:
+        str: Chat ID the link belongs to
+
+    Raises:
+        HTTPException: If link not found or operation fails
+    """
+    try:
+        chat_id = await _link_chat_id(db, link_id)
+
+        async def add() -> Dict[str, int]:
+            tag_ids = await resolve_tag_ids(db, [tag_name])
+            await attach_tags(db, link_id, list(tag_ids.values()))
+            await db.commit()
+            return tag_ids
+
+        tag_cache.put_many(await retry_with_fresh_tag_ids(db, [tag_name], add))
+        return chat_id
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        tag_cache.invalidate(tag_name)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to add tag to link: {str(e)}"
+        )
+
+async def _link_chat_id(db: AsyncSession, link_id: int) -> str:
+    chat_id = (
+        await db.execute(select(UserLink.chat_id).where(UserLink.id == link_id))
+    ).scalar()
+    if chat_id is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Link with ID {link_id} not found"
+        )
+    return chat_id
+
+async def _delete_links(db: AsyncSession, link_ids) -> int:
+    """
+    Delete links with their tags, notes and enrichment jobs.
+
+    Dependent rows are deleted explicitly rather than left to ON DELETE
+    CASCADE, which SQLite only honours with foreign keys switched on.
+    `link_ids` is a list or a SELECT of ids; the session holds none of
+    these rows, so there is nothing to synchronize.
+    """
+    note_ids = select(UserNote.id).where(UserNote.link_id.in_(link_ids))
+    await db.execute(delete(note_tags).where(note_tags.c.note_id.in_(note_ids)))
+    await db.execute(
+        delete(UserNote).where(UserNote.link_id.in_(link_ids))
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(delete(link_tags).where(link_tags.c.link_id.in_(link_ids)))
+    await db.execute(
+        delete(EnrichmentJob).where(EnrichmentJob.link_id.in_(link_ids))
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(
+        delete(UserLink).where(UserLink.id.in_(link_ids))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+async def delete_link(db: AsyncSession, link_id: int) -> str:
+    """
+    Delete a link with its tags and notes.
+
+    Returns:
+        str: Chat ID the link belonged to
+
+    Raises:
+        HTTPException: If link not found or operation fails
+    """
+    try:
+        chat_id = await _link_chat_id(db, link_id)
+        await _delete_links(db, [link_id])
+        await db.commit()
+        return chat_id
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to delete link: {str(e)}"
+        )
+
+async def delete_chat_links(db: AsyncSession, chat_id: str) -> int:
+    """
+    Delete every link in a chat, with their tags and notes.
+
+    Returns:
+        int: Number of links deleted
+
+    Raises:
+        HTTPException: If operation fails
+    """
+    try:
+        deleted = await _delete_links(db, select(UserLink.id).where(UserLink.chat_id == chat_id))
+        await db.commit()
+        return deleted
+
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to delete links: {str(e)}"
+        )
+
+async def update_link_title(db: AsyncSession, link_id: int, title: str) -> str:
+    """
+    Rename a link.
+
+    Returns:
+        str: Chat ID the link belongs to
+
     Raises:
         HTTPException: If link not found or operation fails
     """
     try:
-        link = db.query(UserLink).get(link_id)
-        if not link:
+        chat_id = await _link_chat_id(db, link_id)
+        await db.execute(update(UserLink).where(UserLink.id == link_id).values(title=title))
+        await db.commit()
+        return chat_id
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to update link title: {str(e)}"
+        )
+
+async def remove_tag_from_link(db: AsyncSession, link_id: int, tag_name: str) -> str:
+    """
+    Take a tag off a link. The tag itself stays for other links.
+
+    Returns:
+        str: Chat ID the link belongs to
+
+    Raises:
+        HTTPException: If the link or the tag on it is not found, or operation fails
+    """
+    try:
+        chat_id = await _link_chat_id(db, link_id)
+        result = await db.execute(
+            delete(link_tags).where(
+                link_tags.c.link_id == link_id,
+                link_tags.c.tag_id.in_(select(Tag.id).where(Tag.name == tag_name)),
+            )
+        )
+        if result.rowcount == 0:
             raise HTTPException(
                 status_code=404,
-                detail=f"Link with ID {link_id} not found"
+                detail=f"Link {link_id} has no tag {tag_name}"
             )
+        await db.commit()
+        return chat_id
+
+    except HTTPException:
+        await db.rollback()
+        raise
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to remove tag from link: {str(e)}"
+        )
+
+async def remove_tag_from_chat(db: AsyncSession, chat_id: str, tag_name: str) -> int:
+    """
+    Take a tag off every link in a chat. Other chats' links keep it.
+
+    Returns:
+        int: Number of links the tag was removed from
 
-        tag = db.query(Tag).filter(Tag.name == tag_name).first()
-        if not tag:
-            tag = Tag(name=tag_name)
-            db.add(tag)
+    Raises:
+        HTTPException: If no link in the chat has the tag, or operation fails
+    """
+    try:
+        result = await db.execute(
+            delete(link_tags).where(
+                link_tags.c.link_id.in_(select(UserLink.id).where(UserLink.chat_id == chat_id)),
+                link_tags.c.tag_id.in_(select(Tag.id).where(Tag.name == tag_name)),
+            )
+        )
+        if result.rowcount == 0:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No links in chat {chat_id} have tag {tag_name}"
+            )
+        await db.commit()
+        return result.rowcount
 
-        if tag not in link.tags:
-            link.tags.append(tag)
-            db.commit()
-            
     except HTTPException:
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
-            detail=f"Failed to add tag to link: {str(e)}"
-        ) 
\ No newline at end of file
+            detail=f"Failed to delete tag: {str(e)}"
+        )
+
+def encode_cursor(created_at, link_id: int) -> str:
+    """Opaque cursor for the (created_at, id) position of a link."""
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    raw = f"{created_at}|{link_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Inverse of encode_cursor; raises 400 for a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, link_id = raw.rsplit("|", 1)
+        datetime.fromisoformat(created_at)
+        return created_at, int(link_id)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def list_links(
+    db: AsyncSession,
+    chat_id: str,
+    tag: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = 50
+) -> Tuple[List[UserLink], Optional[str]]:
+    """
+    List a chat's links newest first, one page at a time.
+
+    Uses keyset pagination on (created_at, id), which walks the
+    ix_user_links_chat_created_id index, so a deep page costs the same as
+    the first one.
+
+    Args:
+        db: Database session
+        chat_id: Telegram chat ID
+        tag: Only return links with this tag
+        after: Cursor returned with the previous page
+        limit: Page size
+
+    Returns:
+        Tuple of the links (tags loaded) and the cursor for the next page,
+        or None on the last page
+    """
+    # SQLite keeps timestamps as text in more than one format (CURRENT_TIMESTAMP
+    # has no fraction), so compare against the stored text rather than a
+    # re-rendered datetime or the page boundary never moves
+    sqlite = db.bind.dialect.name == "sqlite"
+    created_key = type_coerce(UserLink.created_at, String) if sqlite else UserLink.created_at
+
+    query = (
+        select(UserLink, created_key.label("created_key"))
+        .where(UserLink.chat_id == chat_id)
+        .options(*loading.LINK_LISTING)
+        .order_by(UserLink.created_at.desc(), UserLink.id.desc())
+        .limit(limit + 1)
+    )
+
+    if tag is not None:
+        tag_id = tag_cache.get_many([tag])[0].get(tag)
+        if tag_id is None:
+            tag_id = (await db.execute(select(Tag.id).where(Tag.name == tag))).scalar()
+            if tag_id is None:
+                return [], None
+            tag_cache.put_many({tag: tag_id})
+        query = query.where(
+            select(link_tags.c.link_id)
+            .where(link_tags.c.link_id == UserLink.id, link_tags.c.tag_id == tag_id)
+            .exists()
+        )
+
+    if after:
+        created_at, link_id = decode_cursor(after)
+        if not sqlite:
+            created_at = datetime.fromisoformat(created_at)
+        query = query.where(tuple_(created_key, UserLink.id) < (created_at, link_id))
+
+    rows = (await db.execute(query)).all()
+    links = [row.UserLink for row in rows[:limit]]
+    if len(rows) <= limit:
+        return links, None
+    return links, encode_cursor(rows[limit - 1].created_key, links[-1].id)
+
+async def get_links_for_rendering(db: AsyncSession, chat_id: str) -> List[UserLink]:
+    """
+    All of a chat's links for the HTML history page, newest first.
+
+    Tags come in with one extra SELECT ... IN query and notes are not
+    loaded, so reading link.tags while rendering costs no queries.
+    """
+    result = await db.execute(
+        select(UserLink)
+        .where(UserLink.chat_id == chat_id)
+        .options(*loading.LINK_RENDERING)
+        .order_by(UserLink.created_at.desc(), UserLink.id.desc())
+    )
+    return result.scalars().all()
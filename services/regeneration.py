@@ -0,0 +1,104 @@
+import asyncio
+import logging
+from typing import Dict, Optional, Set
+from config import get_settings
+from .render_service import regenerate_html
+
+logger = logging.getLogger(__name__)
+
+class RegenerationScheduler:
+    """
+    Debounced, per-chat history page rebuilds.
+
+    The first change to a chat starts a timer; changes arriving before it
+    fires are folded into the same render. Each chat has at most one task,
+    so two renders of the same page never overlap: a change that lands
+    while a render is running just queues one more render after it.
+
+    Bot and background changes are debounced with `schedule`. Edits made
+    from the page itself use `flush`, which skips the wait and returns once
+    the page is rebuilt, so the page's reload shows the edit.
+    """
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._dirty: Set[str] = set()
+        self._rendering: Set[str] = set()
+        self._urgent: Set[str] = set()
+        self._wake: Dict[str, asyncio.Event] = {}
+        # Page titles use the chat's first name; only bot messages carry it
+        self._names: Dict[str, str] = {}
+        self.requested = 0
+        self.coalesced = 0
+        self.renders = 0
+        self.failures = 0
+
+    def schedule(self, chat_id, first_name: Optional[str] = None) -> None:
+        """Ask for the chat's page to be rebuilt soon; `first_name` is kept for later rebuilds."""
+        chat_id = str(chat_id)
+        if first_name:
+            self._names[chat_id] = first_name
+        self.requested += 1
+        if chat_id in self._tasks:
+            self.coalesced += 1
+            self._dirty.add(chat_id)
+            return
+        self._tasks[chat_id] = asyncio.create_task(self._run(chat_id))
+
+    async def flush(self, chat_id) -> None:
+        """Rebuild the chat's page now, folding in any pending change, and wait for it."""
+        chat_id = str(chat_id)
+        self._urgent.add(chat_id)
+        self.schedule(chat_id)
+        if chat_id in self._wake:
+            self._wake[chat_id].set()
+        # Shielded: a client that disconnects shouldn't cancel the render
+        await asyncio.shield(self._tasks[chat_id])
+
+    async def _run(self, chat_id: str) -> None:
+        wake = self._wake[chat_id] = asyncio.Event()
+        try:
+            while True:
+                if chat_id not in self._urgent:
+                    try:
+                        await asyncio.wait_for(wake.wait(), self.delay)
+                    except asyncio.TimeoutError:
+                        pass
+                wake.clear()
+                self._urgent.discard(chat_id)
+                self._dirty.discard(chat_id)
+                self._rendering.add(chat_id)
+                try:
+                    await regenerate_html(chat_id, self._names.get(chat_id, "User"))
+                    self.renders += 1
+                except Exception as e:
+                    self.failures += 1
+                    logger.error(f"Regenerating history for chat {chat_id} failed: {str(e)}")
+                finally:
+                    self._rendering.discard(chat_id)
+                # Changes made while rendering need one more pass
+                if chat_id not in self._dirty:
+                    break
+        finally:
+            self._tasks.pop(chat_id, None)
+            self._wake.pop(chat_id, None)
+            self._urgent.discard(chat_id)
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self):
+        return {
+            "pending": len(self._tasks) - len(self._rendering),
+            "rendering": len(self._rendering),
+            "requested": self.requested,
+            "coalesced": self.coalesced,
+            "renders": self.renders,
+            "failures": self.failures,
+        }
+
+regeneration_scheduler = RegenerationScheduler(get_settings().HTML_REGENERATE_DELAY)
@@ -0,0 +1,67 @@
+from typing import Optional, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import get_settings
+from models import AsyncSessionLocal
+from utils import (
+    generate_html,
+    generate_shell_html,
+    generate_bookmark_cards,
+    link_metadata_for,
+    recommendation_store,
+)
+from .link_service import get_links_for_rendering, list_links
+from .tag_service import get_chat_tags
+
+async def regenerate_html(chat_id: int, first_name: str = "User") -> str:
+    """
+    Rebuild a chat's history page from the database.
+
+    In "static" mode cards for links that haven't changed since the last
+    build come from the card cache, so this is cheap after a single edit.
+    In "paged" mode only the shell (filters + scripts) is written.
+
+    Returns:
+        str: URL of the generated page
+    """
+    if get_settings().HISTORY_RENDER_MODE == "paged":
+        async with AsyncSessionLocal() as db:
+            all_tags = await get_chat_tags(db, str(chat_id))
+        return await generate_shell_html(chat_id, all_tags, first_name)
+
+    async with AsyncSessionLocal() as db:
+        user_links = await get_links_for_rendering(db, str(chat_id))
+
+    return await generate_html(
+        chat_id,
+        user_links,
+        link_metadata_for(user_links),
+        recommendation_store.get(chat_id),
+        first_name,
+    )
+
+async def get_cards_page(
+    db: AsyncSession,
+    chat_id: str,
+    tag: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = 30
+) -> Tuple[str, Optional[str]]:
+    """
+    Render one page of bookmark cards for the paged history view.
+
+    Recommendation cards (for `tag`, or all of them) follow the last page.
+
+    Returns:
+        Tuple of the cards' HTML and the cursor for the next page, or None
+        on the last page
+    """
+    links, next_cursor = await list_links(db, chat_id, tag, after, limit)
+    recommendations = []
+    if next_cursor is None:
+        recommendations = [
+            recommendation
+            for recommendation in recommendation_store.get(chat_id)
+            if tag is None or recommendation.destination_tag == tag
+        ]
+    html = generate_bookmark_cards(links, link_metadata_for(links), recommendations)
+    return html, next_cursor
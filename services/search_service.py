@@ -0,0 +1,100 @@
+import re
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import DateTime, Float, Integer, String, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from models.search import SEARCH_SOURCES, fts_table, text_search_config
+
+SNIPPET_WORDS = 20
+
+def _fts5_query(query: str) -> str:
+    """Quote each word so user input is matched literally, never parsed as FTS5 syntax."""
+    words = re.findall(r"\w+", query)
+    return " ".join(f'"{word}"' for word in words)
+
+def _postgres_sql(kinds: List[str]) -> str:
+    arms = [
+        f"SELECT '{kind}' AS kind, id, {source.title} AS title, {source.body} AS body, "
+        f"ts_rank_cd(search_vector, q) AS rank, created_at "
+        f"FROM {source.table}, websearch_to_tsquery(CAST(:config AS regconfig), :query) q "
+        f"WHERE chat_id = :chat_id AND search_vector @@ q"
+        for kind, source in SEARCH_SOURCES.items() if kind in kinds
+    ]
+    # Headlines are costly, so only build them for the rows on this page
+    return (
+        "SELECT kind, id, title, "
+        "ts_headline(CAST(:config AS regconfig), body, "
+        "websearch_to_tsquery(CAST(:config AS regconfig), :query), "
+        f"'StartSel=\"\", StopSel=\"\", MaxWords={SNIPPET_WORDS}, MinWords=5') AS snippet, "
+        "rank, created_at "
+        f"FROM ({' UNION ALL '.join(arms)} "
+        "ORDER BY rank DESC, kind, id DESC LIMIT :limit OFFSET :offset) hits "
+        "ORDER BY rank DESC, kind, id DESC"
+    )
+
+def _sqlite_sql(kinds: List[str]) -> str:
+    arms = []
+    for kind, source in SEARCH_SOURCES.items():
+        if kind not in kinds:
+            continue
+        fts = fts_table(source)
+        arms.append(
+            f"SELECT '{kind}' AS kind, t.id AS id, t.{source.title} AS title, "
+            f"snippet({fts}, -1, '', '', '…', {SNIPPET_WORDS}) AS snippet, "
+            f"-bm25({fts}) AS rank, t.created_at AS created_at "
+            f"FROM {fts} JOIN {source.table} t ON t.id = {fts}.rowid "
+            f"WHERE {fts} MATCH :query AND t.chat_id = :chat_id"
+        )
+    return (
+        f"{' UNION ALL '.join(arms)} "
+        "ORDER BY rank DESC, kind, id DESC LIMIT :limit OFFSET :offset"
+    )
+
+async def search(
+    db: AsyncSession,
+    chat_id: str,
+    query: str,
+    kinds: Optional[List[str]] = None,
+    limit: int = 20,
+    offset: int = 0
+) -> Tuple[List[Dict], Optional[int]]:
+    """
+    Ranked full-text search over a chat's links, notes and files.
+
+    Args:
+        db: Database session
+        chat_id: Telegram chat ID to search in
+        query: Search words (Postgres also accepts "quoted phrases", OR and -word)
+        kinds: Subset of "link", "note", "file"; all when None
+        limit: Page size
+        offset: Results to skip
+
+    Returns:
+        Tuple of result dicts (kind, id, title, snippet, rank, created_at),
+        best first, and the offset of the next page or None on the last page
+
+    Raises:
+        HTTPException: If the database has no full-text backend
+    """
+    kinds = kinds or list(SEARCH_SOURCES)
+    params = {"chat_id": chat_id, "limit": limit + 1, "offset": offset}
+    dialect = db.bind.dialect.name
+    if dialect == "postgresql":
+        sql = _postgres_sql(kinds)
+        params.update(query=query, config=text_search_config())
+    elif dialect == "sqlite":
+        sql = _sqlite_sql(kinds)
+        params["query"] = _fts5_query(query)
+    else:
+        raise HTTPException(status_code=501, detail=f"Search is not supported on {dialect}")
+
+    if not params["query"].strip():
+        return [], None
+
+    statement = text(sql).columns(
+        kind=String, id=Integer, title=String, snippet=String, rank=Float, created_at=DateTime
+    )
+    rows = (await db.execute(statement, params)).mappings().all()
+    results = [dict(row) for row in rows[:limit]]
+    next_offset = offset + limit if len(rows) > limit else None
+    return results, next_offset
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from config import get_settings
+from models import Tag, link_tags
+
+class TagCache:
+    """
+    Process-wide, size-bounded LRU map of tag name -> tag id.
+
+    Only ids of committed tags should be stored. Deleting a Tag through the
+    ORM evicts it; a bulk DELETE on tags clears the whole cache.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._ids: "OrderedDict[str, int]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_many(self, names: Iterable[str]) -> Tuple[Dict[str, int], List[str]]:
+        """Split names into (cached name -> id, names not in the cache)."""
+        found: Dict[str, int] = {}
+        missing: List[str] = []
+        for name in names:
+            tag_id = self._ids.get(name)
+            if tag_id is None:
+                missing.append(name)
+            else:
+                self._ids.move_to_end(name)
+                found[name] = tag_id
+        self.hits += len(found)
+        self.misses += len(missing)
+        return found, missing
+
+    def put_many(self, ids: Dict[str, int]) -> None:
+        for name, tag_id in ids.items():
+            self._ids[name] = tag_id
+            self._ids.move_to_end(name)
+        while len(self._ids) > self.max_entries:
+            self._ids.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, name: str) -> None:
+        self._ids.pop(name, None)
+
+    def invalidate_many(self, names: Iterable[str]) -> None:
+        for name in names:
+            self._ids.pop(name, None)
+
+    def clear(self) -> None:
+        self._ids.clear()
+
+    async def warm(self, db: AsyncSession) -> int:
+        """Preload the most used tags, up to the cache size."""
+        usage = func.count(link_tags.c.link_id)
+        result = await db.execute(
+            select(Tag.name, Tag.id)
+            .outerjoin(link_tags, link_tags.c.tag_id == Tag.id)
+            .group_by(Tag.id, Tag.name)
+            .order_by(usage.desc())
+            .limit(self.max_entries)
+        )
+        ids = dict(result.all())
+        self.put_many(ids)
+        return len(ids)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._ids),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+tag_cache = TagCache(get_settings().TAG_CACHE_SIZE)
+
+@event.listens_for(Tag, "after_delete")
+def _evict_deleted_tag(mapper, connection, target):
+    tag_cache.invalidate(target.name)
+
+@event.listens_for(Session, "do_orm_execute")
+def _clear_on_bulk_tag_delete(orm_execute_state):
+    if orm_execute_state.is_delete and any(
+        mapper.class_ is Tag for mapper in orm_execute_state.all_mappers
+    ):
+        tag_cache.clear()
@@ -0,0 +1,110 @@
+from typing import Awaitable, Callable, Dict, Iterable, List, TypeVar
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Tag, UserLink, link_tags
+from .tag_cache import tag_cache
+
+T = TypeVar("T")
+
+def _dialect_insert(dialect_name: str, table):
+    if dialect_name == "postgresql":
+        return postgresql.insert(table)
+    if dialect_name == "sqlite":
+        return sqlite.insert(table)
+    raise NotImplementedError(f"Conflict-safe insert not supported for {dialect_name}")
+
+async def _select_tag_ids(db: AsyncSession, names: List[str]) -> Dict[str, int]:
+    result = await db.execute(select(Tag.name, Tag.id).where(Tag.name.in_(names)))
+    return dict(result.all())
+
+async def resolve_tag_ids(db: AsyncSession, tag_names: List[str]) -> Dict[str, int]:
+    """
+    Get tag ids for the given names, creating any tags that are missing.
+
+    Names found in the process-wide tag cache need no query. The rest take
+    a fixed number of statements however many there are: one IN query, one
+    conflict-safe multi-row insert for new names and one IN query to read
+    their ids. Concurrent callers creating the same tag don't violate the
+    unique constraint on Tag.name.
+
+    Call `tag_cache.put_many()` with the result once the transaction has
+    committed, so the cache never holds ids of rolled-back tags.
+
+    Args:
+        db: Database session
+        tag_names: Tag names, duplicates allowed
+
+    Returns:
+        Dict[str, int]: Tag id per distinct name, in first-seen order
+    """
+    names = list(dict.fromkeys(tag_names))
+    if not names:
+        return {}
+
+    ids, uncached = tag_cache.get_many(names)
+    if uncached:
+        ids.update(await _select_tag_ids(db, uncached))
+        missing = [name for name in uncached if name not in ids]
+        if missing:
+            await db.execute(
+                _dialect_insert(db.bind.dialect.name, Tag)
+                .values([{"name": name} for name in missing])
+                .on_conflict_do_nothing(index_elements=["name"])
+            )
+            ids.update(await _select_tag_ids(db, missing))
+
+    return {name: ids[name] for name in names}
+
+async def retry_with_fresh_tag_ids(
+    db: AsyncSession,
+    tag_names: Iterable[str],
+    operation: Callable[[], Awaitable[T]]
+) -> T:
+    """
+    Run a write that resolves `tag_names` through the cache, once more if
+    a cached id turns out to be stale.
+
+    Another process may have deleted a tag this process still has cached;
+    inserting a tag pair for it then violates the foreign key. That
+    IntegrityError rolls the transaction back, drops the names from the
+    cache and reruns `operation`, which resolves them from the database.
+    `operation` must build its rows afresh and commit; a second failure
+    propagates.
+    """
+    tag_names = list(tag_names)
+    try:
+        return await operation()
+    except IntegrityError:
+        await db.rollback()
+        tag_cache.invalidate_many(tag_names)
+        return await operation()
+
+async def attach_tags(db: AsyncSession, link_id: int, tag_ids: List[int]) -> None:
+    """Link tags to a link in one multi-row insert, skipping existing pairs."""
+    if not tag_ids:
+        return
+    await db.execute(
+        _dialect_insert(db.bind.dialect.name, link_tags)
+        .values([{"link_id": link_id, "tag_id": tag_id} for tag_id in tag_ids])
+        .on_conflict_do_nothing(index_elements=["link_id", "tag_id"])
+    )
+
+async def warm_tag_cache(db: AsyncSession) -> int:
+    """Load the most used tags into the cache; called on startup."""
+    count = await tag_cache.warm(db)
+    print(f"Warmed tag cache with {count} tags")
+    return count
+
+async def get_chat_tags(db: AsyncSession, chat_id: str) -> List[str]:
+    """Names of the tags used on a chat's links, sorted."""
+    result = await db.execute(
+        select(Tag.name)
+        .join(link_tags, link_tags.c.tag_id == Tag.id)
+        .join(UserLink, UserLink.id == link_tags.c.link_id)
+        .where(UserLink.chat_id == chat_id)
+        .distinct()
+        .order_by(Tag.name)
+    )
+    return result.scalars().all()
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set
+from config import get_settings
+from .webhook_service import process_update
+
+logger = logging.getLogger(__name__)
+
+class RecentIds:
+    """The last `size` ids seen, for dropping duplicates."""
+
+    def __init__(self, size: int):
+        self._order: Deque[int] = deque(maxlen=size)
+        self._ids: Set[int] = set()
+
+    def __contains__(self, item: int) -> bool:
+        return item in self._ids
+
+    def add(self, item: int) -> None:
+        if len(self._order) == self._order.maxlen:
+            self._ids.discard(self._order[0])
+        self._order.append(item)
+        self._ids.add(item)
+
+class UpdateQueue:
+    """
+    In-process queue between POST /webhook and update processing.
+
+    The webhook only parks the update here and returns, so Telegram gets
+    its answer in milliseconds; workers save the links afterwards. Telegram
+    redelivers an update it got no (or a slow) answer for, so update_ids
+    still queued or recently processed are dropped if they come again.
+
+    Telegram has had its 200 by the time an update is processed, so it
+    never redelivers one that failed. A failure (say the database being
+    briefly unreachable) is retried by the worker with exponential backoff,
+    up to `max_attempts` tries; after that the update is logged and given
+    up on. Accepted updates live only in memory: the ones still queued at
+    shutdown get `drain_timeout` seconds to finish.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        max_size: int,
+        dedupe_window: int,
+        max_attempts: int = 5,
+        retry_delay: float = 1.0
+    ):
+        self.workers = workers
+        self.max_size = max_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        # Created on start, inside the running event loop
+        self._queue: Optional["asyncio.Queue[Dict]"] = None
+        self._recent = RecentIds(dedupe_window)
+        # Accepted but not yet processed successfully
+        self._pending: Set[int] = set()
+        self._tasks: List[asyncio.Task] = []
+        self.accepted = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.processed = 0
+        self.failed = 0
+        self.retries = 0
+        self.links_saved = 0
+
+    def submit(self, update: Dict) -> bool:
+        """
+        Queue an update; returns False if it's a redelivery.
+
+        Raises:
+            asyncio.QueueFull: If the workers are too far behind; the
+                update is not remembered, so Telegram's retry gets in
+        """
+        update_id = update.get("update_id")
+        if update_id is not None and (update_id in self._pending or update_id in self._recent):
+            self.duplicates += 1
+            return False
+        if self._queue is None:
+            raise RuntimeError("Webhook update queue is not running")
+        try:
+            self._queue.put_nowait(update)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise
+        if update_id is not None:
+            self._pending.add(update_id)
+        self.accepted += 1
+        return True
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [
+            asyncio.create_task(self._run(worker_id)) for worker_id in range(self.workers)
+        ]
+        logger.info(f"Started {self.workers} webhook update workers")
+
+    async def stop(self, drain_timeout: float = 10.0) -> None:
+        if self._tasks:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Dropping {self._queue.qsize()} unprocessed webhook updates")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Dropped updates weren't processed; let their redeliveries in
+        self._pending.clear()
+
+    async def _process(self, worker_id: int, update: Dict) -> int:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return await process_update(update)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if attempt >= self.max_attempts:
+                    raise
+                delay = self.retry_delay * 2 ** (attempt - 1)
+                self.retries += 1
+                logger.warning(
+                    f"Webhook worker {worker_id} failed on update {update.get('update_id')} "
+                    f"(attempt {attempt}), retrying in {delay:g}s: {str(e)}"
+                )
+                await asyncio.sleep(delay)
+
+    async def _run(self, worker_id: int) -> None:
+        while True:
+            update = await self._queue.get()
+            update_id = update.get("update_id")
+            try:
+                saved = await self._process(worker_id, update)
+                self.links_saved += saved
+                self.processed += 1
+                if update_id is not None:
+                    self._recent.add(update_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(
+                    f"Webhook worker {worker_id} gave up on update {update.get('update_id')} "
+                    f"after {self.max_attempts} attempts: {str(e)}"
+                )
+            finally:
+                self._pending.discard(update_id)
+                self._queue.task_done()
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "pending": len(self._pending),
+            "accepted": self.accepted,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+            "processed": self.processed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "links_saved": self.links_saved,
+        }
+
+def _build_queue() -> UpdateQueue:
+    settings = get_settings()
+    return UpdateQueue(
+        settings.WEBHOOK_WORKERS,
+        settings.WEBHOOK_QUEUE_SIZE,
+        settings.WEBHOOK_DEDUPE_WINDOW,
+        settings.WEBHOOK_MAX_ATTEMPTS,
+        settings.WEBHOOK_RETRY_DELAY,
+    )
+
+update_queue = _build_queue()
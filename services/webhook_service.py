@@ -0,0 +1,54 @@
+import asyncio
+from typing import Dict
+from config import get_settings
+from models import AsyncSessionLocal
+from utils import telegram_client
+from utils.scrapers import parse_message, extract_links_and_tags
+from .job_service import enqueue_links
+from .enrichment_worker import worker_pool
+from .regeneration import regeneration_scheduler
+
+async def process_update(update: Dict) -> int:
+    """
+    Save every link in a Telegram update and queue them for enrichment.
+
+    Each link gets all the message's #tags. The chat is then told, without
+    waiting for delivery, how many links were saved and where its history
+    page is.
+
+    Args:
+        update: Update object as posted to the webhook
+
+    Returns:
+        int: Number of links saved (0 for edits and updates without a message or links)
+
+    Raises:
+        HTTPException: If saving a link fails
+    """
+    # Edits (edited_message) are ignored: the links were saved when the
+    # message was first sent, and saving them again would duplicate them
+    if not update.get("message"):
+        return 0
+    message = parse_message(update)
+    links, tags = extract_links_and_tags(message.text or "")
+    if not links:
+        return 0
+
+    async with AsyncSessionLocal() as db:
+        await enqueue_links(db, message.chat_id, links, tags)
+    worker_pool.notify()
+    regeneration_scheduler.schedule(message.chat_id, message.first_name)
+
+    saved = "1 link" if len(links) == 1 else f"{len(links)} links"
+    # Not awaited: the Telegram client may hold the reply back for the
+    # chat's rate limit, and that shouldn't stall the next update
+    reply = telegram_client.submit("sendMessage", {
+        "chat_id": message.chat_id,
+        "text": f"Saved {saved}. Your history: {get_settings().PUBLIC_BASE_URL}/history/{message.chat_id}",
+    })
+    reply.add_done_callback(_log_reply_failure)
+    return len(links)
+
+def _log_reply_failure(reply: asyncio.Future) -> None:
+    if not reply.cancelled() and reply.exception() is not None:
+        print(f"Failed to confirm saved links: {str(reply.exception())}")
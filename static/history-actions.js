@@ -0,0 +1,233 @@
+// Card and tag actions shared by the static and paged history pages
+function deleteAllLinks() {
+    if (confirm("Are you sure you want to delete all links and tags? This action cannot be undone.")) {
+        fetch(`/chats/${encodeURIComponent(chatId)}/links`, { method: "DELETE" })
+            .then(response => response.json())
+            .then(data => {
+                if (data.message === "All links deleted successfully") {
+                    alert(data.message);
+                    location.reload(); // Reload the page to reflect the changes
+                } else {
+                    alert(data.detail || "Failed to delete all links.");
+                }
+            })
+            .catch(error => {
+                console.error("Error deleting all links:", error);
+                alert("An error occurred while deleting all links and tags.");
+            });
+    }
+}
+
+function openTagDialog(linkId) {
+    const existingTags = Array.from(document.querySelectorAll('.filter:not(.active)'))
+        .map(filter => filter.dataset.tag)
+        .filter(tag => tag !== 'all');
+
+    // Create a modal-like dialog
+    const modal = document.createElement('div');
+    modal.style.position = 'fixed';
+    modal.style.top = '50%';
+    modal.style.left = '50%';
+    modal.style.transform = 'translate(-50%, -50%)';
+    modal.style.backgroundColor = '#fff';
+    modal.style.padding = '20px';
+    modal.style.boxShadow = '0 4px 8px rgba(0, 0, 0, 0.1)';
+    modal.style.zIndex = '1000';
+    modal.style.borderRadius = '8px';
+    modal.style.maxWidth = '90%';
+    modal.style.textAlign = 'center';
+
+    // Modal content. Tag names are user input, so they are set as text,
+    // never as HTML
+    const heading = document.createElement('h3');
+    heading.textContent = 'Select Tags';
+    modal.appendChild(heading);
+
+    const tagList = document.createElement('div');
+    tagList.style.cssText = 'display: flex; flex-wrap: wrap; gap: 10px; justify-content: center;';
+    existingTags.forEach(tag => {
+        const tagElement = document.createElement('span');
+        tagElement.className = 'filter';
+        tagElement.style.cssText = 'cursor: pointer; padding: 6px 12px; border-radius: 12px; background-color: #e0f7fa; color: #00796b;';
+        tagElement.dataset.tag = tag;
+        tagElement.textContent = tag;
+        tagList.appendChild(tagElement);
+    });
+    modal.appendChild(tagList);
+
+    const inputRow = document.createElement('div');
+    inputRow.style.marginTop = '15px';
+    const newTagInput = document.createElement('input');
+    newTagInput.id = 'newTagInput';
+    newTagInput.type = 'text';
+    newTagInput.placeholder = 'Add a new tag';
+    newTagInput.style.cssText = 'padding: 6px 10px; width: calc(100% - 24px); border: 1px solid #ddd; border-radius: 8px;';
+    inputRow.appendChild(newTagInput);
+    modal.appendChild(inputRow);
+
+    const saveButton = document.createElement('button');
+    saveButton.id = 'saveTags';
+    saveButton.textContent = 'Save Tags';
+    saveButton.style.cssText = 'margin-top: 20px; padding: 10px 20px; background-color: #00796b; color: white; border: none; border-radius: 8px; cursor: pointer;';
+    modal.appendChild(saveButton);
+
+    const cancelButton = document.createElement('button');
+    cancelButton.id = 'cancelTags';
+    cancelButton.textContent = 'Cancel';
+    cancelButton.style.cssText = 'margin-top: 20px; padding: 10px 20px; background-color: #f8d7da; color: #721c24; border: none; border-radius: 8px; cursor: pointer; margin-left: 10px;';
+    modal.appendChild(cancelButton);
+
+    // Add modal to the document
+    document.body.appendChild(modal);
+
+    // Handle tag selection
+    const selectedTags = new Set();
+    modal.querySelectorAll('.filter').forEach(tagElement => {
+        tagElement.addEventListener('click', () => {
+            const tag = tagElement.dataset.tag;
+            if (selectedTags.has(tag)) {
+                selectedTags.delete(tag);
+                tagElement.style.backgroundColor = '#e0f7fa';
+                tagElement.style.color = '#00796b';
+            } else {
+                selectedTags.add(tag);
+                tagElement.style.backgroundColor = '#00796b';
+                tagElement.style.color = 'white';
+            }
+        });
+    });
+
+    // Handle save action
+    modal.querySelector('#saveTags').addEventListener('click', () => {
+    const newTag = document.getElementById('newTagInput').value.trim();
+    if (newTag) {
+        selectedTags.add(newTag); // Add the new tag to the selected tags
+    }
+
+    if (selectedTags.size > 0) {
+        const tagsArray = Array.from(selectedTags);
+
+        // Use `Promise.all` to handle multiple tag additions
+        Promise.all(tagsArray.map(tag =>
+            fetch(`/links/${linkId}/tags/${encodeURIComponent(tag)}`, { method: "POST" })
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`Failed to add tag: ${tag}`);
+                }
+                return response.json();
+            })
+            .then(data => {
+                if (data.message !== "Tag added successfully") {
+                    throw new Error(data.detail || `Error adding tag: ${tag}`);
+                }
+            })
+        ))
+        .then(() => {
+            refreshFiltersBar(); // Refresh the filters bar dynamically
+            location.reload();   // Reload the page to reflect changes
+        })
+        .catch(error => {
+            console.error("Error adding tags:", error);
+            alert("An error occurred while adding the tags. Please try again.");
+        });
+    }
+
+    document.body.removeChild(modal);
+});
+
+
+
+    // Handle cancel action
+    modal.querySelector('#cancelTags').addEventListener('click', () => {
+        document.body.removeChild(modal);
+    });
+}
+
+
+function deleteLink(linkId) {
+    if (confirm("Are you sure you want to delete this link?")) {
+        fetch(`/links/${linkId}`, { method: "DELETE" })
+            .then(response => {
+                if (response.ok) {
+                    alert("Link deleted successfully!");
+                    location.reload(); // Reload the page to update the UI
+                } else {
+                    alert("Failed to delete the link.");
+                }
+            })
+            .catch(error => {
+                console.error("Error deleting link:", error);
+                alert("An error occurred while deleting the link.");
+            });
+    }
+}
+
+function deleteActiveTag() {
+    const activeFilter = document.querySelector('.filter.active');
+    const activeTag = activeFilter ? activeFilter.dataset.tag : 'all';
+    if (activeTag === 'all') {
+        alert("Cannot delete the 'All' tag.");
+        return;
+    }
+    if (confirm(`Are you sure you want to delete the tag '${activeTag}'? This action cannot be undone.`)) {
+        fetch(`/chats/${encodeURIComponent(chatId)}/tags/${encodeURIComponent(activeTag)}`, { method: "DELETE" })
+            .then(response => response.json())
+            .then(data => {
+                if (data.message === "Tag deleted successfully") {
+                    alert(data.message);
+                    location.reload();
+                } else {
+                    alert(data.detail || "Failed to delete the tag.");
+                }
+            })
+            .catch(error => {
+                console.error("Error deleting tag:", error);
+                alert("An error occurred while deleting the tag.");
+            });
+    }
+}
+
+function deleteTagFromLink(linkId, tagName) {
+    if (confirm(`Are you sure you want to remove the tag '${tagName}' from this link?`)) {
+        fetch(`/links/${linkId}/tags/${encodeURIComponent(tagName)}`, { method: "DELETE" })
+            .then(response => response.json())
+            .then(data => {
+                if (data.message === "Tag removed successfully") {
+                    alert(data.message);
+                    location.reload(); // Reload to reflect changes
+                } else {
+                    alert(data.detail || "Failed to remove the tag.");
+                }
+            })
+            .catch(error => {
+                console.error("Error deleting tag:", error);
+                alert("An error occurred while removing the tag.");
+            });
+    }
+}
+
+function editTitle(linkId) {
+    const newTitle = prompt("Enter a new title for the link:");
+    if (newTitle && newTitle.trim() !== "") {
+        fetch(`/links/${linkId}`, {
+            method: "PATCH",
+            headers: {
+                "Content-Type": "application/json"
+            },
+            body: JSON.stringify({ title: newTitle })
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.message === "Title updated successfully") {
+                alert(data.message);
+                location.reload(); // Reload to reflect the updated title
+            } else {
+                alert(data.detail || "Failed to update the title.");
+            }
+        })
+        .catch(error => {
+            console.error("Error updating title:", error);
+            alert("An error occurred while updating the title.");
+        });
+    }
+}
@@ -0,0 +1,108 @@
+// Infinite scroll over /chats/{chat_id}/cards; tag filtering is done by the server
+const chatId = document.body.dataset.chatId;
+const pageSize = Number(document.body.dataset.pageSize);
+let activeTag = 'all';
+let nextCursor = null;
+let exhausted = false;
+let loading = false;
+let generation = 0; // Bumped on every filter change to drop stale pages
+
+function cardsUrl() {
+    const params = new URLSearchParams({ limit: pageSize });
+    if (activeTag !== 'all') {
+        params.set('tag', activeTag);
+    }
+    if (nextCursor) {
+        params.set('after', nextCursor);
+    }
+    return `/chats/${encodeURIComponent(chatId)}/cards?${params}`;
+}
+
+function sentinelInView() {
+    const sentinel = document.getElementById('scroll-sentinel');
+    return sentinel.getBoundingClientRect().top < window.innerHeight + 600;
+}
+
+function loadNextPage() {
+    if (loading || exhausted) {
+        return;
+    }
+    loading = true;
+    const requestGeneration = generation;
+    fetch(cardsUrl())
+        .then(response => response.json())
+        .then(page => {
+            if (requestGeneration !== generation) {
+                return;
+            }
+            document.querySelector('.bookmarks').insertAdjacentHTML('beforeend', page.html);
+            nextCursor = page.next_cursor;
+            exhausted = !nextCursor;
+        })
+        .catch(error => {
+            console.error("Error loading bookmarks:", error);
+        })
+        .finally(() => {
+            if (requestGeneration !== generation) {
+                return;
+            }
+            loading = false;
+            // Keep filling until the page is taller than the viewport
+            if (!exhausted && sentinelInView()) {
+                loadNextPage();
+            }
+        });
+}
+
+// Show only bookmarks with this tag, starting again from the first page
+function filterByTag(tag) {
+    document.querySelectorAll('.filter').forEach(filter => {
+        if (filter.dataset.tag === tag) {
+            filter.classList.add('active');
+        } else {
+            filter.classList.remove('active');
+        }
+    });
+
+    activeTag = tag;
+    nextCursor = null;
+    exhausted = false;
+    loading = false;
+    generation += 1;
+    document.querySelector('.bookmarks').innerHTML = '';
+    loadNextPage();
+}
+
+// Refresh the filters bar dynamically
+function refreshFiltersBar() {
+    fetch(`/chats/${encodeURIComponent(chatId)}/tags`)
+        .then(response => response.json())
+        .then(tags => {
+            const filtersContainer = document.querySelector('.filters');
+            if (filtersContainer) {
+                const filters = ['all', ...tags];
+                filtersContainer.innerHTML = '';
+                filters.forEach(tag => {
+                    const filter = document.createElement('span');
+                    filter.className = tag === activeTag ? 'filter active' : 'filter';
+                    filter.dataset.tag = tag;
+                    filter.textContent = tag === 'all' ? 'All' : tag;
+                    filter.addEventListener('click', () => {
+                        filterByTag(tag);
+                    });
+                    filtersContainer.appendChild(filter);
+                });
+            }
+        })
+        .catch(error => {
+            console.error("Error refreshing filters bar:", error);
+        });
+}
+
+new IntersectionObserver(entries => {
+    if (entries.some(entry => entry.isIntersecting)) {
+        loadNextPage();
+    }
+}, { rootMargin: '600px' }).observe(document.getElementById('scroll-sentinel'));
+
+loadNextPage();
@@ -0,0 +1,54 @@
+// Filtering for the history page that has every card inline
+const chatId = document.body.dataset.chatId;
+
+// Define filterByTag function
+function filterByTag(tag) {
+    const bookmarks = document.querySelectorAll('.bookmark');
+    const filters = document.querySelectorAll('.filter');
+
+    // Update active filter
+    filters.forEach(filter => {
+        if (filter.dataset.tag === tag) {
+            filter.classList.add('active');
+        } else {
+            filter.classList.remove('active');
+        }
+    });
+
+    // Filter bookmarks
+    bookmarks.forEach(bookmark => {
+        const tags = bookmark.getAttribute('data-tags').split('|'); // Use pipe "|" as delimiter
+        if (tag === 'all' || tags.includes(tag)) {
+            bookmark.style.display = 'flex';
+        } else {
+            bookmark.style.display = 'none';
+        }
+    });
+}
+
+// Refresh the filters bar dynamically
+function refreshFiltersBar() {
+    fetch(`/chats/${encodeURIComponent(chatId)}/tags`)
+        .then(response => response.json())
+        .then(tags => {
+            const filtersContainer = document.querySelector('.filters');
+            if (filtersContainer) {
+                // Tag names are user input: set them as text, never as HTML
+                const filters = ['all', ...tags];
+                filtersContainer.innerHTML = '';
+                filters.forEach(tag => {
+                    const filter = document.createElement('span');
+                    filter.className = tag === 'all' ? 'filter active' : 'filter';
+                    filter.dataset.tag = tag;
+                    filter.textContent = tag === 'all' ? 'All' : tag;
+                    filter.addEventListener('click', () => {
+                        filterByTag(tag);
+                    });
+                    filtersContainer.appendChild(filter);
+                });
+            }
+        })
+        .catch(error => {
+            console.error("Error refreshing filters bar:", error);
+        });
+}
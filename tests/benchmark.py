@@ -0,0 +1,50 @@
+"""
+Measurement helpers for the benchmark tests (named test_benchmark_*).
+
+By default benchmarks run at sizes that keep the suite quick and only
+assert the comparison each one is about. BENCHMARK_FULL=1 runs them at
+the sizes the figures are quoted for (1M search rows, 10k-link chats,
+...); add -s to see the figures:
+
+    BENCHMARK_FULL=1 python -m pytest -s -k benchmark tests
+"""
+import os
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+FULL = os.getenv("BENCHMARK_FULL", "").lower() in ("1", "true", "yes")
+
+def size(quick: int, full: int) -> int:
+    """The quick size normally, the full one with BENCHMARK_FULL=1."""
+    return full if FULL else quick
+
+def timed(function: Callable, repeat: int = 1) -> Tuple[object, float]:
+    """Result of the last call and the best wall time of `repeat` calls, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    return result, best
+
+def peak_memory(function: Callable) -> Tuple[object, int]:
+    """Result of one call and the peak bytes Python allocated during it."""
+    tracemalloc.start()
+    try:
+        result = function()
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/max of latency samples given in seconds, as milliseconds."""
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(ordered[len(ordered) // 2] * 1000, 2),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2),
+    }
+
+def report(name: str, **figures) -> None:
+    print(f"\n[benchmark] {name}: " + ", ".join(f"{key}={value}" for key, value in figures.items()))
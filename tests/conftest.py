@@ -0,0 +1,185 @@
+"""
+Shared test setup.
+
+Settings, the database engines and the module-level services are built at
+import time, so the environment is pointed at a throwaway SQLite database
+and storage directory before any app module is imported. Each test that
+uses the `database` fixture gets a freshly created schema.
+"""
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+TEST_DIR = Path(tempfile.mkdtemp(prefix="bookmarks-tests-"))
+DATABASE_PATH = TEST_DIR / "test.db"
+
+os.environ.update({
+    "RAILWAY_ENV": "test",  # Skip loading a developer's .env
+    "DATABASE_URL": f"sqlite:///{DATABASE_PATH}",
+    "ASYNC_DATABASE_URL": "",
+    "LINKS_HISTORY_PATH": str(TEST_DIR / "links_history"),
+    "ENRICHMENT_CACHE_PATH": str(TEST_DIR / "enrichment_cache.sqlite3"),
+    "ENRICHMENT_WORKERS": "0",
+    "ANALYSIS_INTERVAL": "0",
+    # Tests render pages explicitly; scheduled rebuilds never fire
+    "HTML_REGENERATE_DELAY": "3600",
+    "TELEGRAM_API_URL": "http://telegram.test/bottest-token/",
+    "TELEGRAM_WEBHOOK_SECRET": "test-secret",
+    "PUBLIC_BASE_URL": "http://testserver",
+})
+# Templates and /static are found relative to the working directory
+os.chdir(ROOT)
+sys.path.insert(0, str(ROOT))
+
+import pytest
+from sqlalchemy import event
+from fastapi.testclient import TestClient
+from models import Base
+from models.base import engine, async_engine
+from services import regeneration_scheduler, tag_cache
+
+@event.listens_for(engine, "connect")
+@event.listens_for(async_engine.sync_engine, "connect")
+def _enforce_foreign_keys(dbapi_connection, connection_record):
+    # Postgres always checks foreign keys; make SQLite behave the same
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+_abandoned_tasks = []
+
+@pytest.fixture
+def database():
+    """An empty database with the full schema, an empty tag cache and no pending page rebuilds."""
+    engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        path = Path(f"{DATABASE_PATH}{suffix}")
+        if path.exists():
+            path.unlink()
+    Base.metadata.create_all(engine)
+    tag_cache.clear()
+    # Rebuilds scheduled by earlier tests belong to event loops that are
+    # gone; a fresh scheduler state keeps flush() from waiting on them.
+    # Their tasks are kept referenced so they aren't reported as destroyed
+    _abandoned_tasks.extend(regeneration_scheduler._tasks.values())
+    regeneration_scheduler.__init__(regeneration_scheduler.delay)
+    yield engine
+
+@pytest.fixture
+def client(database):
+    # Not used as a context manager, so startup hooks (workers, HTTP
+    # clients, the webhook queue) don't run
+    from main import app
+    return TestClient(app)
+
+class StatementCount:
+    """SQL statements sent to the database while counting."""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+@pytest.fixture
+def count_statements():
+    """
+    Count every statement run on the app's engines inside the block,
+    including those from streamed response bodies and spawned tasks:
+
+        with count_statements() as counted:
+            client.get("/links", params={"chat_id": "1"})
+        assert counted.count == 2
+    """
+    @contextmanager
+    def counting():
+        counted = StatementCount()
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            counted.statements.append(statement)
+
+        for target in (engine, async_engine.sync_engine):
+            event.listen(target, "before_cursor_execute", record)
+        try:
+            yield counted
+        finally:
+            for target in (engine, async_engine.sync_engine):
+                event.remove(target, "before_cursor_execute", record)
+
+    return counting
+
+@pytest.fixture
+def make_chat(database):
+    """
+    Fill a chat with `links` links, each with two tags and a note, plus
+    `files` files with a tag and a note each. Tags are shared between chats.
+    """
+    from sqlalchemy.orm import Session
+    from models import Tag, UserFile, UserLink, UserNote
+
+    def make(chat_id: str, links: int, files: int = 0) -> None:
+        with Session(engine) as db:
+            def tag(name):
+                return db.query(Tag).filter_by(name=name).first() or Tag(name=name)
+
+            for index in range(links):
+                link = UserLink(
+                    chat_id=chat_id,
+                    link=f"https://example.com/{chat_id}/{index}",
+                    title=f"Saved article {index}",
+                    description=f"An article about topic {index}",
+                    url=f"https://example.com/{chat_id}/{index}",
+                    images=[f"https://example.com/{index}.jpg"],
+                    tags=[tag("reading"), tag(f"topic{index % 5}")],
+                )
+                db.add(link)
+                db.add(UserNote(chat_id=chat_id, link=link, note_content=f"Note on article {index}"))
+                db.flush()
+            for index in range(files):
+                user_file = UserFile(
+                    chat_id=chat_id,
+                    file_name=f"file{index}.pdf",
+                    file_path=f"/files/{chat_id}/{index}.pdf",
+                    title=f"Saved article file {index}",
+                    tags=[tag("documents")],
+                )
+                db.add(user_file)
+                db.add(UserNote(chat_id=chat_id, file=user_file, note_content=f"Note on file {index}"))
+                db.flush()
+            db.commit()
+
+    return make
+
+@pytest.fixture
+def fake_soax(monkeypatch, tmp_path):
+    """
+    Route scraper requests to a FakeSoax, with an empty enrichment cache and
+    single-flight table so earlier tests' results aren't reused.
+    """
+    from fakes import FakeSoax
+    from utils.scrapers import analyzer, http_client
+    from utils.scrapers.cache import EnrichmentCache
+    from utils.scrapers.singleflight import SingleFlight
+    from utils.scrapers.urls import SOAX_PRODUCT, SOAX_UNBLOCKER
+
+    fake = FakeSoax()
+    monkeypatch.setattr(http_client, "_client", fake.client())
+    monkeypatch.setattr(analyzer, "enrichment_cache", EnrichmentCache(
+        1000, tmp_path / "enrichment_cache.sqlite3", {SOAX_PRODUCT: 3600, SOAX_UNBLOCKER: 86400}
+    ))
+    monkeypatch.setattr(analyzer, "enrichment_flight", SingleFlight())
+    return fake
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    """Route model calls (AI analysis) to a FakeModelServer."""
+    from fakes import FakeModelServer
+    from utils.scrapers import http_client
+
+    fake = FakeModelServer()
+    monkeypatch.setattr(http_client, "_client", fake.client())
+    return fake
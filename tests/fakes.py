@@ -0,0 +1,132 @@
+"""
+In-process stand-ins for the external services the app calls, served
+through httpx.MockTransport so no sockets or network are needed.
+"""
+import asyncio
+import json
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional
+import httpx
+
+def opengraph_page(link: str, padding: int = 0) -> str:
+    """A page with OpenGraph tags in its head and `padding` bytes of body."""
+    return (
+        "<html><head>"
+        f'<meta property="og:title" content="Title of {link}">'
+        f'<meta property="og:description" content="Description of {link}">'
+        f'<meta property="og:image" content="{link}/image.jpg">'
+        '<meta property="og:site_name" content="Example">'
+        "</head><body>"
+        + "x" * padding
+        + "</body></html>"
+    )
+
+class FakeSoax:
+    """
+    The SOAX scraping API: product JSON for `getProduct` requests and an
+    OpenGraph page from the unblocker, each after `latency` seconds.
+
+    Records upstream hits per link and how many requests each endpoint
+    had in flight at once.
+    """
+
+    def __init__(self, latency: float = 0.0, page_padding: int = 0):
+        self.latency = latency
+        self.page_padding = page_padding
+        self.hits: Counter = Counter()
+        self.in_flight: Counter = Counter()
+        self.max_in_flight: Counter = Counter()
+        self.started: List[tuple] = []  # (endpoint, link, monotonic start time)
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/v1/request":
+            endpoint, link = "product", request.url.params["param"]
+        else:
+            endpoint, link = "unblocker", request.url.params["url"]
+        self.hits[link] += 1
+        self.started.append((endpoint, link, time.monotonic()))
+        self.in_flight[endpoint] += 1
+        self.max_in_flight[endpoint] = max(self.max_in_flight[endpoint], self.in_flight[endpoint])
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight[endpoint] -= 1
+
+        if endpoint == "product":
+            return httpx.Response(200, json={"data": {"status": "done", "value": {
+                "title": f"Product {link}",
+                "price": "19.99",
+                "url": link,
+                "extras": {"imagesSmall": [f"{link}/small.jpg"]},
+            }}})
+        return httpx.Response(200, html=opengraph_page(link, self.page_padding))
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+class FakeModelServer:
+    """
+    An OpenAI-compatible chat completions endpoint. `reply(chat_ids)`
+    builds the analysis returned for the chats named in the prompt.
+    """
+
+    def __init__(self, reply: Optional[Callable[[List[str]], Dict]] = None):
+        self.reply = reply or self.recommend
+        self.requests: List[Dict] = []
+
+    @staticmethod
+    def recommend(chat_ids: List[str]) -> Dict:
+        return {"chats": {
+            chat_id: {
+                "general": f"Chat {chat_id} reads about testing",
+                "recommendations": [{
+                    "destination_tag": "reading",
+                    "title": f"Suggested for {chat_id}",
+                    "link": f"https://example.org/suggested/{chat_id}",
+                }],
+            }
+            for chat_id in chat_ids
+        }}
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.requests.append(body)
+        prompt = body["messages"][1]["content"]
+        chat_ids = [line[len("Chat "):] for line in prompt.splitlines() if line.startswith("Chat ")]
+        return httpx.Response(200, json={
+            "choices": [{"message": {"content": json.dumps(self.reply(chat_ids))}}],
+            "usage": {"prompt_tokens": 100 * len(chat_ids), "completion_tokens": 50 * len(chat_ids)},
+        })
+
+    def client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+class FakeBotApi:
+    """
+    The Telegram Bot API. Every call is recorded with its arrival time;
+    `responses` can queue canned (status, body) replies per chat id, used
+    before the default `{"ok": true}`.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: List[tuple] = []  # (monotonic time, method, payload)
+        self.responses: Dict[str, List[tuple]] = {}
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        method = request.url.path.rsplit("/", 1)[-1]
+        self.calls.append((time.monotonic(), method, payload))
+        await asyncio.sleep(self.latency)
+        queued = self.responses.get(str(payload.get("chat_id")))
+        if queued:
+            status, body = queued.pop(0)
+            return httpx.Response(status, json=body)
+        return httpx.Response(200, json={"ok": True, "result": {"message_id": len(self.calls)}})
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handler)
+
+    def times_for(self, chat_id) -> List[float]:
+        return [at for at, _, payload in self.calls if str(payload.get("chat_id")) == str(chat_id)]
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import os
+import pytest
+from services import analysis_worker
+from services.analysis_worker import AnalysisPipeline
+from utils.models import Recommendation, UserAnalysis
+from utils.recommendation_store import RecommendationStore
+
+class ScheduledChats(list):
+    def schedule(self, chat_id):
+        self.append(str(chat_id))
+
+@pytest.fixture
+def pipeline(monkeypatch, tmp_path, fake_model):
+    store = RecommendationStore(tmp_path)
+    scheduled = ScheduledChats()
+    monkeypatch.setattr(analysis_worker, "recommendation_store", store)
+    monkeypatch.setattr(analysis_worker, "regeneration_scheduler", scheduled)
+    pipeline = AnalysisPipeline(interval=0)
+    pipeline.store, pipeline.scheduled = store, scheduled
+    return pipeline
+
+def test_changed_chats_are_analyzed_in_one_batch(pipeline, fake_model, make_chat):
+    for chat_id in ("a", "b", "c"):
+        make_chat(chat_id, 5)
+    assert asyncio.run(pipeline.run_once()) == 3
+    assert len(fake_model.requests) == 1
+    assert sorted(pipeline.scheduled) == ["a", "b", "c"]
+    [recommendation] = pipeline.store.get("b")
+    assert recommendation.link == "https://example.org/suggested/b"
+
+    # Nothing changed: no model call at all
+    assert asyncio.run(pipeline.run_once()) == 0
+    assert len(fake_model.requests) == 1
+
+    make_chat("b", 3)
+    assert asyncio.run(pipeline.run_once()) == 1
+    assert "Chat b" in fake_model.requests[-1]["messages"][1]["content"]
+    assert "Chat a" not in fake_model.requests[-1]["messages"][1]["content"]
+    assert pipeline.stats()["prompt_tokens"] == 400
+
+def test_chats_the_model_skips_are_not_retried_until_they_change(pipeline, fake_model, make_chat):
+    fake_model.reply = lambda chat_ids: {"chats": {"a": fake_model.recommend(["a"])["chats"]["a"]}}
+    make_chat("a", 2)
+    make_chat("b", 2)
+    assert asyncio.run(pipeline.run_once()) == 1
+    assert pipeline.stats()["chats_skipped"] == 1
+    assert pipeline.store.get("b") == []
+    assert asyncio.run(pipeline.run_once()) == 0
+    assert len(fake_model.requests) == 1
+
+def test_recommendation_store_reads_each_version_once(tmp_path):
+    store = RecommendationStore(tmp_path)
+    assert store.get("1") == []
+    store.put("1", UserAnalysis(general="g", recommendations=[
+        Recommendation(destination_tag="t", title="T", link="https://example.com/")
+    ]))
+    for _ in range(3):
+        assert [rec.title for rec in store.get("1")] == ["T"]
+    assert (store.stats()["hits"], store.stats()["loads"]) == (3, 0)
+
+    # Replaced behind the store's back
+    path = tmp_path / "1_summary.json"
+    path.write_text(json.dumps({"general": "", "recommendations": [
+        {"destination_tag": "t", "title": "New", "link": "https://example.com/new"}
+    ]}))
+    os.utime(path, ns=(1, 1))
+    assert [rec.title for rec in store.get("1")] == ["New"]
+    assert store.stats()["loads"] == 1
+
+    path.write_text("{broken")
+    assert store.get("1") == [] == store.get("1")
+    assert store.stats()["errors"] == 1
+
+def test_pipeline_creates_its_table_on_start(database):
+    from sqlalchemy import inspect
+    from models import ChatAnalysis
+    ChatAnalysis.__table__.drop(database)
+
+    async def start_twice():
+        pipeline = AnalysisPipeline(interval=3600)
+        for _ in range(2):
+            await pipeline.start()
+            await pipeline.stop()
+
+    asyncio.run(start_twice())
+    assert inspect(database).has_table("chat_analyses")
+
+def test_only_web_links_are_recommended(pipeline, fake_model, make_chat, client):
+    links = ["javascript:alert(document.cookie)", "data:text/html,<script>x</script>",
+             " https://example.org/ok ", "//example.org/no-scheme", "http:///no-host"]
+    fake_model.reply = lambda chat_ids: {"chats": {chat_id: {"general": "", "recommendations": [
+        {"destination_tag": "reading", "title": f"Pick {index}", "link": link}
+        for index, link in enumerate(links)
+    ]} for chat_id in chat_ids}}
+    make_chat("unsafe", 1)
+    assert asyncio.run(pipeline.run_once()) == 1
+    assert [rec.link for rec in pipeline.store.get("unsafe")] == ["https://example.org/ok"]
+
+    # A summary file written before validation existed is filtered on load
+    (pipeline.store.root / "old_summary.json").write_text(json.dumps({"general": "", "recommendations": [
+        {"destination_tag": "t", "title": "Bad", "link": "javascript:alert(1)"},
+        {"destination_tag": "t", "title": "Good", "link": "http://example.com/"},
+    ]}))
+    assert [rec.title for rec in pipeline.store.get("old")] == ["Good"]
@@ -0,0 +1,312 @@
+import asyncio
+import gzip
+import time
+from sqlalchemy.orm import Session
+from models import UserLink
+from services import regenerate_html
+from services.regeneration import RegenerationScheduler
+from utils.html_generator import card_cache
+from utils.templates import IMMUTABLE_CACHE_CONTROL, static_url
+
+def _render(chat_id):
+    return asyncio.run(regenerate_html(chat_id))
+
+def test_history_page_rerenders_only_changed_cards(client, database, make_chat):
+    make_chat("cards", 20)
+    _render("cards")
+    misses = card_cache.stats()["misses"]
+    _render("cards")
+    assert card_cache.stats()["misses"] == misses
+
+    with Session(database) as db:
+        link = db.query(UserLink).filter_by(chat_id="cards").first()
+        link.title = "Renamed article"
+        db.commit()
+    _render("cards")
+    assert card_cache.stats()["misses"] == misses + 1
+    assert "Renamed article" in client.get("/history/cards").text
+
+def test_history_page_escapes_saved_text(client, database, make_chat):
+    make_chat("escape", 1)
+    with Session(database) as db:
+        link = db.query(UserLink).filter_by(chat_id="escape").one()
+        link.title = "<script>alert(1)</script>"
+        db.commit()
+    _render("escape")
+    page = client.get("/history/escape").text
+    assert "<script>alert(1)</script>" not in page
+    assert "&lt;script&gt;alert(1)&lt;/script&gt;" in page
+
+def test_cards_link_only_to_web_urls(client, database, make_chat):
+    make_chat("hostile", 2)
+    with Session(database) as db:
+        first, second = db.query(UserLink).filter_by(chat_id="hostile").order_by(UserLink.id)
+        first.url, first.images = "javascript:alert(1)", ["data:image/svg+xml,<svg onload=alert(1)>"]
+        second.url, second.images = " https://example.org/real ", ["https://example.org/real.jpg"]
+        db.commit()
+    _render("hostile")
+    page = client.get("/history/hostile").text
+    assert "javascript:alert" not in page and "data:image" not in page
+    assert 'href="#"' in page
+    assert 'href="https://example.org/real"' in page and 'src="https://example.org/real.jpg"' in page
+
+def test_history_page_revalidates_and_serves_compressed(client, make_chat):
+    make_chat("served", 3)
+    _render("served")
+    assert client.get("/history/missing").status_code == 404
+
+    response = client.get("/history/served", headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-cache"
+    # Starlette adds the charset to text/* types itself
+    assert response.headers["content-type"] == "text/html; charset=utf-8"
+    etag = response.headers["etag"]
+    assert client.get("/history/served", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/history/served", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+    raw = client.get(
+        "/history/served", headers={"Accept-Encoding": "gzip"}, stream=True
+    ).raw.read(decode_content=False)
+    assert gzip.decompress(raw).decode() == response.text
+
+def test_versioned_static_assets_are_immutable(client):
+    assert client.get(static_url("history.js")).headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert client.get("/static/history.js").headers["cache-control"] == "no-cache"
+    assert client.get("/static/history.js?dev=1").headers["cache-control"] == "no-cache"
+
+def test_regeneration_coalesces_a_burst_of_changes(monkeypatch):
+    from services import regeneration
+    renders = []
+
+    async def slow_render(chat_id, first_name):
+        renders.append((chat_id, time.monotonic()))
+        await asyncio.sleep(0.1)
+
+    monkeypatch.setattr(regeneration, "regenerate_html", slow_render)
+
+    async def burst():
+        scheduler = RegenerationScheduler(delay=0.05)
+        for _ in range(20):
+            scheduler.schedule("1")
+        scheduler.schedule("2")
+        await asyncio.sleep(0.1)
+        # Arrives mid-render, so exactly one more pass follows
+        scheduler.schedule("1")
+        scheduler.schedule("1")
+        await asyncio.sleep(0.4)
+        return scheduler.stats()
+
+    stats = asyncio.run(burst())
+    assert sorted(chat_id for chat_id, _ in renders) == ["1", "1", "2"]
+    assert (stats["requested"], stats["coalesced"], stats["renders"]) == (23, 21, 3)
+    assert stats["pending"] == stats["rendering"] == 0
+
+def test_page_edits_are_rendered_before_the_response(client, database, make_chat):
+    make_chat("edits", 2)
+    _render("edits")
+    before = client.get("/history/edits")
+    with Session(database) as db:
+        link_id = db.query(UserLink.id).filter_by(chat_id="edits").order_by(UserLink.id).first()[0]
+
+    # HTML_REGENERATE_DELAY is an hour in tests; the page's reload right
+    # after the response must already see the change
+    assert client.patch(f"/links/{link_id}", json={"title": "Fresh title"}).status_code == 200
+    after = client.get("/history/edits", headers={"If-None-Match": before.headers["etag"]})
+    assert after.status_code == 200 and "Fresh title" in after.text
+    assert client.delete(f"/links/{link_id}").status_code == 200
+    assert "Fresh title" not in client.get("/history/edits").text
+
+def test_flush_folds_in_a_pending_change(monkeypatch):
+    from services import regeneration
+    renders = []
+
+    async def render(chat_id, first_name):
+        renders.append((chat_id, first_name))
+
+    monkeypatch.setattr(regeneration, "regenerate_html", render)
+
+    async def edit():
+        scheduler = RegenerationScheduler(delay=3600)
+        scheduler.schedule("1", "Ann")
+        await asyncio.wait_for(scheduler.flush("1"), 1)
+        await asyncio.wait_for(scheduler.flush("2"), 1)
+        return scheduler.stats()
+
+    stats = asyncio.run(edit())
+    # A rebuild from the page keeps the name the bot last saw
+    assert renders == [("1", "Ann"), ("2", "User")]
+    assert (stats["renders"], stats["pending"]) == (2, 0)
+
+def test_scripts_never_build_html_from_strings():
+    # Tag names and titles are user input; scripts only clear containers
+    # with innerHTML and set text with textContent. The one HTML insert is
+    # the cards page, which the server renders with autoescaping
+    import re
+    from pathlib import Path
+    for script in Path("static").glob("history*.js"):
+        source = script.read_text()
+        for assignment in re.findall(r"\.(?:innerHTML|outerHTML)\s*[+]?=\s*([^;]+);", source):
+            assert assignment.strip() == "''", (script.name, assignment)
+        for inserted in re.findall(r"insertAdjacentHTML\([^,]+,\s*([^)]+)\)", source):
+            assert inserted.strip() == "page.html", (script.name, inserted)
+
+def test_replaced_page_versions_outlive_a_grace_period(tmp_path, monkeypatch):
+    import stat
+    from types import SimpleNamespace
+    from utils import artifact_store
+    from utils.artifact_store import ArtifactStore
+
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(artifact_store, "time", SimpleNamespace(time=lambda: clock.now))
+    store = ArtifactStore(tmp_path, retire_after=60)
+
+    store.write("page.html", "first")
+    first = store.open("page.html", "gzip")
+    assert stat.S_IMODE(first.path.stat().st_mode) == 0o644
+    assert stat.S_IMODE((tmp_path / "page.html.meta").stat().st_mode) == 0o644
+
+    clock.now += 10
+    store.write("page.html", "second")
+    # A response that opened the first version can still send it
+    assert first.path.exists()
+    assert store.open("page.html").path.read_text() == "second"
+
+    clock.now += 60
+    store.write("page.html", "third")
+    assert not first.path.exists()
+    assert len(list(tmp_path.glob("page.html.*.gz"))) == 2
+
+    # Back to an earlier version: its files are live, not retired
+    clock.now += 120
+    store.write("page.html", "second")
+    clock.now += 120
+    store.write("page.html", "third")
+    clock.now += 120
+    store.write("page.html", "second")
+    assert store.open("page.html", "gzip").path.exists()
+    assert store.open("page.html").path.read_text() == "second"
+    assert (tmp_path / "page.html").read_text() == "second"
+
+def test_benchmark_single_link_change_rerender(database, make_chat, monkeypatch):
+    """
+    Time to rebuild a chat's page after one link changes, with cached cards
+    vs rendering every card. The full build adds writing and precompressing
+    the page, which costs the same either way.
+    """
+    from benchmark import report, size, timed
+    from models import AsyncSessionLocal
+    from services.link_service import get_links_for_rendering
+    from utils import html_generator
+    from utils.html_generator import CardCache, generate_html, iter_bookmark_cards, link_metadata_for
+    from utils.templates import history_template
+    count = size(1000, 10_000)
+    make_chat("bench", count)
+
+    async def load():
+        async with AsyncSessionLocal() as db:
+            return await get_links_for_rendering(db, "bench")
+
+    links = asyncio.run(load())
+    metadata = link_metadata_for(links)
+
+    def render():
+        return sum(len(chunk) for chunk in history_template.generate(
+            chat_id="bench", first_name="Bench", all_tags=[], recommendations=[],
+            cards=iter_bookmark_cards(links, metadata),
+        ))
+
+    def change_one():
+        metadata[count // 2]["title"] += " (edited)"
+
+    def cold(step):
+        def run():
+            monkeypatch.setattr(html_generator, "card_cache", CardCache(count))
+            return step()
+        return run
+
+    build = lambda: asyncio.run(generate_html("bench", links, metadata, [], "Bench"))
+    figures = {}
+    for label, step in (("render", render), ("build", build)):
+        monkeypatch.setattr(html_generator, "card_cache", CardCache(count))
+        step()
+        misses = html_generator.card_cache.misses
+        _, figures[f"{label}_incremental_ms"] = timed(lambda: (change_one(), step()), repeat=3)
+        assert html_generator.card_cache.misses - misses == 3  # One card per rebuild
+        _, figures[f"{label}_full_ms"] = timed(cold(step), repeat=3)
+    figures = {key: round(value * 1000, 1) for key, value in figures.items()}
+    report(f"history page of {count} links after one change", **figures)
+    assert figures["render_incremental_ms"] * 3 < figures["render_full_ms"]
+
+def test_benchmark_compiled_streaming_templates(database, make_chat, monkeypatch):
+    """
+    Page render time and peak memory: templates compiled once and streamed
+    to disk, against compiling per render and building the page as one
+    string, which is what the f-string generator did.
+    """
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+    from benchmark import peak_memory, report, size, timed
+    from models import AsyncSessionLocal
+    from services.link_service import get_links_for_rendering
+    from utils import html_generator
+    from utils.artifact_store import history_store
+    from utils.html_generator import CardCache, generate_html, iter_bookmark_cards, link_metadata_for
+    from utils.templates import TEMPLATES_DIR, web_url
+    # No card cache: every card is rendered, as on a first build
+    monkeypatch.setattr(html_generator, "card_cache", CardCache(0))
+    sizes = (size(300, 2500), size(1200, 10_000))
+
+    def fresh_environment():
+        environment = Environment(loader=FileSystemLoader(str(TEMPLATES_DIR)),
+                                  autoescape=select_autoescape(["html"]))
+        environment.globals["static_url"] = static_url
+        environment.filters["web_url"] = web_url
+        return environment
+
+    def per_render_compile(chat_id, links, metadata):
+        environment = fresh_environment()
+        # The cards macro module is compiled per render too
+        monkeypatch.setattr(html_generator, "card_macros", environment.get_template("_card.html").module)
+        page = environment.get_template("history.html").render(
+            chat_id="bench", first_name="Bench", all_tags=[], recommendations=[],
+            cards=iter_bookmark_cards(links, metadata),
+        )
+        history_store.write_chunks(f"{chat_id}_string.html", [page])
+
+    peaks = {}
+    for count in sizes:
+        chat_id = f"bench{count}"
+        make_chat(chat_id, count)
+
+        async def load():
+            async with AsyncSessionLocal() as db:
+                return await get_links_for_rendering(db, chat_id)
+
+        links = asyncio.run(load())
+        metadata = link_metadata_for(links)
+        compiled_macros = html_generator.card_macros
+        compiled = lambda: asyncio.run(generate_html(chat_id, links, metadata, [], "Bench"))
+        uncompiled = lambda: per_render_compile(chat_id, links, metadata)
+
+        _, compiled_peak = peak_memory(compiled)
+        _, compiled_seconds = timed(compiled, repeat=3)
+        _, uncompiled_peak = peak_memory(uncompiled)
+        _, uncompiled_seconds = timed(uncompiled, repeat=3)
+        monkeypatch.setattr(html_generator, "card_macros", compiled_macros)
+        peaks[count] = (compiled_peak, uncompiled_peak)
+        report(
+            f"history page of {count} links, first build",
+            compiled_streamed_ms=round(compiled_seconds * 1000, 1),
+            per_render_string_ms=round(uncompiled_seconds * 1000, 1),
+            compiled_streamed_peak_kb=compiled_peak // 1024,
+            per_render_string_peak_kb=uncompiled_peak // 1024,
+        )
+
+    _, compile_seconds = timed(lambda: (
+        fresh_environment().get_template("history.html"), fresh_environment().get_template("_card.html").module
+    ), repeat=3)
+    report("template compile per render", compile_ms=round(compile_seconds * 1000, 1))
+
+    small, large = sizes
+    # Four times the cards: the streamed page's peak stays flat, the string's grows
+    assert peaks[large][0] < peaks[small][0] * 1.5, peaks
+    assert peaks[large][1] > peaks[small][1] * 2, peaks
@@ -0,0 +1,165 @@
+import asyncio
+import csv
+import io
+import json
+import tracemalloc
+from config import get_settings
+from models import AsyncSessionLocal
+from services import export_ndjson, import_records
+
+def _ndjson(text):
+    return [json.loads(line) for line in text.splitlines() if line]
+
+def test_ndjson_round_trip_keeps_tags_and_note_links(client, make_chat):
+    make_chat("source", 4, files=2)
+    exported = client.get("/chats/source/export").text
+    records = _ndjson(exported)
+    assert [record["type"] for record in records] == ["link"] * 4 + ["file"] * 2 + ["note"] * 6
+
+    response = client.post("/chats/copy/import", data=exported.encode())
+    assert response.json() == {
+        "imported": {"link": 4, "file": 2, "note": 6}, "error_count": 0, "errors": [],
+    }
+
+    copied = _ndjson(client.get("/chats/copy/export").text)
+    strip = lambda record: {k: v for k, v in record.items() if k not in ("id", "link_id", "file_id")}
+    assert [strip(record) for record in copied] == [strip(record) for record in records]
+    # Notes point at the copies, not the originals
+    copied_links = {record["id"]: record["link"] for record in copied if record["type"] == "link"}
+    for note in copied:
+        if note["type"] == "note" and note["link_id"] is not None:
+            assert note["link_id"] in copied_links
+
+def test_csv_round_trip(client, make_chat):
+    make_chat("source", 3)
+    exported = client.get("/chats/source/export", params={"format": "csv", "kind": "link"}).text
+    rows = list(csv.DictReader(io.StringIO(exported)))
+    assert [row["tags"] for row in rows] == ["reading|topic0", "reading|topic1", "reading|topic2"]
+
+    response = client.post("/chats/copy/import", params={"format": "csv", "kind": "link"}, data=exported.encode())
+    assert response.json()["imported"]["link"] == 3
+    copied = list(csv.DictReader(io.StringIO(
+        client.get("/chats/copy/export", params={"format": "csv", "kind": "link"}).text
+    )))
+    assert [(row["link"], row["tags"]) for row in copied] == [(row["link"], row["tags"]) for row in rows]
+
+def test_import_reports_bad_records_and_keeps_the_rest(client):
+    body = "\n".join([
+        json.dumps({"type": "link", "link": "https://example.com/1"}),
+        "{not json",
+        json.dumps({"type": "link"}),
+        json.dumps({"type": "video", "link": "x"}),
+        json.dumps({"type": "link", "link": "https://example.com/2", "created_at": "yesterday"}),
+        json.dumps(["not", "an", "object"]),
+        json.dumps({"type": "link", "link": "https://example.com/3", "tags": ["ok"]}),
+    ])
+    result = client.post("/chats/1/import", data=body.encode()).json()
+    assert result["imported"]["link"] == 2
+    assert [error["record"] for error in result["errors"]] == [2, 3, 4, 5, 6]
+    assert result["error_count"] == 5
+
+def _synthetic_ndjson(count: int, chunk_records: int = 200):
+    """A request body of `count` link records, streamed in chunks."""
+    async def stream():
+        for start in range(0, count, chunk_records):
+            yield "".join(
+                json.dumps({
+                    "type": "link",
+                    "link": f"https://example.com/{index}",
+                    "title": f"Link number {index} " + "x" * 100,
+                    "tags": ["imported", f"group{index % 20}"],
+                }) + "\n"
+                for index in range(start, min(count, start + chunk_records))
+            ).encode()
+    return stream()
+
+def _peak_memory(coroutine_factory):
+    tracemalloc.start()
+    try:
+        result = asyncio.run(coroutine_factory())
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def test_import_and_export_memory_does_not_grow_with_the_chat(database, monkeypatch):
+    monkeypatch.setattr(get_settings(), "BULK_INSERT_CHUNK_SIZE", 250)
+    monkeypatch.setattr(get_settings(), "EXPORT_BATCH_SIZE", 250)
+
+    async def import_chat(chat_id, count):
+        async with AsyncSessionLocal() as db:
+            return await import_records(db, chat_id, _synthetic_ndjson(count))
+
+    async def export_chat(chat_id):
+        lines = 0
+        async for chunk in export_ndjson(chat_id, ["link"]):
+            lines += chunk.count("\n")
+        return lines
+
+    peaks = {}
+    for count in (1000, 4000):
+        result, import_peak = _peak_memory(lambda: import_chat(str(count), count))
+        assert result["imported"]["link"] == count
+        lines, export_peak = _peak_memory(lambda: export_chat(str(count)))
+        assert lines == count
+        peaks[count] = (import_peak, export_peak)
+
+    # Four times the records, about the same peak: only a chunk is held at once
+    for small, large in zip(peaks[1000], peaks[4000]):
+        assert large < small * 1.5, peaks
+
+def test_import_rejects_bad_tags_and_undecodable_lines(client):
+    body = b"\n".join([
+        json.dumps({"type": "link", "link": "https://example.com/1", "tags": "news"}).encode(),
+        json.dumps({"type": "link", "link": "https://example.com/2", "tags": ["ok", 3]}).encode(),
+        json.dumps({"type": "link", "link": "https://example.com/3", "tags": [["nested"]]}).encode(),
+        b'{"type": "link", "link": "https://example.com/\xff\xfe"}',
+        json.dumps({"type": "link", "link": "https://example.com/5", "tags": ["ok"]}).encode(),
+    ])
+    result = client.post("/chats/1/import", data=body).json()
+    assert result["imported"]["link"] == 1
+    assert [(error["record"], error["error"]) for error in result["errors"]] == [
+        (1, "tags must be a list of non-empty strings"),
+        (2, "tags must be a list of non-empty strings"),
+        (3, "tags must be a list of non-empty strings"),
+        (4, "Could not parse record: not valid UTF-8"),
+    ]
+
+    csv_body = "link,title,tags\nhttps://example.com/a,A,x|y\n".encode() + b"https://example.com/b,\xff,z\n" + b"https://example.com/c,C,\n"
+    result = client.post("/chats/2/import", params={"format": "csv", "kind": "link"}, data=csv_body).json()
+    assert result["imported"]["link"] == 2
+    assert result["errors"] == [{"record": 2, "error": "Could not parse record: not valid UTF-8"}]
+
+def test_import_type_checks_every_field(client):
+    body = "\n".join(json.dumps(record) for record in [
+        {"type": "link", "link": "https://example.com/1", "title": "Fine"},
+        {"type": "link", "link": "https://example.com/2", "title": {"nested": "object"}},
+        {"type": "link", "link": "https://example.com/3", "price": 9.99},
+        {"type": "link", "link": ["https://example.com/4"]},
+        {"type": "link", "link": "https://example.com/5", "images": "https://example.com/5.jpg"},
+        {"type": "link", "id": "7", "link": "https://example.com/6"},
+        {"type": "note", "note_content": "Note", "link_id": True},
+        {"type": "link", "link": "https://example.com/8", "url": None},
+    ])
+    result = client.post("/chats/1/import", data=body.encode()).json()
+    assert result["imported"]["link"] == 2
+    assert [(error["record"], error["error"]) for error in result["errors"]] == [
+        (2, "title must be a string"),
+        (3, "price must be a string"),
+        (4, "link must be a string"),
+        (5, "images must be a list of strings"),
+        (6, "id must be an integer"),
+        (7, "link_id must be an integer"),
+    ]
+
+def test_save_failures_do_not_leak_database_errors(client, monkeypatch):
+    from services import bulk_service, import_service
+
+    async def broken(db, model, rows):
+        raise RuntimeError("INSERT INTO user_links (chat_id, link) VALUES (?, ?) ['1', 'secret']")
+
+    monkeypatch.setattr(import_service, "insert_rows", broken)
+    monkeypatch.setattr(bulk_service, "insert_rows", broken)
+    result = client.post("/chats/1/import", data=json.dumps({"type": "link", "link": "https://example.com/"}).encode()).json()
+    assert result["errors"] == [{"record": 1, "error": "Could not save record"}]
+    body = client.post("/links/bulk", json=[{"chat_id": "1", "link": "https://example.com/", "tags": [], "metadata": {}}]).json()
+    assert body["errors"] == [{"index": 0, "error": "Could not save link"}]
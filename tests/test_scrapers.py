@@ -0,0 +1,293 @@
+import asyncio
+import time
+import httpx
+from bs4 import BeautifulSoup
+from fakes import opengraph_page
+from config import get_settings
+from utils.scrapers import analyzer, batch, normalize_url, parse_message, extract_links_and_tags
+from utils.scrapers.opengraph import (
+    download_stats,
+    extract_head_meta,
+    extract_opengraph_from_html,
+    extract_opengraph_tags,
+    fetch_opengraph_metadata,
+)
+
+def test_concurrent_enrichments_overlap(fake_soax):
+    fake_soax.latency = 0.2
+    links = [f"https://example.com/article/{index}" for index in range(10)]
+
+    async def enrich_all():
+        started = time.monotonic()
+        results = await asyncio.gather(*(analyzer.analyze_link(link) for link in links))
+        return results, time.monotonic() - started
+
+    results, elapsed = asyncio.run(enrich_all())
+    assert [result.title for result in results] == [f"Title of {link}" for link in links]
+    # One after another would take 2s
+    assert elapsed < 0.6
+    assert fake_soax.max_in_flight["unblocker"] == 10
+
+def test_concurrent_identical_enrichments_hit_upstream_once(fake_soax):
+    fake_soax.latency = 0.1
+    link = "https://www.amazon.com/dp/B000000001"
+
+    async def enrich_100():
+        return await asyncio.gather(*(analyzer.analyze_link(link) for _ in range(100)))
+
+    results = asyncio.run(enrich_100())
+    assert fake_soax.hits[link] == 1
+    assert {result.title for result in results} == {f"Product {link}"}
+    assert analyzer.enrichment_flight.stats() == {
+        "calls": 100, "executions": 1, "coalesced": 99, "in_flight": 0,
+    }
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def test_batch_keeps_both_upstreams_busy_under_load(fake_soax, monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "ENRICH_MAX_CONCURRENCY", 6)
+    monkeypatch.setattr(settings, "SOAX_PRODUCT_CONCURRENCY", 2)
+    monkeypatch.setattr(settings, "SOAX_UNBLOCKER_CONCURRENCY", 6)
+    monkeypatch.setattr(batch, "_global_semaphore", None)
+    monkeypatch.setattr(batch, "_upstream_semaphores", {})
+    fake_soax.latency = 0.05
+    # Products queue up first; they must not hold every global slot while
+    # waiting on their own endpoint
+    links = [f"https://www.amazon.com/dp/B{index:09d}" for index in range(20)]
+    links += [f"https://example.com/page/{index}" for index in range(20)]
+
+    async def run():
+        started = time.monotonic()
+        finished = {}
+        async for index, link, result in batch.analyze_links(links):
+            finished[link] = time.monotonic() - started
+        return finished, time.monotonic() - started
+
+    finished, elapsed = asyncio.run(run())
+    assert len(finished) == 40
+    pages = [finished[link] for link in links[20:]]
+    products = [finished[link] for link in links[:20]]
+    # Products are bound by their own cap: 20 / 2 * 50ms
+    assert elapsed < 1.0
+    assert 40 / elapsed > 40  # links per second
+    assert fake_soax.max_in_flight["product"] == 2
+    # Pages are served alongside the products, not after them
+    assert _percentile(pages, 0.5) < 0.3
+    assert _percentile(pages, 0.95) < 0.45
+    assert _percentile(products, 0.95) < 0.9
+
+def test_enrichment_cache_serves_equivalent_urls(fake_soax):
+    async def enrich(*links):
+        return [await analyzer.analyze_link(link) for link in links]
+
+    asyncio.run(enrich(
+        "https://Example.com/post/?utm_source=telegram&b=2&a=1#comments",
+        "https://example.com:443/post?a=1&b=2&fbclid=abc",
+        "https://smile.amazon.com/Some-Product/dp/b000000002/ref=sr_1_1?keywords=x",
+        "https://www.amazon.com/gp/product/B000000002",
+    ))
+    assert sum(fake_soax.hits.values()) == 2
+    stats = analyzer.enrichment_cache.stats()
+    assert (stats["memory_hits"], stats["stores"]) == (2, 2)
+
+def test_enrichment_cache_survives_restart_and_expires_by_source(fake_soax, tmp_path):
+    from utils.scrapers.cache import EnrichmentCache
+    from utils.scrapers.urls import SOAX_PRODUCT, SOAX_UNBLOCKER
+    path = tmp_path / "restart.sqlite3"
+
+    async def fill():
+        cache = EnrichmentCache(10, path, {SOAX_PRODUCT: 3600, SOAX_UNBLOCKER: 86400})
+        await cache.set("https://a.example/", SOAX_UNBLOCKER, await analyzer.analyze_link("https://a.example/"))
+
+    async def read(ttls):
+        cache = EnrichmentCache(10, path, ttls)
+        return await cache.get("https://a.example/"), cache.stats()
+
+    asyncio.run(fill())
+    cached, stats = asyncio.run(read({SOAX_PRODUCT: 3600, SOAX_UNBLOCKER: 86400}))
+    assert cached.title == "Title of https://a.example/"
+    assert stats["disk_hits"] == 1
+    cached, stats = asyncio.run(read({SOAX_PRODUCT: 3600, SOAX_UNBLOCKER: -1}))
+    assert cached is None
+    assert stats["disk_pruned"] == 1
+
+def test_enrichment_cache_disk_tier_is_capped(tmp_path):
+    import sqlite3
+    from utils.scrapers.cache import EnrichmentCache
+    from utils.scrapers.models import ProductData
+    from utils.scrapers.urls import SOAX_PRODUCT, SOAX_UNBLOCKER
+    path = tmp_path / "capped.sqlite3"
+
+    async def fill():
+        cache = EnrichmentCache(100, path, {SOAX_PRODUCT: 3600, SOAX_UNBLOCKER: 86400},
+                                disk_max_entries=5, prune_interval=0)
+        for index in range(12):
+            await cache.set(f"https://example.com/{index}", SOAX_UNBLOCKER, ProductData(title=str(index), images=[], url=f"https://example.com/{index}"))
+        return cache.stats()
+
+    stats = asyncio.run(fill())
+    with sqlite3.connect(str(path)) as db:
+        keys = sorted(int(key.rsplit("/", 1)[1]) for (key,) in db.execute("SELECT key FROM enrichment_cache"))
+    assert keys == [7, 8, 9, 10, 11]
+    assert stats["disk_pruned"] == 7
+
+    # Expired rows go when the cache is opened, per source TTL
+    async def reopen():
+        cache = EnrichmentCache(100, path, {SOAX_PRODUCT: 3600, SOAX_UNBLOCKER: -1})
+        await cache.get("https://example.com/11")
+        return cache.stats()
+    assert asyncio.run(reopen())["disk_pruned"] == 5
+
+def test_failed_fetches_are_not_cached(fake_soax, monkeypatch):
+    async def unavailable(request):
+        return httpx.Response(503)
+
+    from utils.scrapers import http_client
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(unavailable)))
+    result = asyncio.run(analyzer.analyze_link("https://down.example/"))
+    assert analyzer.is_fallback_result(result)
+    assert analyzer.enrichment_cache.stats()["stores"] == 0
+
+def test_normalize_url():
+    assert normalize_url("HTTP://Example.COM:80/a/b/?utm_medium=x&z=1&a=2") == "http://example.com/a/b?a=2&z=1"
+    assert normalize_url("https://www.amazon.co.uk/gp/aw/d/b07xyz1234?psc=1") == "https://www.amazon.co.uk/dp/B07XYZ1234"
+    assert normalize_url("https://example.com:8443") == "https://example.com:8443/"
+    # Unparseable ports and hosts are kept as they are
+    assert normalize_url(" https://example.com:99999/a ") == "https://example.com:99999/a"
+    assert normalize_url("https://example.com:port/a") == "https://example.com:port/a"
+    assert normalize_url("http://[::1/a") == "http://[::1/a"
+
+HEAD_PAGES = [
+    opengraph_page("https://example.com/a"),
+    # Twitter-only tags, name= instead of property=, and a first-wins duplicate
+    "<html><head><title>t</title>"
+    '<meta name="twitter:title" content="Twitter title">'
+    '<meta name="twitter:image" content="https://example.com/t.jpg">'
+    '<meta property="og:description" content="First">'
+    '<meta property="og:description" content="Second">'
+    "</head><body><p>body</p></body></html>",
+    # Unclosed head; the parser stops at <body>
+    '<html><head><meta property="og:title" content="No head end &amp; more"><body>text</body></html>',
+]
+
+def test_head_parser_matches_beautifulsoup():
+    for page in HEAD_PAGES:
+        fast = extract_opengraph_from_html(page, "https://example.com/")
+        full = extract_opengraph_tags(BeautifulSoup(page, "html.parser"), "https://example.com/")
+        assert fast == full
+
+def test_head_parser_falls_back_without_opengraph_tags():
+    page = '<html><head><title>Plain</title></head><body><meta property="og:title" content="In body"></body></html>'
+    assert extract_head_meta(page) is None
+    assert extract_opengraph_from_html(page, "https://example.com/").title == "In body"
+
+def test_page_download_stops_at_head_end(monkeypatch):
+    chunks_sent = []
+
+    async def body():
+        yield opengraph_page("https://big.example/")[:-len("</body></html>")].encode()
+        for _ in range(100):
+            chunks_sent.append(1)
+            yield b"y" * 65536
+
+    async def handler(request):
+        return httpx.Response(200, headers={"content-length": str(100 * 65536)}, content=body())
+
+    from utils.scrapers import http_client
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    before = dict(download_stats)
+    result = asyncio.run(fetch_opengraph_metadata("https://big.example/"))
+    assert result.title == "Title of https://big.example/"
+    assert len(chunks_sent) <= 1
+    assert download_stats["stopped_early"] == before["stopped_early"] + 1
+    assert download_stats["bytes_saved"] > before["bytes_saved"]
+
+def test_bytes_saved_counts_compressed_bytes(monkeypatch):
+    import gzip
+    # Compresses ~100x: decoded bytes read would exceed Content-Length
+    page = opengraph_page("https://gz.example/", padding=2_000_000).encode()
+    compressed = gzip.compress(page)
+    head_end = page.index(b"</head>")
+
+    async def body():
+        for start in range(0, len(compressed), 1024):
+            yield compressed[start:start + 1024]
+
+    async def handler(request):
+        return httpx.Response(200, headers={
+            "content-encoding": "gzip", "content-length": str(len(compressed)),
+        }, content=body())
+
+    from utils.scrapers import http_client
+    monkeypatch.setattr(http_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    before = dict(download_stats)
+    result = asyncio.run(fetch_opengraph_metadata("https://gz.example/"))
+    assert result.title == "Title of https://gz.example/"
+    downloaded = download_stats["bytes_downloaded"] - before["bytes_downloaded"]
+    assert download_stats["bytes_read"] - before["bytes_read"] > head_end
+    assert 0 < downloaded < len(compressed)
+    assert download_stats["bytes_saved"] - before["bytes_saved"] == len(compressed) - downloaded
+
+def test_message_parser_finds_every_link_and_tag():
+    text = (
+        "Read https://example.com/a?b=1#frag, then (see www.example.org/x). "
+        "Also https://en.wikipedia.org/wiki/Python_(language) #python #to-read #python"
+    )
+    links, tags = extract_links_and_tags(text)
+    assert links == [
+        "https://example.com/a?b=1#frag",
+        "https://www.example.org/x",
+        "https://en.wikipedia.org/wiki/Python_(language)",
+    ]
+    assert tags == ["python", "to-read"]
+
+def test_parse_message_reads_captions():
+    update = {"message": {"chat": {"id": 42}, "caption": "https://example.com #photo"}}
+    message = parse_message(update)
+    assert (message.chat_id, message.text, message.first_name) == ("42", "https://example.com #photo", "User")
+
+def _saved_page(kind: str, body_bytes: int) -> str:
+    """A page shaped like the ones the unblocker returns: a busy head, then a long body."""
+    head = "".join(
+        f'<meta name="viewport-{index}" content="value {index}"><link rel="preload" href="/asset{index}.js">'
+        for index in range(40)
+    )
+    if kind == "product":
+        # Shops inline large state blobs before their meta tags
+        state = '"k": 1, ' * 20000
+        head = f"<script>window.__STATE__ = {{{state}}}</script>" + head
+    head += (
+        f'<meta property="og:title" content="A {kind} page">'
+        f'<meta property="og:description" content="About the {kind}">'
+        '<meta property="og:image" content="https://example.com/cover.jpg">'
+        '<meta name="twitter:site" content="@example">'
+    )
+    card = '<div class="card"><a href="/item"><img src="/i.jpg" alt="x"><p>Item text &amp; more</p></a></div>'
+    return f"<!doctype html><html><head>{head}</head><body>{card * (body_bytes // len(card))}</body></html>"
+
+def test_benchmark_head_only_parse_against_full_document():
+    """Parse time and peak memory of the head-only extractor vs BeautifulSoup."""
+    from benchmark import peak_memory, report, size, timed
+    body_bytes = size(100_000, 3_000_000)
+    corpus = {kind: _saved_page(kind, body_bytes) for kind in ("article", "product")}
+
+    for kind, html in corpus.items():
+        link = f"https://example.com/{kind}"
+        fast = lambda: extract_opengraph_from_html(html, link)
+        full = lambda: extract_opengraph_tags(BeautifulSoup(html, "html.parser"), link)
+        assert fast() == full()
+
+        _, fast_seconds = timed(fast, repeat=3)
+        _, full_seconds = timed(full)
+        _, fast_peak = peak_memory(fast)
+        _, full_peak = peak_memory(full)
+        report(
+            f"opengraph parse, {kind} page of {len(html) // 1000} kB",
+            head_only_ms=round(fast_seconds * 1000, 1), full_ms=round(full_seconds * 1000, 1),
+            head_only_peak_kb=fast_peak // 1024, full_peak_kb=full_peak // 1024,
+        )
+        assert fast_seconds * 5 < full_seconds
+        assert fast_peak * 5 < full_peak
@@ -0,0 +1,114 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from models import UserLink, ensure_search_index
+from models.search import SEARCH_SOURCES, _postgres_ddl
+
+def _search(client, chat_id, q, **params):
+    response = client.get("/search", params={"chat_id": chat_id, "q": q, **params})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_search_ranks_matches_within_the_chat(client, make_chat):
+    make_chat("searched", 5, files=2)
+    make_chat("elsewhere", 5)
+    body = _search(client, "searched", "topic 3")
+    assert body["results"][0]["title"] == "Saved article 3"
+    assert {result["kind"] for result in _search(client, "searched", "article")["results"]} == {"link", "note", "file"}
+    assert {result["kind"] for result in _search(client, "searched", "article", kind="note")["results"]} == {"note"}
+    assert _search(client, "nobody", "article")["results"] == []
+    assert client.get("/search", params={"chat_id": "searched", "q": "x", "kind": "video"}).status_code == 400
+
+def test_search_treats_input_literally(client, make_chat):
+    make_chat("literal", 2)
+    for query in ('"unbalanced', "article OR", "NEAR(", "*", "-"):
+        _search(client, "literal", query)
+
+def test_search_follows_edits(client, database, make_chat):
+    make_chat("edited", 2)
+    with Session(database) as db:
+        link = db.query(UserLink).filter_by(chat_id="edited").first()
+        link.title = "Quantum gardening"
+        db.commit()
+    [result] = _search(client, "edited", "gardening")["results"]
+    assert result["title"] == "Quantum gardening"
+    assert _search(client, "edited", "gardening", kind="note")["results"] == []
+
+def test_search_pages_with_next_offset(client, make_chat):
+    make_chat("paged", 12)
+    seen, offset = [], 0
+    while offset is not None:
+        body = _search(client, "paged", "article", kind="link", limit=5, offset=offset)
+        seen.extend(result["id"] for result in body["results"])
+        offset = body["next_offset"]
+    assert len(seen) == 12 == len(set(seen))
+
+def test_migration_indexes_existing_rows(client, database, make_chat):
+    # A database from before search existed
+    with database.begin() as conn:
+        for name, kind in conn.execute(text(
+            "SELECT name, type FROM sqlite_master WHERE name LIKE '%_fts%' AND type IN ('table', 'trigger')"
+        )).all():
+            if kind == "trigger" or name.endswith("_fts"):
+                conn.execute(text(f"DROP {kind.upper()} IF EXISTS {name}"))
+    make_chat("migrated", 3)
+
+    for _ in range(2):
+        with database.begin() as conn:
+            ensure_search_index(conn)
+    [result] = _search(client, "migrated", "topic 2", kind="link")["results"]
+    assert result["title"] == "Saved article 2"
+
+def test_postgres_migration_follows_the_text_search_config(monkeypatch):
+    from config import get_settings
+    monkeypatch.setattr(get_settings(), "SEARCH_TEXT_CONFIG", "english")
+    source = SEARCH_SOURCES["note"]
+    current = "(setweight(to_tsvector('english'::regconfig, COALESCE(note_title, ''::text)), 'A'::\"char\"))"
+
+    assert [statement.split()[0] for statement in _postgres_ddl(source, current)] == ["CREATE"]
+    assert [statement.split()[0] for statement in _postgres_ddl(source, None)] == ["ALTER", "CREATE"]
+
+    monkeypatch.setattr(get_settings(), "SEARCH_TEXT_CONFIG", "simple")
+    drop, add, index = _postgres_ddl(source, current)
+    assert drop == "ALTER TABLE user_notes DROP COLUMN search_vector"
+    assert "ADD COLUMN search_vector" in add and "'simple'::regconfig" in add
+    assert index.startswith("CREATE INDEX IF NOT EXISTS ix_user_notes_search")
+
+def test_benchmark_search_latency(database):
+    """GET /search latency percentiles over a links table of 1M rows (BENCHMARK_FULL=1)."""
+    import asyncio
+    import random
+    import time
+    from benchmark import percentiles, report, size
+    from models import AsyncSessionLocal
+    from services.search_service import search
+    rows, chats = size(20_000, 1_000_000), 100
+    # Common words show up in most rows, rare ones in a few per chat
+    common = ["article", "guide", "review", "news", "update"]
+    rare = [f"term{index}" for index in range(2000)]
+    rng = random.Random(16)
+
+    def row(index):
+        words = rng.sample(common, 2) + rng.sample(rare, 3)
+        return {
+            "chat_id": str(index % chats), "link": f"https://example.com/{index}",
+            "title": " ".join(words[:3]).title(), "description": " ".join(words * 4),
+            "site_name": "Example",
+        }
+
+    with database.begin() as conn:
+        for start in range(0, rows, 10_000):
+            conn.execute(UserLink.__table__.insert(), [row(index) for index in range(start, min(rows, start + 10_000))])
+
+    async def measure(query, repeat=20):
+        samples = []
+        async with AsyncSessionLocal() as db:
+            for attempt in range(repeat):
+                started = time.perf_counter()
+                results, _ = await search(db, str(attempt % chats), query, ["link"])
+                samples.append(time.perf_counter() - started)
+        return results, percentiles(samples)
+
+    for label, query in (("rare word", "term42"), ("common word", "article"), ("two words", "guide term7")):
+        _, latency = asyncio.run(measure(query))
+        report(f"search over {rows} links, {label}", **latency)
+        assert latency["p95_ms"] < 2000
@@ -0,0 +1,81 @@
+"""
+N+1 guard: the statements an endpoint runs must not grow with the number
+of rows it returns. Each endpoint is measured on a small and a large chat
+and the two counts have to match.
+"""
+import asyncio
+import pytest
+from services import regenerate_html, tag_cache
+
+SMALL = 3
+LARGE = 30
+
+READ_ENDPOINTS = {
+    "list links": lambda client, chat_id: client.get("/links", params={"chat_id": chat_id}),
+    "list links by tag": lambda client, chat_id: client.get(
+        "/links", params={"chat_id": chat_id, "tag": "reading"}
+    ),
+    "cards page": lambda client, chat_id: client.get(
+        f"/chats/{chat_id}/cards", params={"limit": 100}
+    ),
+    "chat tags": lambda client, chat_id: client.get(f"/chats/{chat_id}/tags"),
+    "export ndjson": lambda client, chat_id: client.get(f"/chats/{chat_id}/export"),
+    "export links csv": lambda client, chat_id: client.get(
+        f"/chats/{chat_id}/export", params={"format": "csv", "kind": "link"}
+    ),
+    "export notes csv": lambda client, chat_id: client.get(
+        f"/chats/{chat_id}/export", params={"format": "csv", "kind": "note"}
+    ),
+    "search": lambda client, chat_id: client.get(
+        "/search", params={"chat_id": chat_id, "q": "article"}
+    ),
+}
+
+def _describe(counted) -> str:
+    return "\n".join(statement.splitlines()[0] for statement in counted.statements)
+
+@pytest.mark.parametrize("endpoint", READ_ENDPOINTS)
+def test_read_endpoint_statements_do_not_grow_with_rows(
+    endpoint, client, make_chat, count_statements
+):
+    make_chat("small", SMALL, files=SMALL)
+    make_chat("large", LARGE, files=LARGE)
+    request = READ_ENDPOINTS[endpoint]
+
+    counts = {}
+    for chat_id in ("small", "large"):
+        tag_cache.clear()
+        with count_statements() as counted:
+            response = request(client, chat_id)
+        assert response.status_code == 200, response.text
+        counts[chat_id] = counted
+    assert counts["large"].count == counts["small"].count, (
+        f"{endpoint} ran {counts['small'].count} statements for {SMALL} rows and "
+        f"{counts['large'].count} for {LARGE}:\n{_describe(counts['large'])}"
+    )
+
+def test_history_page_render_statements_do_not_grow_with_rows(make_chat, count_statements):
+    make_chat("small", SMALL)
+    make_chat("large", LARGE)
+
+    counts = {}
+    for chat_id in ("small", "large"):
+        with count_statements() as counted:
+            asyncio.run(regenerate_html(chat_id))
+        counts[chat_id] = counted
+    assert counts["large"].count == counts["small"].count, _describe(counts["large"])
+
+def test_create_link_statements_do_not_grow_with_tags(client, count_statements):
+    counts = {}
+    for tag_count in (1, 20):
+        tag_cache.clear()
+        with count_statements() as counted:
+            response = client.post("/links/", json={
+                "chat_id": "1",
+                "link": f"https://example.com/{tag_count}",
+                "tags": [f"tag{index}" for index in range(tag_count)],
+                "metadata": {"title": "Example"},
+            })
+        assert response.status_code == 200, response.text
+        counts[tag_count] = counted
+    assert counts[20].count == counts[1].count, _describe(counts[20])
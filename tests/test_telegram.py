@@ -0,0 +1,103 @@
+import asyncio
+import time
+import pytest
+from fakes import FakeBotApi
+from utils.telegram import TelegramAPIError, TelegramClient
+
+def _client(bot: FakeBotApi, **overrides) -> TelegramClient:
+    options = dict(
+        global_rate=1000, chat_interval=0.1, group_interval=0.3,
+        max_concurrency=10, max_retries=2, timeout=5, http2=False,
+    )
+    options.update(overrides)
+    return TelegramClient(transport=bot.transport(), **options)
+
+def _run(client: TelegramClient, calls):
+    async def send():
+        try:
+            return await asyncio.gather(*(client.call(method, payload) for method, payload in calls),
+                                        return_exceptions=True)
+        finally:
+            await client.stop()
+    return asyncio.run(send())
+
+def _gaps(times):
+    return [later - earlier for earlier, later in zip(times, times[1:])]
+
+def test_messages_to_one_chat_are_spaced_and_in_order():
+    bot = FakeBotApi()
+    client = _client(bot)
+    _run(client, [("sendMessage", {"chat_id": 1, "text": str(index)}) for index in range(4)]
+         + [("sendMessage", {"chat_id": -5, "text": str(index)}) for index in range(3)])
+
+    assert [payload["text"] for _, _, payload in bot.calls if payload["chat_id"] == 1] == ["0", "1", "2", "3"]
+    assert min(_gaps(bot.times_for(1))) >= 0.09
+    assert min(_gaps(bot.times_for(-5))) >= 0.29
+    # Different chats don't wait for each other
+    assert abs(bot.times_for(1)[0] - bot.times_for(-5)[0]) < 0.05
+    assert client.stats()["sent"] == 7
+
+def test_global_rate_caps_all_chats():
+    bot = FakeBotApi()
+    client = _client(bot, global_rate=20)
+    started = time.monotonic()
+    _run(client, [("sendMessage", {"chat_id": index, "text": "hi"}) for index in range(10)])
+    # 10 sends at 20/s need at least 9 gaps of 50ms
+    assert time.monotonic() - started >= 0.44
+    assert min(_gaps(sorted(at for at, _, _ in bot.calls))) >= 0.045
+
+def test_429_waits_for_retry_after_then_retries():
+    bot = FakeBotApi()
+    bot.responses["1"] = [(429, {"ok": False, "description": "Too Many Requests",
+                                 "parameters": {"retry_after": 0.3}})]
+    client = _client(bot)
+    results = _run(client, [("sendMessage", {"chat_id": 1, "text": "a"}),
+                            ("sendMessage", {"chat_id": 1, "text": "b"})])
+
+    assert all(isinstance(result, dict) for result in results)
+    times = bot.times_for(1)
+    assert [payload["text"] for _, _, payload in bot.calls] == ["a", "a", "b"]
+    assert times[1] - times[0] >= 0.29
+    assert (client.stats()["rate_limited"], client.stats()["retries"]) == (1, 1)
+
+def test_rejected_requests_raise_without_retrying():
+    bot = FakeBotApi()
+    bot.responses["1"] = [(400, {"ok": False, "description": "Bad Request: chat not found"})]
+    client = _client(bot)
+    [result] = _run(client, [("sendMessage", {"chat_id": 1, "text": "a"})])
+
+    assert isinstance(result, TelegramAPIError)
+    assert (result.status_code, result.description) == (400, "Bad Request: chat not found")
+    assert len(bot.calls) == 1
+
+def test_server_errors_retry_up_to_the_limit():
+    bot = FakeBotApi()
+    bot.responses["1"] = [(502, {"ok": False, "description": "Bad Gateway"})] * 5
+    client = _client(bot, max_retries=1)
+    with pytest.raises(TelegramAPIError):
+        asyncio.run(_first(client, ("sendMessage", {"chat_id": 1, "text": "a"})))
+    assert len(bot.calls) == 2
+
+async def _first(client, call):
+    try:
+        return await client.call(*call)
+    finally:
+        await client.stop()
+
+def test_send_message_logs_refusals_instead_of_raising(monkeypatch):
+    from utils import telegram
+    bot = FakeBotApi()
+    bot.responses["1"] = [(403, {"ok": False, "description": "Forbidden: bot was blocked by the user"})]
+    client = _client(bot)
+    monkeypatch.setattr(telegram, "telegram_client", client)
+
+    async def send():
+        try:
+            return (await telegram.send_message(1, "a"),
+                    await telegram.send_message_with_buttons(2, "b", {"inline_keyboard": []}))
+        finally:
+            await client.stop()
+
+    refused, sent = asyncio.run(send())
+    assert refused is None and sent is not None
+    assert client.stats()["failed"] == 1
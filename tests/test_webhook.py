@@ -0,0 +1,167 @@
+import asyncio
+import random
+import time
+import pytest
+from sqlalchemy import select
+from fakes import FakeBotApi
+from models import EnrichmentJob, UserLink
+from services import update_worker, webhook_service
+from services.regeneration import RegenerationScheduler
+from services.update_worker import UpdateQueue
+from utils.telegram import TelegramClient
+
+SECRET = {"X-Telegram-Bot-Api-Secret-Token": "test-secret"}
+
+def _update(update_id, text, chat_id=42):
+    return {"update_id": update_id, "message": {"chat": {"id": chat_id, "first_name": "Ann"}, "text": text}}
+
+@pytest.fixture
+def bot(monkeypatch):
+    """Replies go to a FakeBotApi; page rebuilds are only scheduled."""
+    fake = FakeBotApi()
+    monkeypatch.setattr(webhook_service, "telegram_client", TelegramClient(
+        global_rate=1000, chat_interval=0, group_interval=0,
+        max_concurrency=4, max_retries=0, timeout=5, http2=False, transport=fake.transport(),
+    ))
+    monkeypatch.setattr(webhook_service, "regeneration_scheduler", RegenerationScheduler(3600))
+    return fake
+
+def test_webhook_requires_the_secret(client):
+    assert client.post("/webhook", json=_update(1, "x")).status_code == 403
+    assert client.post("/webhook", json=_update(1, "x"), headers={
+        "X-Telegram-Bot-Api-Secret-Token": "wrong"
+    }).status_code == 403
+    assert client.post("/webhook", data=b"[", headers=SECRET).status_code == 400
+
+def test_update_saves_links_and_replies(database, bot):
+    async def process():
+        try:
+            return await webhook_service.process_update(
+                _update(1, "https://example.com/a and https://example.com/b #news")
+            )
+        finally:
+            await asyncio.sleep(0.05)
+            await webhook_service.telegram_client.stop()
+            await webhook_service.regeneration_scheduler.stop()
+
+    assert asyncio.run(process()) == 2
+    with database.connect() as conn:
+        assert sorted(conn.execute(select(UserLink.link).where(UserLink.chat_id == "42")).scalars()) == [
+            "https://example.com/a", "https://example.com/b",
+        ]
+        assert conn.execute(select(EnrichmentJob.status)).scalars().all() == ["queued", "queued"]
+    [(_, method, payload)] = bot.calls
+    assert method == "sendMessage" and payload["text"].startswith("Saved 2 links.")
+
+def test_pages_rebuilt_for_bot_messages_use_the_senders_name(client, bot):
+    async def process():
+        try:
+            await webhook_service.process_update(_update(1, "https://example.com/a"))
+            # A later rebuild, as the page's own edits trigger
+            await webhook_service.regeneration_scheduler.flush(42)
+        finally:
+            await webhook_service.telegram_client.stop()
+            await webhook_service.regeneration_scheduler.stop()
+
+    asyncio.run(process())
+    assert "<title>Ann's Bookmarks</title>" in client.get("/history/42").text
+
+def test_edited_messages_do_not_save_links_again(database, bot):
+    async def process():
+        try:
+            first = await webhook_service.process_update(_update(1, "https://example.com/a #news"))
+            edited = await webhook_service.process_update({"update_id": 2, "edited_message": {
+                "chat": {"id": 42}, "text": "https://example.com/a #news #later",
+            }})
+            return first, edited
+        finally:
+            await asyncio.sleep(0.05)
+            await webhook_service.telegram_client.stop()
+            await webhook_service.regeneration_scheduler.stop()
+
+    assert asyncio.run(process()) == (1, 0)
+    with database.connect() as conn:
+        assert conn.execute(select(UserLink.link)).scalars().all() == ["https://example.com/a"]
+    assert len(bot.calls) == 1
+
+def test_queue_drops_redelivered_updates(monkeypatch):
+    processed = []
+
+    async def record(update):
+        processed.append(update["update_id"])
+        return 1
+
+    monkeypatch.setattr(update_worker, "process_update", record)
+
+    async def deliver():
+        queue = UpdateQueue(workers=2, max_size=10, dedupe_window=100)
+        await queue.start()
+        results = [queue.submit(_update(update_id, "x")) for update_id in (1, 2, 1, 3, 2)]
+        await queue.stop()
+        return results, queue.stats()
+
+    results, stats = asyncio.run(deliver())
+    assert results == [True, True, False, True, False]
+    assert sorted(processed) == [1, 2, 3]
+    assert (stats["accepted"], stats["duplicates"], stats["links_saved"]) == (3, 2, 3)
+
+def test_failed_updates_are_retried_with_backoff(monkeypatch):
+    attempts = []
+
+    async def flaky(update):
+        attempts.append((update["update_id"], time.monotonic()))
+        failures = {2: 2, 3: 10}.get(update["update_id"], 0)
+        if sum(1 for update_id, _ in attempts if update_id == update["update_id"]) <= failures:
+            raise RuntimeError("database unavailable")
+        return 1
+
+    monkeypatch.setattr(update_worker, "process_update", flaky)
+
+    async def deliver():
+        queue = UpdateQueue(workers=2, max_size=10, dedupe_window=100, max_attempts=3, retry_delay=0.05)
+        await queue.start()
+        first = [queue.submit(_update(update_id, "x")) for update_id in (1, 2, 3)]
+        await asyncio.sleep(0.01)
+        # 2 and 3 are waiting to be retried, not lost
+        while_retrying = [queue.submit(_update(update_id, "x")) for update_id in (2, 3)]
+        await queue.stop()
+        stats = queue.stats()
+        # 3 was given up on, so a later redelivery of it is accepted
+        return first, while_retrying, queue.submit(_update(3, "x")), stats
+
+    first, while_retrying, redelivered, stats = asyncio.run(deliver())
+    assert (first, while_retrying, redelivered) == ([True, True, True], [False, False], True)
+    times = [at for update_id, at in attempts if update_id == 2]
+    assert len(times) == 3
+    assert times[1] - times[0] >= 0.045 and times[2] - times[1] >= 0.095
+    assert len([update_id for update_id, _ in attempts if update_id == 3]) == 3
+    assert (stats["processed"], stats["failed"], stats["retries"], stats["pending"]) == (2, 1, 4, 0)
+
+def test_replayed_update_stream_is_processed_once(monkeypatch):
+    """Replay benchmark: every update delivered three times, out of order."""
+    processed = []
+
+    async def record(update):
+        await asyncio.sleep(0.001)
+        processed.append(update["update_id"])
+        return 1
+
+    monkeypatch.setattr(update_worker, "process_update", record)
+    deliveries = [update_id for update_id in range(2000) for _ in range(3)]
+    random.Random(7).shuffle(deliveries)
+
+    async def replay():
+        queue = UpdateQueue(workers=8, max_size=10000, dedupe_window=5000)
+        await queue.start()
+        started = time.monotonic()
+        for position, update_id in enumerate(deliveries):
+            queue.submit(_update(update_id, "x"))
+            if position % 100 == 0:
+                await asyncio.sleep(0)
+        await queue.stop()
+        return time.monotonic() - started, queue.stats()
+
+    elapsed, stats = asyncio.run(replay())
+    assert sorted(processed) == list(range(2000))
+    assert (stats["accepted"], stats["duplicates"]) == (2000, 4000)
+    assert 2000 / elapsed > 1000  # updates per second
@@ -1,7 +1,15 @@
 from .models import Recommendation, UserAnalysis
-from .telegram import send_message, send_message_with_buttons
-from .html_generator import generate_html
-from .file_handlers import view_summary, parse_analysis_from_json, clean_json_string
+from .telegram import send_message, send_message_with_buttons, telegram_client
+from .html_generator import (
+    generate_html,
+    generate_shell_html,
+    generate_bookmark_cards,
+    link_metadata_for,
+    card_cache,
+)
+from .artifact_store import history_store
+from .recommendation_store import recommendation_store
+from .file_handlers import parse_analysis_from_json, parse_recommendations, clean_json_string
 
 # Export commonly used functions and classes
 __all__ = [
@@ -9,8 +17,15 @@ __all__ = [
     'UserAnalysis',
     'send_message',
     'send_message_with_buttons',
+    'telegram_client',
     'generate_html',
-    'view_summary',
+    'generate_shell_html',
+    'generate_bookmark_cards',
+    'link_metadata_for',
+    'card_cache',
+    'history_store',
+    'recommendation_store',
     'parse_analysis_from_json',
+    'parse_recommendations',
     'clean_json_string',
 ] 
\ No newline at end of file
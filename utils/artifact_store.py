@@ -0,0 +1,261 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+from config import get_settings
+
+# Brotli is optional; without it pages are served gzip or uncompressed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Quality 11 takes seconds on a large page for no smaller output; 9 takes milliseconds
+BROTLI_QUALITY = 9
+
+# Bytes handled at a time when streaming a page to disk and compressing it
+WRITE_BUFFER_SIZE = 64 * 1024
+
+# mkstemp creates files readable by the owner only; pages may be served by
+# another user (e.g. a reverse proxy reading the plain copy)
+FILE_MODE = 0o644
+
+# How long a replaced version stays on disk for responses still sending it
+RETIRED_GRACE_SECONDS = 60.0
+
+class Artifact(NamedTuple):
+    path: Path
+    etag: str
+    encoding: Optional[str]  # Content-Encoding of the file at `path`
+
+def atomic_write(path: Path, data: bytes) -> None:
+    """Write via a temp file in the same directory and rename over `path`.
+
+    Readers see either the old or the new file, never a partial one.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        os.fchmod(fd, FILE_MODE)
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+def _read_blocks(path: str) -> Iterator[bytes]:
+    with open(path, "rb") as file:
+        while True:
+            block = file.read(WRITE_BUFFER_SIZE)
+            if not block:
+                return
+            yield block
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.lower()] = quality
+    return accepted
+
+class ArtifactStore:
+    """
+    Rendered pages on disk with precomputed compressed variants.
+
+    `write()` / `write_chunks()` store each version content-addressed
+    (`{name}.{etag}`, `.gz`, `.br`) and then atomically swap a small
+    `{name}.meta` pointing at it, so a reader always gets a plain file, its variants and its ETag
+    from the same version. A plain `{name}` copy is kept for anything that
+    reads the page directly from disk.
+
+    Replaced versions are listed in the meta as retired and deleted only
+    after `retire_after` seconds, so a response that picked a file just
+    before a swap can still send it.
+    """
+
+    # Preferred first
+    ENCODINGS = ("br", "gzip")
+
+    def __init__(self, root: Path, retire_after: float = RETIRED_GRACE_SECONDS):
+        self.root = Path(root)
+        self.retire_after = retire_after
+        # name -> ((mtime_ns, inode) of the meta file, meta dict); saves
+        # re-reading an unchanged meta on every request
+        self._meta_cache: Dict[str, tuple] = {}
+        self.writes = 0
+        self.not_modified = 0
+        self.served: Dict[str, int] = {"br": 0, "gzip": 0, "identity": 0}
+
+    def _meta_path(self, name: str) -> Path:
+        return self.root / f"{name}.meta"
+
+    def write(self, name: str, content: str) -> str:
+        """Store a new version of `name` and return its ETag."""
+        return self.write_chunks(name, [content])
+
+    def write_chunks(self, name: str, chunks: Iterable[str]) -> str:
+        """
+        Store a new version of `name` from a stream of text and return its ETag.
+
+        The page is written to disk as the chunks arrive and compressed from
+        there, so it is never held in memory whole. An unchanged page is
+        detected from its hash before any compression happens.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        temp_paths: Dict[str, str] = {}
+        try:
+            with self._temp_file(name, temp_paths, "identity") as plain:
+                buffered: List[str] = []
+                size = 0
+                for chunk in chunks:
+                    buffered.append(chunk)
+                    size += len(chunk)
+                    if size >= WRITE_BUFFER_SIZE:
+                        data = "".join(buffered).encode("utf-8")
+                        digest.update(data)
+                        plain.write(data)
+                        buffered, size = [], 0
+                data = "".join(buffered).encode("utf-8")
+                digest.update(data)
+                plain.write(data)
+
+            etag = digest.hexdigest()[:32]
+            previous = self._read_meta(name)
+            if previous and previous["etag"] == etag:
+                return etag
+
+            with self._temp_file(name, temp_paths, "gzip") as raw:
+                with gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=9, mtime=0) as gzipped:
+                    for block in _read_blocks(temp_paths["identity"]):
+                        gzipped.write(block)
+            if brotli is not None:
+                with self._temp_file(name, temp_paths, "br") as raw:
+                    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+                    for block in _read_blocks(temp_paths["identity"]):
+                        raw.write(compressor.process(block))
+                    raw.write(compressor.finish())
+
+            base = f"{name}.{etag}"
+            files = {"identity": base, "gzip": f"{base}.gz"}
+            if brotli is not None:
+                files["br"] = f"{base}.br"
+            for encoding, file_name in files.items():
+                os.replace(temp_paths.pop(encoding), self.root / file_name)
+        finally:
+            for temp_path in temp_paths.values():
+                try:
+                    os.unlink(temp_path)
+                except FileNotFoundError:
+                    pass
+
+        now = time.time()
+        current = set(files.values())
+        retired = [] if previous is None else [
+            [old_file, retired_at] for old_file, retired_at in previous.get("retired", [])
+        ] + [[old_file, now] for old_file in previous["files"].values()]
+        # A page can go back to an earlier version, whose files are live again
+        retired = [entry for entry in retired if entry[0] not in current]
+        expired = [entry[0] for entry in retired if now - entry[1] >= self.retire_after]
+        retired = [entry for entry in retired if now - entry[1] < self.retire_after]
+
+        self._replace_plain_copy(name, base)
+        atomic_write(
+            self._meta_path(name),
+            json.dumps({"etag": etag, "files": files, "retired": retired}).encode()
+        )
+        self.writes += 1
+
+        for old_file in expired:
+            try:
+                os.unlink(self.root / old_file)
+            except FileNotFoundError:
+                pass
+        return etag
+
+    def _temp_file(self, name: str, temp_paths: Dict[str, str], encoding: str):
+        fd, temp_path = tempfile.mkstemp(dir=self.root, prefix=f".{name}.", suffix=".tmp")
+        temp_paths[encoding] = temp_path
+        os.fchmod(fd, FILE_MODE)
+        return os.fdopen(fd, "wb")
+
+    def _replace_plain_copy(self, name: str, base: str) -> None:
+        """Point `{name}` at the new version; a hard link saves copying the page."""
+        temp_path = self.root / f".{name}.{base}.link"
+        try:
+            os.link(self.root / base, temp_path)
+        except OSError:
+            shutil.copyfile(self.root / base, temp_path)
+        os.replace(temp_path, self.root / name)
+
+    def _read_meta(self, name: str) -> Optional[dict]:
+        meta_path = self._meta_path(name)
+        try:
+            stat = meta_path.stat()
+        except FileNotFoundError:
+            self._meta_cache.pop(name, None)
+            return None
+        version = (stat.st_mtime_ns, stat.st_ino)
+        cached = self._meta_cache.get(name)
+        if cached and cached[0] == version:
+            return cached[1]
+        try:
+            meta = json.loads(meta_path.read_bytes())
+        except (FileNotFoundError, ValueError):
+            return None
+        self._meta_cache[name] = (version, meta)
+        return meta
+
+    def etag(self, name: str) -> Optional[str]:
+        meta = self._read_meta(name)
+        return meta["etag"] if meta else None
+
+    def open(self, name: str, accept_encoding: str = "") -> Optional[Artifact]:
+        """Pick the best stored variant the client accepts, or None if missing."""
+        accepted = _parse_accept_encoding(accept_encoding)
+        for _ in range(2):
+            meta = self._read_meta(name)
+            if meta is None:
+                return None
+            file_name, encoding = meta["files"]["identity"], None
+            for candidate in self.ENCODINGS:
+                if candidate in meta["files"] and accepted.get(candidate, 0) > 0:
+                    file_name, encoding = meta["files"][candidate], candidate
+                    break
+            path = self.root / file_name
+            if path.exists():
+                return Artifact(path, meta["etag"], encoding)
+            # Replaced between reading the meta and opening the file
+            self._meta_cache.pop(name, None)
+        return None
+
+    def record(self, encoding: Optional[str], not_modified: bool = False) -> None:
+        if not_modified:
+            self.not_modified += 1
+        else:
+            self.served[encoding or "identity"] += 1
+
+    def stats(self):
+        return {
+            "writes": self.writes,
+            "not_modified": self.not_modified,
+            "served": dict(self.served),
+            "brotli": brotli is not None,
+        }
+
+history_store = ArtifactStore(get_settings().LINKS_HISTORY_PATH)
@@ -1,8 +1,145 @@
-import os
+import asyncio
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Any
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from config import get_settings
 from utils.models import Recommendation
-from utils.templates import generate_styles, generate_scripts
+from utils.artifact_store import history_store
+from utils.templates import card_macros, cards_template, history_template, history_shell_template
+
+class CardCache:
+    """
+    Rendered bookmark cards keyed by link id.
+
+    Each entry remembers the version (the values the card was rendered
+    from), so a page rebuild only re-renders cards whose link or tags
+    changed. The relative date ("3 days ago") moves with the
+    clock and is filled in per render, outside the cached fragment.
+    Pages render in a worker thread while the cards API renders on the
+    event loop, hence the lock.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[tuple, Tuple[str, str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, link_id: int, version: tuple) -> Optional[Tuple[str, str]]:
+        with self._lock:
+            entry = self._entries.get(link_id)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(link_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, link_id: int, version: tuple, fragment: Tuple[str, str]) -> None:
+        with self._lock:
+            self._entries[link_id] = (version, fragment)
+            self._entries.move_to_end(link_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, link_id: int) -> None:
+        with self._lock:
+            self._entries.pop(link_id, None)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+card_cache = CardCache(get_settings().CARD_CACHE_SIZE)
+
+def card_version(link_url: str, metadata: Dict) -> tuple:
+    """Exactly the inputs the card macros read; equal versions render equal cards."""
+    images = metadata.get("images") or []
+    return (
+        link_url,
+        (metadata.get("title") or "")[:100],
+        (metadata.get("description") or "")[:201],
+        metadata.get("url"),
+        metadata.get("price"),
+        str(images[0]) if images else None,
+        tuple(metadata.get("tags", [])),
+    )
+
+def render_card(link_id: int, link_url: str, metadata: Dict) -> Tuple[str, str]:
+    """Render a bookmark card, split around the spot where its date goes."""
+    return card_macros.head(link_id, link_url, metadata), card_macros.tail(link_id)
+
+def format_created_at(created_at: Optional[datetime], now: Optional[datetime] = None) -> str:
+    """Relative creation date shown at the bottom of a card."""
+    if not created_at:
+        return ""
+    now = now or datetime.now(created_at.tzinfo)
+    days_difference = (now - created_at).days
+    return (
+        created_at.strftime("%d/%m/%y %H:%M")
+        if days_difference == 0
+        else created_at.strftime("%d/%m/%y")
+        if days_difference == 1
+        else f"{days_difference} days ago"
+    )
+
+def iter_bookmark_cards(user_links: list, link_metadata: list) -> Iterator[Tuple[str, str, str]]:
+    """
+    Yield (head, date label, tail) for every link, re-rendering only the
+    cards that changed. Feeds the `cards` loop in _cards.html.
+    """
+    for link, metadata in zip(user_links, link_metadata):
+        version = card_version(link.link, metadata)
+        fragment = card_cache.get(link.id, version)
+        if fragment is None:
+            fragment = render_card(link.id, link.link, metadata)
+            card_cache.put(link.id, version, fragment)
+        yield fragment[0], format_created_at(metadata.get("created_at")), fragment[1]
+
+def generate_bookmark_cards(
+    user_links: list,
+    link_metadata: list,
+    user_recommendations: List[Recommendation] = ()
+) -> str:
+    """HTML for a page of cards, followed by any recommendation cards."""
+    return cards_template.render(
+        cards=iter_bookmark_cards(user_links, link_metadata),
+        recommendations=user_recommendations,
+    )
+
+def link_metadata_for(user_links: list) -> List[Dict]:
+    """Card inputs for UserLink rows loaded with their tags."""
+    return [
+        {
+            "title": link.title,
+            "description": link.description,
+            "url": link.url,
+            "price": link.price,
+            "images": link.images if isinstance(link.images, list) else
+                     (link.images.split(",") if link.images else []),
+            "site_name": link.site_name,
+            "tags": [tag.name for tag in link.tags],
+            "created_at": link.created_at,
+        }
+        for link in user_links
+    ]
+
+async def write_history_file(chat_id: int, chunks: Iterable[str]) -> str:
+    """Save a chat's history page from a stream of text and return its public URL."""
+    # Rendering and compressing a large page take long enough to stall the
+    # event loop; both happen chunk by chunk in a worker thread
+    etag = await asyncio.to_thread(history_store.write_chunks, f"{chat_id}_history.html", chunks)
+    print(f"saved html for chat {chat_id} (etag {etag})")
+
+    return f"{get_settings().PUBLIC_BASE_URL}/history/{chat_id}"
 
 async def generate_html(
     chat_id: int,
@@ -13,52 +150,31 @@ async def generate_html(
 ) -> str:
     """Generate a mobile-friendly HTML file with link history and metadata."""
     print("generating html")
-    directory = "/app/storage/links_history"
-    if not os.path.exists(directory):
-        os.makedirs(directory)
 
     # Extract all unique tags
     all_tags = sorted(
         set(tag for metadata in link_metadata for tag in metadata.get("tags", []))
     )
 
-    def generate_tag_filters():
-        # ... tag filters generation code ...
-        pass
-
-    def generate_bookmark_cards(chat_id):
-        # ... bookmark cards generation code ...
-        pass
-
-    # Build HTML
-    history_html = f"""
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>{first_name}'s Bookmarks</title>
-        {generate_styles()}
-    </head>
-    <body>
-        <div class="container">
-            {generate_tag_filters()}
-            <div class="bookmarks">
-                {generate_bookmark_cards(chat_id)}
-            </div>
-            <div class="actions">
-                <button class="delete-all" onclick="deleteAllLinks()">Delete All Links</button>
-                <button class="delete-active-tag" onclick="deleteActiveTag()">Delete Active Tag</button>
-            </div>
-        </div>
-        {generate_scripts(chat_id)}
-    </body>
-    </html>
-    """
-
-    file_path = os.path.join(directory, f"{chat_id}_history.html")
-    with open(file_path, "w") as file:
-        file.write(history_html)
-        print("saved html to file: ", file_path)
+    chunks = history_template.generate(
+        chat_id=chat_id,
+        first_name=first_name,
+        all_tags=all_tags,
+        cards=iter_bookmark_cards(user_links, link_metadata),
+        recommendations=user_recommendations,
+    )
+    return await write_history_file(chat_id, chunks)
 
-    return f"https://your-app-url.railway.app/storage/links_history/{chat_id}_history.html" 
\ No newline at end of file
+async def generate_shell_html(chat_id: int, all_tags: List[str], first_name: str) -> str:
+    """
+    Generate the paged history page: filters and an empty list that
+    fetches its cards a page at a time, so its size doesn't grow with the chat.
+    """
+    print("generating html shell")
+    chunks = history_shell_template.generate(
+        chat_id=chat_id,
+        first_name=first_name,
+        all_tags=all_tags,
+        page_size=get_settings().HISTORY_PAGE_SIZE,
+    )
+    return await write_history_file(chat_id, chunks)
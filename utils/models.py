@@ -1,11 +1,21 @@
 from typing import List
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
+from .scrapers.urls import is_web_url
 
 class Recommendation(BaseModel):
     destination_tag: str
     title: str
     link: str
 
+    @validator("link")
+    def web_link(cls, value):
+        # Links come from the model and end up in href attributes, where a
+        # javascript: or data: URL would run
+        value = value.strip()
+        if not is_web_url(value):
+            raise ValueError("link must be an http or https URL")
+        return value
+
 class UserAnalysis(BaseModel):
     general: str
     recommendations: List[Recommendation] 
\ No newline at end of file
@@ -0,0 +1,94 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple
+from config import get_settings
+from utils.artifact_store import atomic_write
+from utils.file_handlers import clean_json_string, parse_recommendations
+from utils.models import Recommendation, UserAnalysis
+
+class RecommendationStore:
+    """
+    Per-chat recommendations from `{chat_id}_summary.json`, parsed once.
+
+    Each entry remembers the (mtime_ns, size, inode) of the file it was
+    parsed from, so a render only stats the file; it is re-read when
+    something else replaces it. `put()` writes a summary and updates the
+    cache in one go.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._entries: Dict[str, Tuple[tuple, List[Recommendation]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.errors = 0
+
+    def _path(self, chat_id) -> Path:
+        return self.root / f"{chat_id}_summary.json"
+
+    def get(self, chat_id) -> List[Recommendation]:
+        """The chat's recommendations, or an empty list if it has no summary."""
+        chat_id = str(chat_id)
+        path = self._path(chat_id)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            with self._lock:
+                self._entries.pop(chat_id, None)
+            return []
+        version = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        with self._lock:
+            entry = self._entries.get(chat_id)
+            if entry and entry[0] == version:
+                self.hits += 1
+                return entry[1]
+
+        recommendations = self._load(path)
+        with self._lock:
+            self.loads += 1
+            # A broken file is cached as empty too, so it's reported once per
+            # version rather than on every render
+            self._entries[chat_id] = (version, recommendations)
+        return recommendations
+
+    def _load(self, path: Path) -> List[Recommendation]:
+        try:
+            data = json.loads(clean_json_string(path.read_text()))
+            if not isinstance(data, dict):
+                raise ValueError("expected a JSON object")
+            return parse_recommendations(data.get("recommendations", []))
+        except FileNotFoundError:
+            return []
+        except ValueError as e:
+            # Invalid JSON or not an object; bad entries are skipped above
+            self.errors += 1
+            print(f"Invalid summary file {path}: {str(e)}")
+            return []
+
+    def put(self, chat_id, analysis: UserAnalysis) -> None:
+        """Save a chat's analysis as its summary file."""
+        chat_id = str(chat_id)
+        path = self._path(chat_id)
+        self.root.mkdir(parents=True, exist_ok=True)
+        atomic_write(path, analysis.json().encode("utf-8"))
+        stat = os.stat(path)
+        with self._lock:
+            self._entries[chat_id] = (
+                (stat.st_mtime_ns, stat.st_size, stat.st_ino),
+                list(analysis.recommendations),
+            )
+
+    def stats(self):
+        lookups = self.hits + self.loads
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "loads": self.loads,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+recommendation_store = RecommendationStore(get_settings().LINKS_HISTORY_PATH)
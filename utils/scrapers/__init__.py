@@ -1,12 +1,28 @@
-from .analyzer import analyze_link
-from .message_parser import parse_message, extract_tags_from_text
+from .analyzer import analyze_link, enrichment_flight, is_fallback_result
+from .batch import analyze_links
+from .message_parser import parse_message, extract_tags_from_text, extract_links_and_tags
 from .models import ProductData, MessageData, ParsedMessage
+from .cache import enrichment_cache
+from .opengraph import download_stats
+from .urls import normalize_url, is_web_url
+from .http_client import get_http_client, start_http_client, close_http_client
 
 __all__ = [
     'analyze_link',
+    'analyze_links',
+    'is_fallback_result',
     'parse_message',
     'extract_tags_from_text',
+    'extract_links_and_tags',
     'ProductData',
     'MessageData',
-    'ParsedMessage'
+    'ParsedMessage',
+    'enrichment_cache',
+    'enrichment_flight',
+    'download_stats',
+    'normalize_url',
+    'is_web_url',
+    'get_http_client',
+    'start_http_client',
+    'close_http_client'
 ] 
\ No newline at end of file
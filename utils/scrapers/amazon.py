@@ -1,8 +1,9 @@
 import time
-import requests
+import httpx
 from typing import Dict, Any
 import os
 from .models import ProductData
+from .http_client import get_http_client
 from config import get_settings
 
 async def fetch_from_soax_api(link: str) -> ProductData:
@@ -13,11 +14,11 @@ async def fetch_from_soax_api(link: str) -> ProductData:
     headers = {"X-SOAX-API-Secret": settings.X_SOAX_API_SECRET}
 
     try:
-        response = requests.get(api_url, headers=headers, timeout=60)
+        response = await get_http_client().get(api_url, headers=headers)
         response.raise_for_status()
         result = response.json()
         return process_soax_response(result, link)
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         print(f"SOAX API error: {e}")
         return ProductData(
             title="Untitled",
@@ -1,19 +1,48 @@
 import time
 from .amazon import fetch_from_soax_api
 from .opengraph import fetch_opengraph_metadata
+from .cache import enrichment_cache
 from .models import ProductData
+from .singleflight import SingleFlight
+from .urls import normalize_url, upstream_for, SOAX_PRODUCT
 
-async def analyze_link(link: str) -> ProductData:
-    """Analyze a link to retrieve structured data."""
+# Placeholder titles the scrapers return when the upstream fetch failed
+FALLBACK_TITLES = {"Untitled", "No title found"}
+
+# Shares one upstream fetch between concurrent callers for the same URL
+enrichment_flight = SingleFlight()
+
+def is_fallback_result(result: ProductData) -> bool:
+    """True if the scraper returned placeholder data because the fetch failed."""
+    return result.title in FALLBACK_TITLES and not result.images
+
+async def _fetch_and_cache(link: str, cache_key: str, upstream: str) -> ProductData:
     start_time = time.time()  # Record the start time
-    
-    if "amazon" in link:
+
+    if upstream == SOAX_PRODUCT:
         result = await fetch_from_soax_api(link)
     else:
         result = await fetch_opengraph_metadata(link)
-    
+
     end_time = time.time()  # Record the end time
     duration = end_time - start_time  # Calculate the duration
     print(f"Link analysis took {duration:.4f} seconds.")
-    
-    return result 
\ No newline at end of file
+
+    if not is_fallback_result(result):
+        await enrichment_cache.set(cache_key, upstream, result)
+
+    return result
+
+async def analyze_link(link: str) -> ProductData:
+    """Analyze a link to retrieve structured data."""
+    cache_key = normalize_url(link)
+    upstream = upstream_for(link)
+
+    cached = await enrichment_cache.get(cache_key)
+    if cached is not None:
+        print(f"Enrichment cache hit for {cache_key}")
+        return cached
+
+    return await enrichment_flight.do(
+        cache_key, lambda: _fetch_and_cache(link, cache_key, upstream)
+    )
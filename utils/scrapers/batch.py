@@ -0,0 +1,57 @@
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from .analyzer import analyze_link
+from .urls import upstream_for, SOAX_PRODUCT, SOAX_UNBLOCKER
+from .models import ProductData
+from config import get_settings
+
+# Created lazily so they bind to the running event loop
+_global_semaphore: Optional[asyncio.Semaphore] = None
+_upstream_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+def _get_global_semaphore() -> asyncio.Semaphore:
+    global _global_semaphore
+    if _global_semaphore is None:
+        _global_semaphore = asyncio.Semaphore(get_settings().ENRICH_MAX_CONCURRENCY)
+    return _global_semaphore
+
+def _get_upstream_semaphore(upstream: str) -> asyncio.Semaphore:
+    semaphore = _upstream_semaphores.get(upstream)
+    if semaphore is None:
+        settings = get_settings()
+        limits = {
+            SOAX_PRODUCT: settings.SOAX_PRODUCT_CONCURRENCY,
+            SOAX_UNBLOCKER: settings.SOAX_UNBLOCKER_CONCURRENCY,
+        }
+        semaphore = asyncio.Semaphore(limits[upstream])
+        _upstream_semaphores[upstream] = semaphore
+    return semaphore
+
+async def _analyze_bounded(index: int, link: str) -> Tuple[int, str, ProductData]:
+    # Upstream slot first: a link waiting on a busy endpoint must not sit on
+    # a global slot that a link for the other endpoint could use
+    async with _get_upstream_semaphore(upstream_for(link)):
+        async with _get_global_semaphore():
+            return index, link, await analyze_link(link)
+
+async def analyze_links(links: List[str]) -> AsyncIterator[Tuple[int, str, ProductData]]:
+    """
+    Analyze many links concurrently, yielding results as they complete.
+
+    Concurrency is capped globally and per upstream SOAX endpoint, and the
+    caps are shared by every batch running in the process.
+
+    Yields:
+        Tuple of (index in `links`, link, ProductData), in completion order
+    """
+    tasks = [
+        asyncio.ensure_future(_analyze_bounded(index, link))
+        for index, link in enumerate(links)
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Consumer went away early (e.g. client disconnected)
+        for task in tasks:
+            task.cancel()
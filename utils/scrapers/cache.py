@@ -0,0 +1,195 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from .urls import SOAX_PRODUCT, SOAX_UNBLOCKER
+from .models import ProductData
+from config import get_settings
+
+class EnrichmentCache:
+    """
+    Two-tier cache of enrichment results keyed by normalized URL.
+
+    The first tier is an in-process LRU; the second is a local SQLite file
+    that survives restarts and is shared by workers on the same host. Entry
+    lifetime depends on the upstream source: SOAX product results carry a
+    price and expire quickly, page metadata lives much longer. The disk
+    tier is pruned on open and then at most every `prune_interval`
+    seconds: expired rows go first, then the oldest beyond
+    `disk_max_entries`.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        path: Path,
+        ttls: Dict[str, int],
+        disk_max_entries: int = 200000,
+        prune_interval: float = 300,
+    ):
+        self.max_entries = max_entries
+        self.path = path
+        self.ttls = ttls
+        self.disk_max_entries = disk_max_entries
+        self.prune_interval = prune_interval
+        self._pruned_at = 0.0
+        self._memory: "OrderedDict[str, Tuple[str, float, ProductData]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.stores = 0
+        self.disk_pruned = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(self.path), check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS enrichment_cache (
+                    key TEXT PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                )
+                """
+            )
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS ix_enrichment_cache_fetched_at "
+                "ON enrichment_cache (fetched_at)"
+            )
+            self._prune(db)
+            self._db = db
+        return self._db
+
+    def _prune(self, db: sqlite3.Connection) -> None:
+        """Delete expired rows, then the oldest beyond disk_max_entries."""
+        now = time.time()
+        deleted = 0
+        for source, ttl in self.ttls.items():
+            deleted += db.execute(
+                "DELETE FROM enrichment_cache WHERE source = ? AND fetched_at < ?",
+                (source, now - ttl),
+            ).rowcount
+        deleted += db.execute(
+            "DELETE FROM enrichment_cache WHERE key IN ("
+            "SELECT key FROM enrichment_cache ORDER BY fetched_at DESC, rowid DESC LIMIT -1 OFFSET ?)",
+            (self.disk_max_entries,),
+        ).rowcount
+        db.commit()
+        self.disk_pruned += deleted
+        self._pruned_at = now
+
+    def _disk_get(self, key: str) -> Optional[Tuple[str, float, ProductData]]:
+        with self._db_lock:
+            row = self._connect().execute(
+                "SELECT source, fetched_at, data FROM enrichment_cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        source, fetched_at, data = row
+        return source, fetched_at, ProductData(**json.loads(data))
+
+    def _disk_set(self, key: str, source: str, fetched_at: float, data: ProductData) -> None:
+        with self._db_lock:
+            db = self._connect()
+            db.execute(
+                "INSERT OR REPLACE INTO enrichment_cache (key, source, data, fetched_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, source, data.json(), fetched_at),
+            )
+            db.commit()
+            if time.time() - self._pruned_at >= self.prune_interval:
+                self._prune(db)
+
+    def _is_fresh(self, source: str, fetched_at: float) -> bool:
+        return time.time() - fetched_at < self.ttls[source]
+
+    def _remember(self, key: str, entry: Tuple[str, float, ProductData]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    async def get(self, key: str) -> Optional[ProductData]:
+        """Return a fresh cached result for a normalized URL, if any."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            source, fetched_at, data = entry
+            if self._is_fresh(source, fetched_at):
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return data
+            # The disk copy has the same timestamp, so it is stale too
+            del self._memory[key]
+            self.expired += 1
+            self.misses += 1
+            return None
+
+        try:
+            entry = await asyncio.to_thread(self._disk_get, key)
+        except sqlite3.Error as e:
+            print(f"Enrichment cache read error: {e}")
+            entry = None
+
+        if entry is not None:
+            source, fetched_at, data = entry
+            if self._is_fresh(source, fetched_at):
+                self._remember(key, entry)
+                self.disk_hits += 1
+                return data
+            self.expired += 1
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, source: str, data: ProductData) -> None:
+        """Store a result in both tiers."""
+        fetched_at = time.time()
+        self._remember(key, (source, fetched_at, data))
+        self.stores += 1
+        try:
+            await asyncio.to_thread(self._disk_set, key, source, fetched_at, data)
+        except sqlite3.Error as e:
+            print(f"Enrichment cache write error: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "stores": self.stores,
+            "disk_pruned": self.disk_pruned,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+def _build_cache() -> EnrichmentCache:
+    settings = get_settings()
+    return EnrichmentCache(
+        max_entries=settings.ENRICHMENT_CACHE_SIZE,
+        path=settings.ENRICHMENT_CACHE_PATH,
+        ttls={
+            SOAX_PRODUCT: settings.ENRICHMENT_CACHE_PRICE_TTL,
+            SOAX_UNBLOCKER: settings.ENRICHMENT_CACHE_METADATA_TTL,
+        },
+        disk_max_entries=settings.ENRICHMENT_CACHE_DISK_MAX_ENTRIES,
+        prune_interval=settings.ENRICHMENT_CACHE_PRUNE_INTERVAL,
+    )
+
+enrichment_cache = _build_cache()
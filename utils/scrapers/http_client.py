@@ -0,0 +1,42 @@
+from typing import Optional
+import httpx
+from config import get_settings
+
+_client: Optional[httpx.AsyncClient] = None
+
+def _build_client() -> httpx.AsyncClient:
+    settings = get_settings()
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    )
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=httpx.Timeout(settings.HTTP_TIMEOUT),
+    )
+
+async def start_http_client() -> httpx.AsyncClient:
+    """Create the shared keep-alive client. Called on application startup."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+async def close_http_client() -> None:
+    """Close the shared client. Called on application shutdown."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared AsyncClient used by the scrapers.
+
+    The client is normally created by the app startup hook; it is created
+    lazily here so scripts and background jobs outside the app still work.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
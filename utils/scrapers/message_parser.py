@@ -1,17 +1,60 @@
-from typing import Dict, Tuple, List
+import re
+from typing import Dict, List, Tuple
 from .models import MessageData, ParsedMessage
 
+# URLs (with a scheme or starting with www.) and #tags, matched left to right
+# in one pass. A URL is matched first at its position, so its #fragment is
+# never mistaken for a tag.
+TOKEN_PATTERN = re.compile(
+    r"(?P<url>\bhttps?://[^\s<>\"]+|\bwww\.[^\s<>\"]+)"
+    r"|(?<![\w#&])#(?P<tag>\w[\w-]*)",
+    re.IGNORECASE,
+)
+# Sentence punctuation that ends up glued to a URL in running text
+TRAILING_PUNCTUATION = ".,;:!?'\"]}>"
+
 def parse_message(data: Dict) -> MessageData:
     """Extract relevant message data."""
+    message = data["message"]
     return MessageData(
-        chat_id=str(data["message"]["chat"]["id"]),
-        first_name=data["message"]["chat"].get("first_name", "User"),
-        text=data["message"].get("text")
+        chat_id=str(message["chat"]["id"]),
+        first_name=message["chat"].get("first_name", "User"),
+        # Photos and documents carry their text as a caption
+        text=message.get("text") or message.get("caption")
     )
 
+def _clean_url(url: str) -> str:
+    while url:
+        if url[-1] in TRAILING_PUNCTUATION:
+            url = url[:-1]
+        elif url[-1] == ")" and url.count("(") < url.count(")"):
+            # "(see https://x.y/z)" but not "https://en.wikipedia.org/wiki/A_(b)"
+            url = url[:-1]
+        else:
+            break
+    if url.lower().startswith("www."):
+        url = "https://" + url
+    return url
+
+def extract_links_and_tags(text: str) -> Tuple[List[str], List[str]]:
+    """Every URL and #tag in a message, in order and without duplicates."""
+    links: List[str] = []
+    tags: List[str] = []
+    for match in TOKEN_PATTERN.finditer(text or ""):
+        if match.group("url"):
+            link = _clean_url(match.group("url"))
+            if link and link not in links:
+                links.append(link)
+        else:
+            tag = match.group("tag")
+            if tag not in tags:
+                tags.append(tag)
+    return links, tags
+
 def extract_tags_from_text(text: str) -> ParsedMessage:
-    """Extract tags and link from the text."""
+    """Extract tags and links from the text."""
+    links, tags = extract_links_and_tags(text)
+    # Without a URL the first word is taken as the link, as before
     parts = text.split()
-    link = parts[0]
-    tags = [part.lstrip("#") for part in parts[1:] if part.startswith("#")]
-    return ParsedMessage(link=link, tags=tags) 
\ No newline at end of file
+    link = links[0] if links else (parts[0] if parts else "")
+    return ParsedMessage(link=link, links=links, tags=tags)
@@ -15,5 +15,6 @@ class MessageData(BaseModel):
     text: Optional[str] = None
 
 class ParsedMessage(BaseModel):
-    link: str
+    link: str  # The first link
+    links: List[str] = []
     tags: List[str] 
\ No newline at end of file
@@ -1,9 +1,164 @@
-import requests
+import re
+import httpx
+from html.parser import HTMLParser
+from typing import Dict, Optional, Tuple
 from bs4 import BeautifulSoup
 import os
 from .models import ProductData
+from .http_client import get_http_client
 from config import get_settings
 
+HEAD_END_PATTERN = re.compile(r"</head\s*>", re.IGNORECASE)
+HEAD_END_BYTES_PATTERN = re.compile(rb"</head\s*>", re.IGNORECASE)
+META_PREFIXES = ("og:", "twitter:")
+
+# Totals for streamed page downloads, reported under /metrics
+download_stats = {
+    "downloads": 0,
+    "stopped_early": 0,
+    "bytes_read": 0,  # Decoded body bytes handed to the parser
+    "bytes_downloaded": 0,  # Bytes on the wire, compressed if the server compressed
+    "bytes_saved": 0,  # Content-Length minus bytes_downloaded, for downloads stopped early
+}
+
+class _HeadEnd(Exception):
+    """Raised by the parser once the document head is over."""
+
+class HeadMetaParser(HTMLParser):
+    """Collect <meta> tags from the document head in a single pass."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.by_property: Dict[str, str] = {}
+        self.by_name: Dict[str, str] = {}
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "body":
+            raise _HeadEnd()
+        if tag != "meta":
+            return
+        attributes = dict(attrs)
+        content = attributes.get("content")
+        if content is None:
+            return
+        # First occurrence wins, matching soup.find()
+        if attributes.get("property"):
+            self.by_property.setdefault(attributes["property"], content)
+        if attributes.get("name"):
+            self.by_name.setdefault(attributes["name"], content)
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            raise _HeadEnd()
+
+def extract_head_meta(html: str) -> Optional[Tuple[Dict[str, str], Dict[str, str]]]:
+    """
+    Fast path: parse only the <head> of a page and return its meta tags.
+
+    Returns:
+        (by_property, by_name) dicts, or None if no OpenGraph/Twitter tags
+        were found and the caller should fall back to a full parse
+    """
+    head_end = HEAD_END_PATTERN.search(html)
+    if head_end:
+        html = html[:head_end.end()]
+
+    parser = HeadMetaParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except _HeadEnd:
+        pass
+
+    found = any(
+        key.startswith(META_PREFIXES)
+        for key in (*parser.by_property, *parser.by_name)
+    )
+    if not found:
+        return None
+    return parser.by_property, parser.by_name
+
+def _build_product_data(
+    by_property: Dict[str, str], by_name: Dict[str, str], link: str
+) -> ProductData:
+    def get_meta(property_name: str) -> Optional[str]:
+        # Prefer the property attribute, fall back to name
+        return by_property.get(property_name) or by_name.get(property_name)
+
+    def get_first(*property_names: str) -> Optional[str]:
+        for property_name in property_names:
+            value = get_meta(property_name)
+            if value:
+                return value
+        return None
+
+    image = get_first("og:image", "twitter:image")
+    return ProductData(
+        title=get_first("og:title", "twitter:title") or "No title found",
+        description=get_first("og:description", "twitter:description")
+        or "No description found",
+        url=get_meta("og:url") or link,
+        images=[image] if image else [],
+        site_name=get_meta("og:site_name") or "Unknown site name"
+    )
+
+def extract_opengraph_from_html(html: str, link: str) -> ProductData:
+    """Extract metadata via the head-only parser, falling back to BeautifulSoup."""
+    try:
+        meta = extract_head_meta(html)
+    except Exception as e:
+        print(f"Fast meta extraction failed, falling back: {e}")
+        meta = None
+
+    if meta is None:
+        return extract_opengraph_tags(BeautifulSoup(html, "html.parser"), link)
+    return _build_product_data(*meta, link)
+
+async def _download_head(response: httpx.Response, max_bytes: int) -> str:
+    """
+    Read a streamed response body until </head> or `max_bytes`.
+
+    Leaving the stream early closes the connection, so the rest of the
+    body is never transferred.
+    """
+    buffer = bytearray()
+    stopped_early = False
+    async for chunk in response.aiter_bytes():
+        # Re-scan a few bytes before the new chunk in case the tag was split
+        search_from = max(0, len(buffer) - 16)
+        buffer.extend(chunk)
+        if HEAD_END_BYTES_PATTERN.search(buffer, search_from) or len(buffer) >= max_bytes:
+            stopped_early = True
+            break
+
+    # Content-Length counts the encoded body, so savings are measured in
+    # wire bytes; for gzip/br pages the decoded size is several times larger
+    bytes_downloaded = response.num_bytes_downloaded
+    download_stats["downloads"] += 1
+    download_stats["bytes_read"] += len(buffer)
+    download_stats["bytes_downloaded"] += bytes_downloaded
+    if stopped_early:
+        download_stats["stopped_early"] += 1
+        content_length = response.headers.get("content-length")
+        if content_length and content_length.isdigit():
+            bytes_saved = max(0, int(content_length) - bytes_downloaded)
+            download_stats["bytes_saved"] += bytes_saved
+            print(f"Stopped page download after {bytes_downloaded} bytes, saved {bytes_saved}")
+
+    return bytes(buffer[:max_bytes]).decode(response.encoding or "utf-8", errors="replace")
+
+async def _fetch_page_html(url: str, headers: Dict[str, str]) -> str:
+    settings = get_settings()
+    client = get_http_client()
+    if not settings.OPENGRAPH_STREAM_BODY:
+        response = await client.get(url, headers=headers)
+        response.raise_for_status()
+        return response.text
+
+    async with client.stream("GET", url, headers=headers) as response:
+        response.raise_for_status()
+        return await _download_head(response, settings.OPENGRAPH_MAX_BYTES)
+
 async def fetch_opengraph_metadata(link: str) -> ProductData:
     """Fallback: Fetch OpenGraph metadata."""
     print("Using OpenGraph metadata extraction.")
@@ -14,11 +169,9 @@ async def fetch_opengraph_metadata(link: str) -> ProductData:
         f"https://scraping.soax.com/v1/unblocker/html?xhr=false&url={link}"
     )
     try:
-        response = requests.get(soax_unblocker_link, headers=headers, timeout=60)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        return extract_opengraph_tags(soup, link)
-    except requests.exceptions.RequestException as e:
+        html = await _fetch_page_html(soax_unblocker_link, headers)
+        return extract_opengraph_from_html(html, link)
+    except httpx.HTTPError as e:
         print(f"OpenGraph extraction error: {e}")
         return ProductData(
             title="No title found",
@@ -32,17 +185,12 @@ def extract_opengraph_tags(soup: BeautifulSoup, link: str) -> ProductData:
     """Extract OpenGraph metadata from the page."""
     print("extract_opengraph_tags")
 
-    def get_meta(property_name: str) -> str:
-        # Handle case insensitivity and attribute variations
-        tag = soup.find("meta", attrs={"property": property_name})
-        if not tag:  # Try name attribute as a fallback
-            tag = soup.find("meta", attrs={"name": property_name})
-        return tag["content"] if tag and "content" in tag.attrs else None
+    by_property: Dict[str, str] = {}
+    by_name: Dict[str, str] = {}
+    for tag in soup.find_all("meta", attrs={"content": True}):
+        if tag.get("property"):
+            by_property.setdefault(tag["property"], tag["content"])
+        if tag.get("name"):
+            by_name.setdefault(tag["name"], tag["content"])
 
-    return ProductData(
-        title=get_meta("og:title") or "No title found",
-        description=get_meta("og:description") or "No description found",
-        url=get_meta("og:url") or link,
-        images=[get_meta("og:image")] if get_meta("og:image") else [],
-        site_name=get_meta("og:site_name") or "Unknown site name"
-    ) 
\ No newline at end of file
+    return _build_product_data(by_property, by_name, link)
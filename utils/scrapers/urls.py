@@ -0,0 +1,82 @@
+import re
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Upstream SOAX endpoints a link can be fetched from
+SOAX_PRODUCT = "soax_product"
+SOAX_UNBLOCKER = "soax_unblocker"
+
+# Query parameters that only carry tracking/attribution data
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid",
+    "mc_eid", "_hsenc", "_hsmi", "ref", "ref_", "ref_src", "spm", "si", "smid",
+}
+TRACKING_PREFIXES = ("utm_", "pd_rd_", "pf_rd_")
+
+AMAZON_ASIN_PATTERN = re.compile(
+    r"/(?:dp|gp/product|gp/aw/d|exec/obidos/asin|o/asin)/([a-z0-9]{10})(?:[/?]|$)",
+    re.IGNORECASE,
+)
+
+def upstream_for(link: str) -> str:
+    """Return the upstream SOAX endpoint a link will be fetched from."""
+    return SOAX_PRODUCT if "amazon" in link else SOAX_UNBLOCKER
+
+def is_web_url(value) -> bool:
+    """True for an absolute http(s) URL; anything else is unsafe in an href or src."""
+    if not isinstance(value, str):
+        return False
+    try:
+        parts = urlsplit(value.strip())
+    except ValueError:
+        return False
+    return parts.scheme.lower() in ("http", "https") and bool(parts.netloc)
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+def _normalize_amazon(host: str, path: str):
+    match = AMAZON_ASIN_PATTERN.search(path)
+    if not match:
+        return None
+    # www.amazon.com, smile.amazon.com and m.amazon.com all serve the same product
+    domain = host.split("amazon.", 1)[1]
+    return f"https://www.amazon.{domain}/dp/{match.group(1).upper()}"
+
+def normalize_url(link: str) -> str:
+    """
+    Build a canonical form of a URL for use as a cache key.
+
+    Lowercases scheme and host, drops default ports, fragments and tracking
+    parameters, and sorts the remaining query string. Amazon product URLs are
+    reduced to `https://www.amazon.<tld>/dp/<ASIN>`.
+    """
+    try:
+        parts = urlsplit(link.strip())
+        port = parts.port
+    except ValueError:
+        # Malformed (e.g. a non-numeric or out-of-range port, a bad IPv6
+        # host): the URL is its own key
+        return link.strip()
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower()
+
+    if "amazon." in host:
+        canonical = _normalize_amazon(host, parts.path)
+        if canonical:
+            return canonical
+
+    netloc = host
+    if port and not (scheme == "http" and port == 80) and not (scheme == "https" and port == 443):
+        netloc = f"{host}:{port}"
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = sorted(
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking_param(name)
+    )
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
@@ -1,11 +1,328 @@
-import os
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
 import httpx
 from config import get_settings
 
-async def send_message_with_buttons(chat_id: int, text: str, buttons: dict):
-    """Send a message with inline keyboard buttons."""
+# HTTP/2 needs the h2 package (httpx[http2]); without it the client
+# falls back to HTTP/1.1 keep-alive
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+class TelegramAPIError(Exception):
+    """The Bot API refused a request (after any retries)."""
+
+    def __init__(self, status_code: int, description: str):
+        super().__init__(f"Telegram API error {status_code}: {description}")
+        self.status_code = status_code
+        self.description = description
+
+class _OutgoingRequest:
+    __slots__ = ("chat_id", "method", "payload", "future", "queued_at", "attempts")
+
+    def __init__(self, chat_id, method: str, payload: dict, future: asyncio.Future):
+        self.chat_id = chat_id
+        self.method = method
+        self.payload = payload
+        self.future = future
+        self.queued_at = time.monotonic()
+        self.attempts = 0
+
+def _resolve(future: asyncio.Future, result=None, error: Optional[BaseException] = None) -> None:
+    # The caller may have given up (cancelled) while the request was queued
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+class LatencyWindow:
+    """The most recent samples, in milliseconds, for percentile metrics."""
+
+    def __init__(self, size: int = 1000):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds * 1000)
+
+    def stats(self):
+        if not self._samples:
+            return {"count": 0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        ordered = sorted(self._samples)
+        return {
+            "count": len(ordered),
+            "p50_ms": round(ordered[len(ordered) // 2], 1),
+            "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+            "max_ms": round(ordered[-1], 1),
+        }
+
+class TelegramClient:
+    """
+    Long-lived Bot API client with an outbound queue.
+
+    Requests go out over one keep-alive (HTTP/2 when available)
+    connection pool. Each chat's requests are sent in order, one at a
+    time, at most one per `chat_interval` seconds (`group_interval` for
+    groups, whose ids are negative), and all chats together at most
+    `global_rate` per second. A 429 holds the chat back for the
+    `retry_after` Telegram asks for and then retries; network errors and
+    5xx responses are retried with backoff, up to `max_retries`.
+    """
+
+    def __init__(
+        self,
+        global_rate: float,
+        chat_interval: float,
+        group_interval: float,
+        max_concurrency: int,
+        max_retries: int,
+        timeout: float,
+        http2: bool = True,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.global_rate = global_rate
+        self.chat_interval = chat_interval
+        self.group_interval = group_interval
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.http2 = http2 and HTTP2_AVAILABLE
+        # Tests swap in a fake Bot API here
+        self.transport = transport
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight: set = set()
+        # Pending requests per chat, and a heap of (ready_at, seq, chat_id)
+        # for chats that have some and none in flight
+        self._queues: Dict[str, Deque[_OutgoingRequest]] = {}
+        self._ready: List[Tuple[float, int, str]] = []
+        self._busy: set = set()
+        self._not_before: Dict[str, float] = {}
+        self._sequence = itertools.count()
+        self._next_global = 0.0
+
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.send_latency = LatencyWindow()
+        self.queue_latency = LatencyWindow()
+
+    async def start(self) -> None:
+        """Open the connection pool and start sending. Called on application startup."""
+        self._open()
+
+    def _open(self) -> None:
+        if self._dispatcher is not None and not self._dispatcher.done():
+            return
+        self._client = httpx.AsyncClient(
+            http2=self.http2,
+            timeout=httpx.Timeout(self.timeout),
+            limits=httpx.Limits(
+                max_connections=self.max_concurrency,
+                max_keepalive_connections=self.max_concurrency,
+            ),
+            transport=self.transport,
+        )
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._dispatcher = asyncio.create_task(self._dispatch())
+        logger.info(f"Telegram client started (http2={self.http2})")
+
+    async def stop(self, drain_timeout: float = 5.0) -> None:
+        """Give queued messages `drain_timeout` seconds to go out, then close."""
+        if self._dispatcher is None:
+            return
+        deadline = time.monotonic() + drain_timeout
+        while (self._queues or self._in_flight) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        self._dispatcher.cancel()
+        for task in list(self._in_flight):
+            task.cancel()
+        await asyncio.gather(self._dispatcher, *self._in_flight, return_exceptions=True)
+        for queue in self._queues.values():
+            for request in queue:
+                if not request.future.done():
+                    request.future.set_exception(RuntimeError("Telegram client stopped"))
+        self._queues.clear()
+        self._ready.clear()
+        self._busy.clear()
+        self._dispatcher = None
+        await self._client.aclose()
+        self._client = None
+
+    async def call(self, method: str, payload: dict) -> dict:
+        """
+        Queue a Bot API call and wait for its result.
+
+        Returns:
+            dict: The `result` field of Telegram's response
+
+        Raises:
+            TelegramAPIError: If Telegram rejects the call or retries run out
+        """
+        return await self.submit(method, payload)
+
+    def submit(self, method: str, payload: dict) -> asyncio.Future:
+        """Queue a Bot API call; the returned future resolves like `call()`."""
+        # Scripts and tests outside the app start the client on first use
+        self._open()
+        chat_id = str(payload.get("chat_id", ""))
+        request = _OutgoingRequest(chat_id, method, payload, asyncio.get_running_loop().create_future())
+        queue = self._queues.get(chat_id)
+        if queue is None:
+            queue = self._queues[chat_id] = deque()
+        queue.append(request)
+        if len(queue) == 1 and chat_id not in self._busy:
+            self._mark_ready(chat_id, self._not_before.get(chat_id, 0.0))
+        return request.future
+
+    def _mark_ready(self, chat_id: str, ready_at: float) -> None:
+        heapq.heappush(self._ready, (ready_at, next(self._sequence), chat_id))
+        self._wakeup.set()
+
+    def _interval_for(self, chat_id: str) -> float:
+        return self.group_interval if chat_id.startswith("-") else self.chat_interval
+
+    async def _dispatch(self) -> None:
+        while True:
+            if not self._ready:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            now = time.monotonic()
+            ready_at = max(self._ready[0][0], self._next_global)
+            if ready_at > now:
+                # A newly queued chat may be ready sooner
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=ready_at - now)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._slots.acquire()
+            _, _, chat_id = heapq.heappop(self._ready)
+            request = self._queues[chat_id].popleft()
+            if not self._queues[chat_id]:
+                del self._queues[chat_id]
+            self._busy.add(chat_id)
+            self._next_global = time.monotonic() + 1 / self.global_rate
+            task = asyncio.create_task(self._send(request))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _send(self, request: _OutgoingRequest) -> None:
+        chat_id = request.chat_id
+        started = time.monotonic()
+        retry_after: Optional[float] = None
+        if request.attempts == 0:
+            self.queue_latency.add(started - request.queued_at)
+        request.attempts += 1
+        try:
+            try:
+                response = await self._client.post(
+                    get_settings().TELEGRAM_API_URL + request.method, json=request.payload
+                )
+                status, body = response.status_code, response.json()
+            except (httpx.TransportError, ValueError) as e:
+                status, body = 0, {"description": str(e)}
+            self.send_latency.add(time.monotonic() - started)
+
+            if status == 200 and body.get("ok", True):
+                self.sent += 1
+                _resolve(request.future, result=body.get("result", body))
+                return
+            if status == 429:
+                self.rate_limited += 1
+                retry_after = float((body.get("parameters") or {}).get("retry_after", 1))
+            elif status == 0 or status >= 500:
+                retry_after = float(min(2 ** (request.attempts - 1), 30))
+
+            if retry_after is None or request.attempts > self.max_retries:
+                retry_after = None
+                self.failed += 1
+                _resolve(request.future, error=TelegramAPIError(
+                    status, body.get("description", "request failed")
+                ))
+                return
+
+            # Back to the front of its chat's queue so order is kept
+            self.retries += 1
+            logger.warning(
+                f"Telegram {request.method} to chat {chat_id} got "
+                f"{status or 'no response'}; retrying in {retry_after}s"
+            )
+            self._queues.setdefault(chat_id, deque()).appendleft(request)
+        except asyncio.CancelledError:
+            request.future.cancel()
+            raise
+        except Exception as e:
+            self.failed += 1
+            _resolve(request.future, error=e)
+        finally:
+            self._slots.release()
+            self._busy.discard(chat_id)
+            if retry_after is not None:
+                not_before = time.monotonic() + retry_after
+            else:
+                not_before = started + self._interval_for(chat_id)
+            self._not_before[chat_id] = not_before
+            if chat_id in self._queues:
+                self._mark_ready(chat_id, not_before)
+            elif len(self._not_before) > 10000:
+                # An idle chat's spacing only matters for a few seconds
+                now = time.monotonic()
+                self._not_before = {
+                    key: value for key, value in self._not_before.items() if value > now
+                }
+
+    def stats(self):
+        return {
+            "http2": self.http2,
+            "queued": sum(len(queue) for queue in self._queues.values()),
+            "in_flight": len(self._in_flight),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "send_latency": self.send_latency.stats(),
+            "queue_latency": self.queue_latency.stats(),
+        }
+
+def _build_client() -> TelegramClient:
     settings = get_settings()
-    url = settings.TELEGRAM_API_URL + "sendMessage"
+    return TelegramClient(
+        global_rate=settings.TELEGRAM_GLOBAL_RATE,
+        chat_interval=settings.TELEGRAM_CHAT_INTERVAL,
+        group_interval=settings.TELEGRAM_GROUP_CHAT_INTERVAL,
+        max_concurrency=settings.TELEGRAM_MAX_CONCURRENCY,
+        max_retries=settings.TELEGRAM_MAX_RETRIES,
+        timeout=settings.TELEGRAM_TIMEOUT,
+        http2=settings.TELEGRAM_HTTP2,
+    )
+
+telegram_client = _build_client()
+
+async def send_message_with_buttons(chat_id: int, text: str, buttons: dict):
+    """
+    Send a message with inline keyboard buttons.
+
+    Like send_message, a refused request is logged and None returned.
+    """
     payload = {"chat_id": chat_id, "text": text, "reply_markup": buttons}
 
     print(
@@ -17,13 +334,25 @@ async def send_message_with_buttons(chat_id: int, text: str, buttons: dict):
         chat_id,
     )
 
-    async with httpx.AsyncClient() as client:
-        await client.post(url, json=payload)
+    return await _send_logged(payload)
 
 async def send_message(chat_id: int, text: str):
-    url = os.getenv("TELEGRAM_API_URL") + "sendMessage"
+    """
+    Send a text message through the rate-limited client.
+
+    Returns the sent Message, or None if Telegram refused it (after the
+    client's retries); the error is logged, not raised, so callers that
+    fire off a notice needn't handle it. Use telegram_client.call to get
+    TelegramAPIError instead.
+    """
     payload = {"chat_id": chat_id, "text": text}
     print("send message: ", text, " to chat: ", chat_id)
-    
-    async with httpx.AsyncClient() as client:
-        await client.post(url, json=payload) 
\ No newline at end of file
+
+    return await _send_logged(payload)
+
+async def _send_logged(payload: dict):
+    try:
+        return await telegram_client.call("sendMessage", payload)
+    except TelegramAPIError as e:
+        logger.error(f"Sending a message to chat {payload['chat_id']} failed: {str(e)}")
+        return None
@@ -1,14 +1,59 @@
-# Contains all the HTML/CSS/JS template strings
-def generate_styles() -> str:
-    return """
-    <style>
-        /* ... your CSS styles ... */
-    </style>
+# Compiled Jinja templates for the history pages and the static assets they link
+import hashlib
+from functools import lru_cache
+from urllib.parse import parse_qs
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from starlette.staticfiles import StaticFiles
+from config import get_settings
+from .scrapers.urls import is_web_url
+
+TEMPLATES_DIR = get_settings().BASE_DIR / "templates"
+STATIC_DIR = get_settings().BASE_DIR / "static"
+
+# Assets are referenced with a content hash, so a versioned URL never changes
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@lru_cache(maxsize=None)
+def static_url(name: str) -> str:
+    """URL of a file under /static, versioned by its content."""
+    digest = hashlib.sha256((STATIC_DIR / name).read_bytes()).hexdigest()[:12]
+    return f"/static/{name}?v={digest}"
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles that lets browsers keep versioned (`?v=`) assets for good."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+        if "v" in query:
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+
+# Templates are compiled once at import and never reloaded; the files only
+# change with a deploy
+environment = Environment(
+    loader=FileSystemLoader(str(TEMPLATES_DIR)),
+    autoescape=select_autoescape(["html"]),
+    trim_blocks=True,
+    lstrip_blocks=True,
+    auto_reload=False,
+)
+environment.globals["static_url"] = static_url
+
+def web_url(value) -> str:
     """
+    A scraped or submitted URL made safe for href/src.
+
+    Autoescaping doesn't stop a javascript: URL, and og:url, og:image and
+    POST /links/ input are all outside our control.
+    """
+    return value.strip() if is_web_url(value) else "#"
+
+environment.filters["web_url"] = web_url
 
-def generate_scripts(chat_id: str) -> str:
-    return """
-    <script>
-        /* ... your JavaScript code ... */
-    </script>
-    """ 
\ No newline at end of file
+history_template = environment.get_template("history.html")
+history_shell_template = environment.get_template("history_shell.html")
+cards_template = environment.get_template("_cards.html")
+card_macros = environment.get_template("_card.html").module